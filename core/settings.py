@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -119,6 +120,43 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Pré-carregar e aquecer o modelo ML ao importar core.wsgi/core.asgi
+# (usar com servidores pré-fork, ex.: gunicorn --preload)
+ML_PRELOAD = os.environ.get('PARTICIPADF_PRELOAD') == '1'
+
+# Memória máxima (estimada) das versões do modelo mantidas carregadas ao mesmo tempo
+ML_CACHE_MODELOS_MB = int(os.environ.get('PARTICIPADF_CACHE_MODELOS_MB', '512'))
+
+# Inferência em cascata (NB → LR → RF só quando a decisão ainda depende da floresta)
+ML_CASCATA = os.environ.get('PARTICIPADF_CASCATA') == '1'
+
+# Controle de admissão do ML por processo (ML_MAX_EM_VOO=0 desativa).
+# Sem vaga em ML_ESPERA_MAX_MS: 'degradar' responde só com regex, 'rejeitar' responde 429
+ML_MAX_EM_VOO = int(os.environ.get('PARTICIPADF_ML_MAX_EM_VOO', '0'))
+ML_ESPERA_MAX_MS = float(os.environ.get('PARTICIPADF_ML_ESPERA_MAX_MS', '50'))
+ML_POLITICA_SOBRECARGA = os.environ.get('PARTICIPADF_ML_POLITICA', 'degradar')
+ML_RETRY_AFTER = int(os.environ.get('PARTICIPADF_ML_RETRY_AFTER', '1'))
+
+# Avaliação em sombra de um modelo candidato (vazio desativa)
+ML_SOMBRA_MODELO = os.environ.get('PARTICIPADF_SOMBRA_MODELO', '')
+ML_SOMBRA_AMOSTRAGEM = float(os.environ.get('PARTICIPADF_SOMBRA_AMOSTRAGEM', '0.1'))
+ML_SOMBRA_FILA_MAX = int(os.environ.get('PARTICIPADF_SOMBRA_FILA_MAX', '100'))
+
+# Log de auditoria de cada classificação da API, gravado em lotes por uma thread de fundo.
+# Com o buffer cheio: 'bloquear' (espera até AUDITORIA_ESPERA_MAX_MS), 'descartar' ou 'descartar_antigo'
+AUDITORIA_ATIVA = os.environ.get('PARTICIPADF_AUDITORIA') == '1'
+AUDITORIA_FILA_MAX = int(os.environ.get('PARTICIPADF_AUDITORIA_FILA_MAX', '10000'))
+AUDITORIA_LOTE = int(os.environ.get('PARTICIPADF_AUDITORIA_LOTE', '500'))
+AUDITORIA_INTERVALO_S = float(os.environ.get('PARTICIPADF_AUDITORIA_INTERVALO_S', '1.0'))
+AUDITORIA_POLITICA = os.environ.get('PARTICIPADF_AUDITORIA_POLITICA', 'bloquear')
+AUDITORIA_ESPERA_MAX_MS = float(os.environ.get('PARTICIPADF_AUDITORIA_ESPERA_MAX_MS', '100'))
+
+# Regras de dados pessoais do regex (JSON); recarregadas quando o arquivo muda
+REGRAS_PII_PATH = os.environ.get('PARTICIPADF_REGRAS', str(BASE_DIR / 'pedidos' / 'regras_pii.json'))
+
+# Arquivos enviados para jobs assíncronos de classificação
+CLASSIFICACAO_JOBS_DIR = BASE_DIR / 'jobs'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -11,6 +11,15 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'participaDf.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Modo pré-fork (ex.: gunicorn --preload): carrega e aquece o modelo no
+# processo mestre para que os workers o herdem compartilhado.
+from django.conf import settings
+
+if getattr(settings, 'ML_PRELOAD', False):
+    from pedidos.services.warmup import preparar_para_fork
+
+    preparar_para_fork()
@@ -58,7 +58,7 @@ def main():
     
     # Passo 2: Treinar modelo
     executar_comando(
-        "python manage.py treinar_modelo",
+        "python manage.py treinar_modelo --ativar",
         "PASSO 2/4: Treinando modelo ML com dataset rotulado"
     )
     
@@ -0,0 +1,121 @@
+import time
+from collections import Counter
+import pandas as pd
+from django.core.management.base import BaseCommand
+from pedidos.services.detector import detect_personal_data, detectar_agrupando
+from pedidos.services.jobs import COLUNAS_TEXTO
+from pedidos.services.quase_duplicatas import (
+    LIMIAR_SIMILARIDADE, agrupar_textos, get_cluster_stats, reset_cluster_stats
+)
+
+
+class Command(BaseCommand):
+    help = 'Agrupa pedidos quase idênticos (MinHash) e mede as predições ML economizadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Arquivo .csv, .xlsx ou .jsonl (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--coluna',
+            help=f'Coluna de texto (padrão: a primeira entre {", ".join(COLUNAS_TEXTO)}, body)',
+        )
+        parser.add_argument(
+            '--limiar',
+            type=float,
+            default=LIMIAR_SIMILARIDADE,
+            help=f'Similaridade de Jaccard mínima para agrupar (padrão: {LIMIAR_SIMILARIDADE})',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.35,
+            help='Threshold de confiança ML (padrão: 0.35)',
+        )
+        parser.add_argument(
+            '--comparar',
+            action='store_true',
+            help='Classifica também sem agrupar e compara decisões e tempo',
+        )
+
+    def handle(self, *args, **options):
+        caminho = options['file']
+        if caminho.endswith('.jsonl'):
+            df = pd.read_json(caminho, lines=True)
+        elif caminho.endswith('.csv'):
+            df = pd.read_csv(caminho)
+        else:
+            df = pd.read_excel(caminho)
+
+        candidatas = [options['coluna']] if options['coluna'] else COLUNAS_TEXTO + ['body']
+        coluna = next((c for c in candidatas if c in df.columns), None)
+        if coluna is None:
+            self.stdout.write(self.style.ERROR(f'❌ Coluna de texto não encontrada (esperado uma de: {", ".join(candidatas)})'))
+            return
+        textos = df[coluna].fillna('').astype(str).tolist()
+        threshold = options['threshold']
+
+        # Agrupamento
+        reset_cluster_stats()
+        inicio = time.perf_counter()
+        grupos = agrupar_textos(textos, options['limiar'])
+        tempo_agrupamento = time.perf_counter() - inicio
+        tamanhos = Counter(grupos)
+        estatisticas = get_cluster_stats()
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'QUASE DUPLICATAS - {caminho} (coluna "{coluna}", limiar={options["limiar"]})')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'Textos:                          {len(textos)}')
+        self.stdout.write(f'Grupos:                          {estatisticas["grupos"]}')
+        self.stdout.write(f'Grupos com mais de um texto:     {estatisticas["grupos_com_repeticao"]}')
+        self.stdout.write(
+            f'Textos nesses grupos:            {estatisticas["textos_em_grupos_com_repeticao"]} '
+            f'({estatisticas["textos_em_grupos_com_repeticao"] / max(len(textos), 1):.1%})'
+        )
+        self.stdout.write(f'Maior grupo:                     {estatisticas["maior_grupo"]}')
+        self.stdout.write(
+            f'Tempo de agrupamento:            {tempo_agrupamento:.2f}s '
+            f'({tempo_agrupamento / max(len(textos), 1) * 1e6:.0f} µs/texto)'
+        )
+
+        maiores = [(g, n) for g, n in tamanhos.most_common(5) if n > 1]
+        if maiores:
+            self.stdout.write('\nMaiores grupos:')
+            for grupo, tamanho in maiores:
+                self.stdout.write(f'  [{tamanho:>4} textos] {textos[grupo][:60]}...')
+
+        # Classificação agrupada: regex em todos, ML uma vez por grupo
+        # (o modelo é carregado antes, fora da medição)
+        if textos:
+            detect_personal_data(textos[0], threshold)
+        inicio = time.perf_counter()
+        agrupados = detectar_agrupando(textos, threshold, grupos=grupos)
+        tempo_agrupado = time.perf_counter() - inicio
+        chegaram_ml = sum(1 for r in agrupados if r['metodo'] == 'ml')
+        evitadas = get_cluster_stats().get('ml_evitadas', 0)
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write('PREDIÇÕES ML')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'Textos que chegaram ao ML:       {chegaram_ml}')
+        self.stdout.write(f'Predições executadas:            {chegaram_ml - evitadas}')
+        self.stdout.write(
+            f'Predições evitadas:              {evitadas} ({evitadas / max(chegaram_ml, 1):.1%})'
+        )
+        self.stdout.write(f'Tempo (agrupado):                {tempo_agrupado:.2f}s')
+
+        if options['comparar']:
+            inicio = time.perf_counter()
+            individuais = [detect_personal_data(texto, threshold) for texto in textos]
+            tempo_individual = time.perf_counter() - inicio
+            divergencias = sum(
+                1 for a, b in zip(agrupados, individuais)
+                if a['contem_dados_pessoais'] != b['contem_dados_pessoais']
+            )
+            self.stdout.write(f'Tempo (sem agrupar):             {tempo_individual:.2f}s')
+            self.stdout.write(f'Decisões divergentes:            {divergencias}')
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Análise concluída'))
@@ -0,0 +1,146 @@
+import threading
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from pedidos.models import AuditoriaClassificacao
+from pedidos.services.auditoria import BLOQUEAR, POLITICAS, RegistradorAuditoria
+from pedidos.services.classification_store import hash_texto
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+
+
+# Registros do benchmark são identificados por esta versão e apagados no fim
+VERSAO_BENCHMARK = 'benchmark-auditoria'
+LIMITE_US = 50
+
+
+class Command(BaseCommand):
+    help = 'Mede o custo por requisição do log de auditoria (buffer + thread de fundo) contra o INSERT síncrono'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Textos usados no hash: .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--requisicoes',
+            type=int,
+            default=20000,
+            help='Registros enviados ao buffer (padrão: 20000)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Threads registrando ao mesmo tempo, como workers com --threads (padrão: 4)',
+        )
+        parser.add_argument(
+            '--sincronos',
+            type=int,
+            default=500,
+            help='INSERTs síncronos medidos para comparação (padrão: 500)',
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Registros por transação (padrão: 500)')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Gatilho de tempo em segundos (padrão: 1.0)')
+        parser.add_argument('--capacidade', type=int, default=10000, help='Capacidade do buffer (padrão: 10000)')
+        parser.add_argument('--politica', choices=POLITICAS, default=BLOQUEAR, help='Política com o buffer cheio')
+
+    def handle(self, *args, **options):
+        try:
+            textos = ler_textos(options['file'], COLUNAS_TEXTO + ['body'])
+            AuditoriaClassificacao.objects.exists()
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        except DatabaseError as e:
+            raise CommandError(f'Tabela de auditoria indisponível ({e}); rode python manage.py migrate')
+
+        resultado = {
+            'contem_dados_pessoais': True,
+            'metodo': 'regex',
+            'tipos_detectados': ['CPF'],
+            'confianca': 1.0,
+            'detalhes': {'versao_modelo': VERSAO_BENCHMARK},
+        }
+        requisicoes = options['requisicoes']
+        n_threads = options['threads']
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(
+            f'BENCHMARK AUDITORIA - {requisicoes} registros, {n_threads} thread(s), '
+            f'lote {options["lote"]}, política {options["politica"]}'
+        )
+        self.stdout.write('=' * 70)
+
+        try:
+            # 1. INSERT síncrono por requisição (o que a auditoria evita)
+            sincronos = []
+            for i in range(options['sincronos']):
+                inicio = time.perf_counter()
+                AuditoriaClassificacao.objects.create(
+                    texto_hash=hash_texto(textos[i % len(textos)]), contem_dados_pessoais=True, metodo='regex',
+                    tipos_detectados=['CPF'], confianca=1.0, versao_modelo=VERSAO_BENCHMARK, latencia_ms=0.0,
+                )
+                sincronos.append((time.perf_counter() - inicio) * 1e6)
+
+            # 2. Buffer + thread de fundo
+            registrador = RegistradorAuditoria(
+                capacidade=options['capacidade'],
+                lote=options['lote'],
+                intervalo_s=options['intervalo'],
+                politica=options['politica'],
+            )
+            tempos = [[] for _ in range(n_threads)]
+
+            def registrar(indice):
+                locais = tempos[indice]
+                for i in range(indice, requisicoes, n_threads):
+                    inicio = time.perf_counter()
+                    registrador.registrar(textos[i % len(textos)], resultado, 1.0)
+                    locais.append((time.perf_counter() - inicio) * 1e6)
+
+            inicio = time.perf_counter()
+            threads = [threading.Thread(target=registrar, args=(i,)) for i in range(n_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            tempo_envio = time.perf_counter() - inicio
+            registrador.encerrar()
+            tempo_total = time.perf_counter() - inicio
+            estatisticas = registrador.estatisticas()
+            gravados = AuditoriaClassificacao.objects.filter(versao_modelo=VERSAO_BENCHMARK).count()
+        finally:
+            AuditoriaClassificacao.objects.filter(versao_modelo=VERSAO_BENCHMARK).delete()
+
+        self.stdout.write(f'\n{"Caminho da requisição":<30} {"média µs":>10} {"p50 µs":>10} {"p99 µs":>10} {"máx µs":>10}')
+        self.stdout.write('-' * 74)
+        for nome, valores in (
+            ('INSERT síncrono', sincronos),
+            ('Buffer (write-behind)', [t for locais in tempos for t in locais]),
+        ):
+            valores = np.array(valores)
+            self.stdout.write(
+                f'{nome:<30} {valores.mean():>10.1f} {np.percentile(valores, 50):>10.1f} '
+                f'{np.percentile(valores, 99):>10.1f} {valores.max():>10.1f}'
+            )
+
+        self.stdout.write(
+            f'\nGravação: {estatisticas.get("gravadas", 0)} registros em {estatisticas.get("lotes", 0)} transações; '
+            f'envio {tempo_envio:.2f} s, envio + descarga {tempo_total:.2f} s'
+        )
+        self.stdout.write(
+            f'Descartados: {estatisticas.get("descartadas", 0)}, esperas por espaço: {estatisticas.get("esperas", 0)}, '
+            f'erros: {estatisticas.get("erros", 0)}'
+        )
+
+        p99 = np.percentile([t for locais in tempos for t in locais], 99)
+        if p99 < LIMITE_US:
+            self.stdout.write(self.style.SUCCESS(f'✓ p99 do registro abaixo de {LIMITE_US} µs ({p99:.1f} µs)'))
+        else:
+            self.stdout.write(self.style.WARNING(f'⚠️  p99 do registro acima de {LIMITE_US} µs ({p99:.1f} µs)'))
+        esperados = requisicoes + options['sincronos'] - estatisticas.get('descartadas', 0)
+        if gravados != esperados:
+            self.stdout.write(self.style.ERROR(f'❌ {gravados} registros no banco, esperado {esperados}'))
+        else:
+            self.stdout.write('✓ Todos os registros aceitos chegaram ao banco')
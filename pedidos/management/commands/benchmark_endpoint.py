@@ -0,0 +1,86 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.test import Client
+from pedidos.services.detector import detect_personal_data
+
+
+ROTAS = (
+    ('DRF (classificar-pedido/)', '/classificar-pedido/'),
+    ('Enxuta (classificar-pedido/rapido/)', '/classificar-pedido/rapido/'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compara a latência por requisição das rotas DRF e enxuta de classificar-pedido'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Arquivo com coluna "texto" (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Quantas vezes percorrer o dataset (padrão: 5)',
+        )
+
+    def handle(self, *args, **options):
+        textos = pd.read_csv(options['file'])['texto'].fillna('').astype(str).tolist()
+        repeticoes = options['repeticoes']
+        # Passa pelo WSGIHandler e por todos os middlewares, sem rede
+        cliente = Client(HTTP_HOST='localhost')
+        corpos = [json.dumps({'texto': texto}) for texto in textos]
+
+        # Aquecimento: carrega o modelo e resolve as rotas
+        for _, rota in ROTAS:
+            cliente.post(rota, corpos[0], content_type='application/json')
+
+        latencias = {nome: [] for nome, _ in ROTAS}
+        latencias['detector'] = []
+        divergentes = 0
+        for _ in range(repeticoes):
+            for texto, corpo in zip(textos, corpos):
+                inicio = time.perf_counter()
+                detect_personal_data(texto)
+                latencias['detector'].append((time.perf_counter() - inicio) * 1e6)
+
+                # Rotas intercaladas texto a texto, para que variações da
+                # máquina afetem as duas igualmente
+                respostas = []
+                for nome, rota in ROTAS:
+                    inicio = time.perf_counter()
+                    resposta = cliente.post(rota, corpo, content_type='application/json')
+                    latencias[nome].append((time.perf_counter() - inicio) * 1e6)
+                    respostas.append(resposta.content)
+                divergentes += respostas[0] != respostas[1]
+
+        self.stdout.write(f'\n{len(textos)} textos x {repeticoes} repetições (test Client, sem rede)\n')
+        self.stdout.write(f'{"Cenário":<38} {"média µs":>10} {"p50 µs":>10} {"p95 µs":>10} {"overhead µs":>12}')
+        self.stdout.write('-' * 84)
+
+        detector = np.array(latencias['detector'])
+        overhead = {}
+        for nome in ['detector'] + [nome for nome, _ in ROTAS]:
+            valores = np.array(latencias[nome])
+            # Overhead do framework: mediana da diferença para o detector puro
+            overhead[nome] = np.median(valores - detector)
+            self.stdout.write(
+                f'{"Só detect_personal_data" if nome == "detector" else nome:<38} {valores.mean():>10.1f} '
+                f'{np.percentile(valores, 50):>10.1f} {np.percentile(valores, 95):>10.1f} '
+                f'{"-" if nome == "detector" else f"{overhead[nome]:.1f}":>12}'
+            )
+
+        drf, enxuta = (nome for nome, _ in ROTAS)
+        self.stdout.write(
+            f'\n✓ Overhead por requisição removido: {overhead[drf] - overhead[enxuta]:.1f} µs '
+            f'({overhead[drf]:.1f} → {overhead[enxuta]:.1f} µs)'
+        )
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f'❌ {divergentes} respostas diferentes entre as rotas'))
+        else:
+            self.stdout.write('✓ Respostas idênticas byte a byte nas duas rotas')
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from pedidos.services.fast_vectorizer import VetorizadorRapido
+from pedidos.services.ml_model import carregar_modelo
+
+
+def medir(funcao, textos, repeticoes):
+    """Executa `funcao` em cada texto e retorna as latências em microssegundos."""
+    latencias = []
+    for _ in range(repeticoes):
+        for texto in textos:
+            inicio = time.perf_counter()
+            funcao(texto)
+            latencias.append((time.perf_counter() - inicio) * 1e6)
+    return np.array(latencias)
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark da inferência de um texto: caminho scikit-learn vs. vetorizador rápido'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Arquivo com coluna "texto" (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Quantas vezes percorrer o dataset (padrão: 5)',
+        )
+
+    def handle(self, *args, **options):
+        textos = pd.read_csv(options['file'])['texto'].fillna('').astype(str).tolist()
+        repeticoes = options['repeticoes']
+
+        modelo, vectorizer = carregar_modelo()
+        rapido = VetorizadorRapido(vectorizer)
+
+        cenarios = [
+            ('transform sklearn', lambda t: vectorizer.transform([t])),
+            ('transform rápido', rapido.transform),
+            ('predict_proba sklearn', lambda t: modelo.predict_proba(vectorizer.transform([t]))),
+            ('predict_proba rápido', lambda t: modelo.predict_proba(rapido.transform(t))),
+        ]
+
+        # Aquecimento (caches, alocações iniciais)
+        for _, funcao in cenarios:
+            funcao(textos[0])
+
+        self.stdout.write(f'\n{len(textos)} textos x {repeticoes} repetições\n')
+        self.stdout.write(f'{"Cenário":<24} {"média µs":>10} {"p50 µs":>10} {"p95 µs":>10}')
+        self.stdout.write('-' * 58)
+
+        medias = {}
+        for nome, funcao in cenarios:
+            latencias = medir(funcao, textos, repeticoes)
+            medias[nome] = latencias.mean()
+            self.stdout.write(
+                f'{nome:<24} {latencias.mean():>10.1f} '
+                f'{np.percentile(latencias, 50):>10.1f} {np.percentile(latencias, 95):>10.1f}'
+            )
+
+        self.stdout.write(
+            f'\n✓ Transform: {medias["transform sklearn"] / medias["transform rápido"]:.1f}x mais rápido'
+        )
+        self.stdout.write(
+            f'✓ Fim a fim: {medias["predict_proba sklearn"] / medias["predict_proba rápido"]:.2f}x mais rápido'
+        )
@@ -0,0 +1,135 @@
+import json
+import os
+import platform
+import time
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.detector import batch_detect
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+from pedidos.services.lote_paralelo import (
+    FATIAS_POR_WORKER, PROCESSOS, THREADS, ExecutorLotes, gil_ativo
+)
+
+
+def _veredicto(resultado):
+    return (
+        resultado['contem_dados_pessoais'], resultado['metodo'],
+        tuple(resultado['tipos_detectados']), round(resultado['confianca'], 6),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Mede a escala da detecção em lote com 1 a 32 threads ou processos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Textos: .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--textos',
+            type=int,
+            default=2000,
+            help='Tamanho do lote; o arquivo é repetido até atingi-lo (padrão: 2000)',
+        )
+        parser.add_argument(
+            '--workers',
+            default='1,2,4,8,16,32',
+            help='Quantidades de workers medidas (padrão: 1,2,4,8,16,32)',
+        )
+        parser.add_argument(
+            '--modos',
+            default=f'{THREADS},{PROCESSOS}',
+            help=f'Modos medidos, separados por vírgula (padrão: {THREADS},{PROCESSOS})',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.35,
+            help='Threshold de confiança do ML (padrão: 0.35)',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='ARQUIVO',
+            help='Grava as medições em JSON',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            base = [t for t in ler_textos(options['file'], COLUNAS_TEXTO + ['body']) if t.strip()]
+            niveis = [int(n) for n in options['workers'].split(',')]
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if not base:
+            raise CommandError(f'Nenhum texto em {options["file"]}')
+        modos = [m.strip() for m in options['modos'].split(',')]
+        for modo in modos:
+            if modo not in (THREADS, PROCESSOS):
+                raise CommandError(f'Modo desconhecido: {modo} (use {THREADS} ou {PROCESSOS})')
+        textos = (base * (options['textos'] // len(base) + 1))[:options['textos']]
+        threshold = options['threshold']
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'BENCHMARK PARALELO - {len(textos)} textos, workers {options["workers"]}')
+        self.stdout.write('=' * 70)
+        gil = gil_ativo()
+        self.stdout.write(
+            f'Python {platform.python_version()} ({"com GIL" if gil else "free-threaded, sem GIL"}), '
+            f'{os.cpu_count()} CPU(s)'
+        )
+        if max(niveis) > (os.cpu_count() or 1):
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Mais workers que CPUs: acima de {os.cpu_count()} não há ganho a esperar'
+            ))
+
+        # Referência sequencial, também usada para conferir os resultados
+        batch_detect(base[:20], threshold)
+        inicio = time.perf_counter()
+        referencia = [_veredicto(r) for r in batch_detect(textos, threshold)]
+        sequencial = len(textos) / (time.perf_counter() - inicio)
+        self.stdout.write(f'✓ Sequencial (batch_detect): {sequencial:.0f} textos/s\n')
+
+        self.stdout.write(
+            f'{"Modo":<10} {"Workers":>8} {"textos/s":>10} {"x 1 worker":>11} {"x sequencial":>13} {"eficiência":>11}'
+        )
+        self.stdout.write('-' * 68)
+        medicoes = []
+        divergentes = 0
+        for modo in modos:
+            um_worker = None
+            for workers in niveis:
+                with ExecutorLotes(workers, modo, threshold) as executor:
+                    # Sobe os workers (processos nascem no primeiro envio) fora da medição
+                    executor.detectar(textos[:workers * FATIAS_POR_WORKER])
+                    inicio = time.perf_counter()
+                    resultados = executor.detectar(textos)
+                    vazao = len(textos) / (time.perf_counter() - inicio)
+                divergentes += sum(_veredicto(r) != esperado for r, esperado in zip(resultados, referencia))
+                um_worker = um_worker or vazao
+                medicoes.append({'modo': modo, 'workers': workers, 'textos_por_s': vazao})
+                self.stdout.write(
+                    f'{modo:<10} {workers:>8} {vazao:>10.0f} {vazao / um_worker:>10.2f}x '
+                    f'{vazao / sequencial:>12.2f}x {vazao / um_worker / workers:>11.0%}'
+                )
+
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f'\n❌ {divergentes} resultados diferentes do sequencial'))
+        else:
+            self.stdout.write('\n✓ Resultados idênticos ao sequencial em todos os modos')
+        if gil and THREADS in modos:
+            self.stdout.write(
+                '  Com GIL, threads não escalam (o regex segura o GIL); num build free-threaded '
+                'o modo auto usa threads'
+            )
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'python': platform.python_version(),
+                    'gil': gil,
+                    'cpus': os.cpu_count(),
+                    'textos': len(textos),
+                    'sequencial_textos_por_s': sequencial,
+                    'medicoes': medicoes,
+                }, f, indent=2)
+            self.stdout.write(f'✓ Resultado gravado em {options["json"]}')
@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.detector import detect_personal_data
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+from pedidos.services.preprocessing import analisar_texto
+from pedidos.services.regex_rules import ORDEM_EARLY_EXIT, TIPOS_REGEX, detect_personal_data_regex
+
+
+class Command(BaseCommand):
+    help = 'Mede o ganho da busca por tipos e do early_exit do regex no tráfego real'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Textos: .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Quantas vezes percorrer os textos (padrão: 5)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            textos = ler_textos(options['file'], COLUNAS_TEXTO + ['body'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        repeticoes = options['repeticoes']
+        # Pré-processamento fora da medição: igual para todos os cenários
+        analisados = [analisar_texto(texto) for texto in textos]
+
+        cenarios = [('Regex completo', {}), ('Regex early_exit', {'early_exit': True})]
+        cenarios += [(f'Só {tipo}', {'tipos': [tipo], 'early_exit': True}) for tipo in TIPOS_REGEX]
+        tempos = {nome: [] for nome, _ in cenarios}
+        acertos = {nome: 0 for nome, _ in cenarios}
+        divergentes = 0
+
+        for repeticao in range(repeticoes):
+            for texto, analisado in zip(textos, analisados):
+                # Cenários intercalados texto a texto
+                veredictos = {}
+                for nome, parametros in cenarios:
+                    inicio = time.perf_counter()
+                    resultado = detect_personal_data_regex(texto, analisado, **parametros)
+                    tempos[nome].append((time.perf_counter() - inicio) * 1e6)
+                    veredictos[nome] = resultado['detected']
+                    if repeticao == 0:
+                        acertos[nome] += resultado['detected']
+                divergentes += veredictos['Regex completo'] != veredictos['Regex early_exit']
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'BENCHMARK REGEX - {len(textos)} textos de {options["file"]} x {repeticoes}')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'\n{"Cenário":<26} {"média µs":>10} {"p50 µs":>10} {"p95 µs":>10} {"detectados":>11}')
+        self.stdout.write('-' * 70)
+        for nome, _ in cenarios:
+            valores = np.array(tempos[nome])
+            self.stdout.write(
+                f'{nome:<26} {valores.mean():>10.1f} {np.percentile(valores, 50):>10.1f} '
+                f'{np.percentile(valores, 95):>10.1f} {acertos[nome] / len(textos):>11.1%}'
+            )
+
+        completo = np.mean(tempos['Regex completo'])
+        antecipado = np.mean(tempos['Regex early_exit'])
+        self.stdout.write(
+            f'\n✓ early_exit: {completo:.1f} → {antecipado:.1f} µs por texto '
+            f'({1 - antecipado / completo:.0%} a menos)'
+        )
+        # Custo por acerto: base de ORDEM_EARLY_EXIT em regex_rules
+        self.stdout.write(f'  Ordem do early_exit: {", ".join(ORDEM_EARLY_EXIT)}')
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f'❌ {divergentes} veredictos diferentes do regex completo'))
+        else:
+            self.stdout.write('✓ Mesmo veredicto do regex completo em todos os textos')
+
+        # Detector híbrido: o early_exit só economiza nos textos em que o
+        # regex acerta; os demais vão ao ML do mesmo jeito
+        detect_personal_data(textos[0])  # aquecimento: carrega o modelo
+        hibrido = {False: [], True: []}
+        for texto in textos:
+            for early_exit in (False, True):
+                inicio = time.perf_counter()
+                detect_personal_data(texto, early_exit=early_exit)
+                hibrido[early_exit].append((time.perf_counter() - inicio) * 1e6)
+        self.stdout.write(
+            f'✓ Detector híbrido: {np.mean(hibrido[False]):.1f} → {np.mean(hibrido[True]):.1f} µs por texto'
+        )
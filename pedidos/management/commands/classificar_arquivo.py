@@ -0,0 +1,170 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.avaliacao_shards import interpretar_shard
+from pedidos.services.detector import batch_detect
+from pedidos.services.indice_linhas import IndiceLinhas, intervalo_da_parte
+from pedidos.services.jobs import COLUNAS_TEXTO
+from pedidos.services.lote_paralelo import AUTO, MODOS, ExecutorLotes
+from pedidos.services.processamento_retomavel import (
+    A_CADA_PADRAO, caminho_checkpoint, ler_checkpoint, processar_arquivo
+)
+
+
+class Command(BaseCommand):
+    help = 'Classifica um arquivo JSONL grande com checkpoints, retomada (--resume) e divisão por faixas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo .jsonl (uma requisição por linha)')
+        parser.add_argument(
+            '--saida',
+            help='Resultados em JSONL, uma linha por registro (padrão: <arquivo>.resultados.jsonl)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.35,
+            help='Threshold de confiança do ML (padrão: 0.35)',
+        )
+        parser.add_argument(
+            '--a-cada',
+            type=int,
+            default=A_CADA_PADRAO,
+            help=f'Registros entre checkpoints (padrão: {A_CADA_PADRAO})',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continua do último checkpoint da mesma saída, direto no offset salvo',
+        )
+        parser.add_argument(
+            '--linhas',
+            metavar='INICIO:FIM',
+            help='Só as linhas [INICIO, FIM) (base 0, ignorando linhas vazias), via índice de offsets',
+        )
+        parser.add_argument(
+            '--parte',
+            metavar='I/N',
+            help='Só a faixa de bytes I de N do arquivo, sem índice; a saída ganha o sufixo _parte_I_de_N',
+        )
+        parser.add_argument(
+            '--agrupar',
+            action='store_true',
+            help='Textos quase idênticos de cada lote compartilham a predição ML',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Classifica cada lote em N threads ou processos (padrão: 1, sequencial)',
+        )
+        parser.add_argument(
+            '--paralelo',
+            choices=MODOS,
+            default=AUTO,
+            help='Com --workers: threads, processos ou auto (threads só sem GIL)',
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo']
+        if not arquivo.endswith('.jsonl'):
+            raise CommandError('Só arquivos .jsonl são suportados (o índice é por linha)')
+        if not os.path.exists(arquivo):
+            raise CommandError(f'Arquivo não encontrado: {arquivo}')
+        if options['linhas'] and options['parte']:
+            raise CommandError('Use --linhas ou --parte, não os dois')
+        if options['a_cada'] < 1:
+            raise CommandError(f'--a-cada deve ser pelo menos 1 (recebido: {options["a_cada"]})')
+
+        saida = options['saida'] or f'{os.path.splitext(arquivo)[0]}.resultados.jsonl'
+        tamanho = os.path.getsize(arquivo)
+        total = None
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'CLASSIFICAÇÃO RETOMÁVEL - {arquivo}')
+        self.stdout.write('=' * 70)
+
+        if options['parte']:
+            # Faixa de bytes: nenhuma varredura prévia, numeração de linha desconhecida
+            try:
+                parte, partes = interpretar_shard(options['parte'])
+            except ValueError as e:
+                raise CommandError(str(e).replace('Shard', 'Parte'))
+            inicio, fim = intervalo_da_parte(tamanho, parte, partes)
+            primeira_linha = None
+            # Uma saída (e um checkpoint) por parte, para rodar as partes em paralelo
+            raiz, extensao = os.path.splitext(saida)
+            saida = f'{raiz}_parte_{parte}_de_{partes}{extensao}'
+            self.stdout.write(f'✓ Parte {parte}/{partes}: bytes {inicio} a {fim} de {tamanho}')
+        else:
+            inicio_indice = time.perf_counter()
+            indice = IndiceLinhas.abrir(arquivo)
+            self.stdout.write(
+                f'✓ Índice: {len(indice)} linhas ({(time.perf_counter() - inicio_indice) * 1000:.0f} ms, '
+                f'{arquivo}.idx)'
+            )
+            primeira, ultima = 0, len(indice)
+            if options['linhas']:
+                try:
+                    a, b = options['linhas'].split(':')
+                    primeira = int(a) if a else 0
+                    ultima = min(int(b), len(indice)) if b else len(indice)
+                except ValueError:
+                    raise CommandError(f'Intervalo inválido: {options["linhas"]} (use INICIO:FIM, ex.: 1000:2000)')
+                if not 0 <= primeira <= ultima:
+                    raise CommandError(f'Intervalo inválido: {options["linhas"]}')
+                self.stdout.write(f'✓ Linhas {primeira} a {ultima}')
+            inicio, fim = indice.offset(primeira), indice.offset(ultima)
+            primeira_linha = primeira
+            total = ultima - primeira
+
+        checkpoint = caminho_checkpoint(saida)
+        if options['resume']:
+            anterior = ler_checkpoint(checkpoint)
+            if anterior is None:
+                self.stdout.write(self.style.WARNING(f'⚠️  Nenhum checkpoint em {checkpoint}; começando do início'))
+            else:
+                self.stdout.write(
+                    f'✓ Retomando do offset {anterior["offset"]} '
+                    f'({anterior["processadas"]} registros já confirmados em {saida})'
+                )
+        threshold = options['threshold']
+        agrupar = options['agrupar']
+        relogio = time.perf_counter()
+
+        executor = None
+        if options['workers'] > 1:
+            executor = ExecutorLotes(options['workers'], options['paralelo'], threshold, agrupar=agrupar)
+            self.stdout.write(f'✓ {executor.workers} workers ({executor.modo})')
+
+        def classificar(textos):
+            if executor is not None:
+                return executor.detectar(textos)
+            return batch_detect(textos, threshold, agrupar=agrupar)
+
+        def progresso(estado):
+            feito = f'{estado["processadas"]}' + (f'/{total} ({estado["processadas"] / total:.0%})' if total else '')
+            fatia = (estado['offset'] - inicio) / max(fim - inicio, 1)
+            self.stdout.write(
+                f'  [{feito}] offset {estado["offset"]} ({min(fatia, 1):.0%} da faixa), '
+                f'{time.perf_counter() - relogio:.1f}s'
+            )
+
+        try:
+            estado = processar_arquivo(
+                arquivo, saida, classificar, COLUNAS_TEXTO + ['body'],
+                a_cada=options['a_cada'], retomar=options['resume'],
+                inicio=inicio, fim=fim, primeira_linha=primeira_linha,
+                checkpoint=checkpoint, progresso=progresso,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if executor is not None:
+                executor.encerrar()
+
+        if estado['invalidas']:
+            self.stdout.write(self.style.WARNING(f'⚠️  {estado["invalidas"]} linhas com JSON inválido'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {estado["processadas"]} registros em {saida} ({time.perf_counter() - relogio:.1f}s)'
+        ))
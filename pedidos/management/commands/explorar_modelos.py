@@ -0,0 +1,126 @@
+import json
+import os
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services import registro_modelos
+from pedidos.services.exploracao import DIRETORIO_CACHE, explorar, gerar_grade
+from pedidos.services.memoria import formatar_mb
+from pedidos.services.treinamento import configuracao_completa, hash_dataset, train_model
+
+
+class Command(BaseCommand):
+    help = 'Busca configurações de vectorizer/ensemble e mostra a fronteira F1 x latência x tamanho'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Dataset rotulado com colunas "texto" e "label" (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument('--max-features', default='1000,5000', help='Valores de max_features (padrão: 1000,5000)')
+        parser.add_argument('--ngrams', default='1-1,1-2,1-3', help='Valores de ngram_range (padrão: 1-1,1-2,1-3)')
+        parser.add_argument('--min-df', default='1,2', help='Valores de min_df (padrão: 1,2)')
+        parser.add_argument(
+            '--ensembles',
+            default='lr+rf+nb,lr+nb,lr,nb',
+            help='Subconjuntos de estimadores do voto soft (padrão: lr+rf+nb,lr+nb,lr,nb)',
+        )
+        parser.add_argument(
+            '--processos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos para validação cruzada e treino (padrão: número de CPUs)',
+        )
+        parser.add_argument(
+            '--cache',
+            default=DIRETORIO_CACHE,
+            help=f'Diretório das matrizes TF-IDF reaproveitadas (padrão: {DIRETORIO_CACHE})',
+        )
+        parser.add_argument(
+            '--relatorio',
+            default='exploracao_modelos.json',
+            help='Relatório JSON com todos os candidatos (padrão: exploracao_modelos.json)',
+        )
+        parser.add_argument(
+            '--promover',
+            type=int,
+            metavar='ID',
+            help='Treina o candidato ID do relatório, registra e ativa (não refaz a busca)',
+        )
+
+    def _ler_dataset(self, caminho):
+        df = pd.read_csv(caminho)
+        return df['texto'].fillna('').astype(str).tolist(), df['label'].astype(int).tolist()
+
+    def handle(self, *args, **options):
+        if options['promover'] is not None:
+            return self._promover(options)
+
+        try:
+            grade = gerar_grade(
+                [int(v) for v in options['max_features'].split(',')],
+                [tuple(int(n) for n in v.split('-')) for v in options['ngrams'].split(',')],
+                [int(v) for v in options['min_df'].split(',')],
+                [tuple(v.split('+')) for v in options['ensembles'].split(',')],
+            )
+            for configuracao in grade:
+                configuracao_completa(configuracao)
+        except ValueError as e:
+            raise CommandError(f'Grade inválida: {e}')
+
+        textos, labels = self._ler_dataset(options['file'])
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'EXPLORAÇÃO DE MODELOS - {len(grade)} candidatos, {len(textos)} textos')
+        self.stdout.write('=' * 70)
+
+        candidatos = explorar(
+            textos, labels, grade, processos=options['processos'], diretorio_cache=options['cache'],
+            progresso=lambda mensagem: self.stdout.write(f'✓ {mensagem}'),
+        )
+
+        self.stdout.write(
+            f'\n  {"ID":>3} {"max_feat":>8} {"ngram":>5} {"min_df":>6} {"ensemble":<9} {"F1 (CV)":>8} '
+            f'{"MB":>6} {"carga ms":>9} {"p50 ms":>7} {"lote ms":>8}'
+        )
+        self.stdout.write('  ' + '-' * 84)
+        for candidato in sorted(candidatos, key=lambda c: -c['f1_cv_medio']):
+            configuracao = candidato['configuracao']
+            marcador = '*' if candidato['pareto'] else ' '
+            self.stdout.write(
+                f'{marcador} {candidato["id"]:>3} {configuracao["max_features"]:>8} '
+                f'{"-".join(map(str, configuracao["ngram_range"])):>5} {configuracao["min_df"]:>6} '
+                f'{"+".join(configuracao["estimadores"]):<9} {candidato["f1_cv_medio"]:>8.4f} '
+                f'{formatar_mb(candidato["tamanho_bytes"]):>6} {candidato["carga_ms"]:>9.1f} '
+                f'{candidato["latencia_p50_ms"]:>7.2f} {candidato["lote_ms_por_texto"]:>8.3f}'
+            )
+        self.stdout.write('\n* fronteira de Pareto (nenhum outro candidato tem F1 maior ou igual com latência e tamanho menores ou iguais)')
+
+        relatorio = {
+            'dataset': {'arquivo': options['file'], 'hash': hash_dataset(textos, labels), 'amostras': len(textos)},
+            'candidatos': candidatos,
+        }
+        with open(options['relatorio'], 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2)
+        self.stdout.write(f'\n✓ Relatório salvo em: {options["relatorio"]}')
+        self.stdout.write(f'  Para promover um candidato: python manage.py explorar_modelos --promover <ID>')
+
+    def _promover(self, options):
+        try:
+            with open(options['relatorio'], encoding='utf-8') as f:
+                relatorio = json.load(f)
+        except OSError as e:
+            raise CommandError(f'Relatório não encontrado ({e}); rode explorar_modelos antes')
+        candidato = next((c for c in relatorio['candidatos'] if c['id'] == options['promover']), None)
+        if candidato is None:
+            raise CommandError(f'Candidato {options["promover"]} não está em {options["relatorio"]}')
+
+        arquivo = relatorio['dataset']['arquivo']
+        textos, labels = self._ler_dataset(arquivo)
+        if hash_dataset(textos, labels) != relatorio['dataset']['hash']:
+            self.stdout.write(self.style.WARNING(f'⚠️  {arquivo} mudou desde a exploração; as métricas podem diferir'))
+
+        versao = train_model(textos, labels, ativar=True, configuracao=candidato['configuracao'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Candidato {candidato["id"]} promovido: versão {versao} ativa '
+            f'({registro_modelos.DIRETORIO_MODELOS}/{versao}/)'
+        ))
@@ -0,0 +1,43 @@
+import os
+from django.core.management.base import BaseCommand
+from pedidos.services.ml_model import carregar_modelo, get_model_version
+from pedidos.services.registro_modelos import caminhos_versao
+from pedidos.services.vocabulario import VocabularioCompacto, exportar_vocabulario
+
+
+class Command(BaseCommand):
+    help = 'Gera o vocabulário compacto (mmap) a partir do vectorizer.pkl de uma versão do modelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            metavar='VERSAO',
+            help='Versão do registro de modelos (padrão: a ativa)',
+        )
+
+    def handle(self, *args, **options):
+        versao = options['modelo'] or get_model_version()
+        try:
+            caminhos = caminhos_versao(versao)
+        except ValueError:
+            self.stdout.write(self.style.ERROR(f'❌ Modelo {versao} não encontrado. Execute treinar_modelo primeiro.'))
+            return
+        vectorizer_path = caminhos['vectorizer']
+        vocabulario_path = caminhos['vocabulario']
+
+        _, vectorizer = carregar_modelo(versao)
+        exportar_vocabulario(vectorizer, vocabulario_path, versao)
+
+        vocabulario = VocabularioCompacto(vocabulario_path)
+        divergentes = [
+            termo for termo, indice in vectorizer.vocabulary_.items()
+            if vocabulario.get(termo) != indice
+        ]
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f'❌ {len(divergentes)} termos divergentes no vocabulário compacto'))
+            return
+
+        self.stdout.write(f'✓ {len(vocabulario)} termos exportados para {vocabulario_path}')
+        self.stdout.write(f'  Tamanho: {os.path.getsize(vocabulario_path) / 1024:.1f} KB '
+                          f'(vectorizer.pkl: {os.path.getsize(vectorizer_path) / 1024:.1f} KB)')
+        self.stdout.write(self.style.SUCCESS(f'✓ Versão do modelo: {vocabulario.versao_modelo}'))
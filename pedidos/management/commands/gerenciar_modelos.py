@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from pedidos.services import registro_modelos
+from pedidos.services.memoria import formatar_mb
+
+
+class Command(BaseCommand):
+    help = 'Lista, ativa e remove versões do registro de modelos (ml/modelos/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ativar',
+            metavar='VERSAO',
+            help='Torna a versão a ativa (usada quando a requisição não informa "modelo")',
+        )
+        parser.add_argument(
+            '--remover',
+            metavar='VERSAO',
+            help='Apaga os artefatos de uma versão que não esteja ativa',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['ativar']:
+                registro_modelos.ativar_versao(options['ativar'])
+                self.stdout.write(self.style.SUCCESS(f'✓ Versão ativa: {options["ativar"]}'))
+            if options['remover']:
+                registro_modelos.remover_versao(options['remover'])
+                self.stdout.write(self.style.SUCCESS(f'✓ Versão removida: {options["remover"]}'))
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(f'❌ {e}'))
+            return
+
+        versoes = registro_modelos.listar_versoes()
+        if not versoes:
+            self.stdout.write(self.style.ERROR('❌ Nenhum modelo treinado. Execute treinar_modelo primeiro.'))
+            return
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write('VERSÕES DO MODELO')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'  {"Versão":<18} {"Criado em":<20} {"F1 (CV)":>8} {"Amostras":>9} {"MB":>7}')
+        for manifesto in versoes:
+            marcador = '*' if manifesto['ativa'] else ' '
+            criado = manifesto.get('criado_em', manifesto.get('origem', ''))[:19].replace('T', ' ')
+            f1 = manifesto.get('metricas', {}).get('f1_cv_medio')
+            amostras = manifesto.get('dataset', {}).get('amostras')
+            self.stdout.write(
+                f'{marcador} {manifesto["versao"]:<18} {criado:<20} '
+                f'{f"{f1:.4f}" if f1 is not None else "-":>8} '
+                f'{amostras if amostras is not None else "-":>9} '
+                f'{formatar_mb(manifesto["tamanho_bytes"]):>7}'
+            )
+        self.stdout.write('\n* versão ativa')
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.avaliacao_shards import ResultadoParcial, mesclar
+
+
+class Command(BaseCommand):
+    help = 'Mescla os resultados parciais de testar_dataset --shard em métricas globais exatas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'parciais',
+            nargs='+',
+            help='Arquivos JSON gravados por testar_dataset --shard I/N',
+        )
+        parser.add_argument(
+            '--saida',
+            metavar='ARQUIVO',
+            help='Grava o resultado mesclado em JSON (mesmo formato dos parciais)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            parciais = [ResultadoParcial.ler(caminho) for caminho in options['parciais']]
+            mesclado = mesclar(parciais)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(str(e))
+
+        metadados = mesclado.metadados
+        matriz = mesclado.matriz
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(
+            f'RESULTADO MESCLADO - {metadados.get("arquivo")} '
+            f'({len(mesclado.shards)}/{metadados.get("total_shards")} shards, {matriz.total} textos)'
+        )
+        self.stdout.write('=' * 70)
+        modo = 'APENAS REGEX' if metadados.get('modo') == 'regex' else f'HÍBRIDO (threshold={metadados.get("threshold")})'
+        self.stdout.write(f'Modo: {modo}')
+        if metadados.get('versao_modelo'):
+            self.stdout.write(f'Modelo: {metadados["versao_modelo"]}')
+
+        self.stdout.write('\n' + matriz.relatorio(
+            target_names=['Sem Dados Pessoais', 'Com Dados Pessoais'],
+            digits=4
+        ))
+
+        cm = matriz.como_lista()
+        self.stdout.write('\nMatriz de Confusão:')
+        self.stdout.write(f'                 Predito: Sem PII  Predito: Com PII')
+        self.stdout.write(f'Real: Sem PII         {cm[0][0]:5d}           {cm[0][1]:5d}')
+        self.stdout.write(f'Real: Com PII         {cm[1][0]:5d}           {cm[1][1]:5d}')
+        self.stdout.write(f'\n📊 F1-Score: {matriz.f1():.4f}')
+
+        self.stdout.write('\nPor método:')
+        self.stdout.write(f'  {"Método":<18} {"Textos":>8} {"Precisão":>9} {"Acurácia":>9}')
+        for metodo, contadores in sorted(mesclado.por_metodo.items()):
+            self.stdout.write(
+                f'  {metodo:<18} {contadores.total:>8} {contadores.precisao():>9.4f} {contadores.acuracia():>9.4f}'
+            )
+
+        self.stdout.write('\nPor threshold ML:')
+        self.stdout.write(f'  {"Threshold":>9} {"Precisão":>9} {"Recall":>9} {"F1":>9}')
+        for chave, contadores in sorted(mesclado.por_threshold.items(), key=lambda item: float(item[0])):
+            self.stdout.write(
+                f'  {float(chave):>9.2f} {contadores.precisao():>9.4f} {contadores.recall():>9.4f} {contadores.f1():>9.4f}'
+            )
+
+        if options['saida']:
+            mesclado.gravar(options['saida'])
+            self.stdout.write(f'\n✓ Resultado mesclado salvo em: {options["saida"]}')
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Mesclagem concluída'))
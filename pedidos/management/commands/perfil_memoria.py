@@ -0,0 +1,109 @@
+import json
+import random
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+from pedidos.services.memoria import formatar_mb
+from pedidos.services.perfil_memoria import perfilar
+
+
+def _kb(valor):
+    return f'{valor / 1024:.1f}'
+
+
+class Command(BaseCommand):
+    help = 'Mede RSS e heap Python de cada componente (Django, regex, vectorizer, estimadores) e as alocações por requisição'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Textos típicos: .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv)',
+        )
+        parser.add_argument(
+            '--amostras',
+            type=int,
+            default=200,
+            help='Textos típicos medidos, sorteados do arquivo (padrão: 200)',
+        )
+        parser.add_argument(
+            '--tamanho-grande',
+            type=int,
+            default=100,
+            help='Tamanho do texto grande em KB (padrão: 100)',
+        )
+        parser.add_argument(
+            '--modelo',
+            help='Versão do modelo (padrão: a ativa)',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='ARQUIVO',
+            default='perfil_memoria.json',
+            help='Relatório JSON, para comparar entre versões (padrão: perfil_memoria.json)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            textos = ler_textos(options['file'], COLUNAS_TEXTO + ['body'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        textos = [t for t in textos if t.strip()]
+        if not textos:
+            raise CommandError(f'Nenhum texto em {options["file"]}')
+        amostra = random.Random(42).sample(textos, min(options['amostras'], len(textos)))
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write('PERFIL DE MEMÓRIA - um processo novo por componente')
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'{"Componente":<22} {"RSS MB":>10} {"Heap MB":>10} {"Pico heap MB":>13} {"Carga s":>9}')
+        self.stdout.write('-' * 68)
+
+        def progresso(nome, medida):
+            self.stdout.write(
+                f'{nome:<22} {formatar_mb(medida["rss"]):>10} {formatar_mb(medida["heap"]):>10} '
+                f'{formatar_mb(medida["pico_heap"]):>13} {medida["segundos"]:>9.2f}'
+            )
+
+        try:
+            relatorio = perfilar(
+                amostra, versao=options['modelo'], tamanho_grande=options['tamanho_grande'] * 1024,
+                progresso=progresso,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if relatorio['versao_modelo'] is None:
+            self.stdout.write(self.style.WARNING(
+                '⚠️  Modelo não encontrado: componentes de ML e alocações por requisição não medidos'
+            ))
+        else:
+            componentes = relatorio['componentes']
+            estimadores = sum(m['rss'] for nome, m in componentes.items() if nome.startswith('estimador_'))
+            self.stdout.write(
+                f'\nModelo {relatorio["versao_modelo"]}: estimadores somam {formatar_mb(estimadores)} MB '
+                f'de RSS, o ensemble carregado inteiro {formatar_mb(componentes["ensemble"]["rss"])} MB'
+            )
+
+            self.stdout.write('\n' + '=' * 70)
+            self.stdout.write('ALOCAÇÕES POR REQUISIÇÃO (tracemalloc, modelo carregado e aquecido)')
+            self.stdout.write('=' * 70)
+            self.stdout.write(
+                f'{"Textos":<10} {"Chamadas":>9} {"KB/texto":>9} {"Pico p50 KB":>12} {"Pico p95 KB":>12} '
+                f'{"Pico máx KB":>12} {"Retido KB":>10}'
+            )
+            self.stdout.write('-' * 80)
+            for categoria, medida in relatorio['requisicoes'].items():
+                self.stdout.write(
+                    f'{categoria:<10} {medida["chamadas"]:>9} {_kb(medida["bytes_medio"]):>9} '
+                    f'{_kb(medida["pico_p50"]):>12} {_kb(medida["pico_p95"]):>12} '
+                    f'{_kb(medida["pico_max"]):>12} {_kb(medida["retido_total"]):>10}'
+                )
+            for categoria, medida in relatorio['requisicoes'].items():
+                if medida['maiores_retencoes']:
+                    self.stdout.write(f'\nMaiores retenções ({categoria}):')
+                    for item in medida['maiores_retencoes']:
+                        self.stdout.write(f'  {_kb(item["bytes"]):>8} KB  {item["local"]}')
+
+        with open(options['json'], 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Relatório gravado em {options["json"]}'))
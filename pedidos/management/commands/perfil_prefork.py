@@ -0,0 +1,105 @@
+import json
+import os
+import signal
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from pedidos.services.memoria import formatar_mb, uso_memoria
+from pedidos.services.warmup import aquecer, preparar_para_fork
+
+
+class Command(BaseCommand):
+    help = 'Compara RSS/USS por worker com e sem pré-carregamento do modelo antes do fork'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Quantidade de processos filhos simulando workers (padrão: 4)',
+        )
+        parser.add_argument(
+            '--requisicoes',
+            type=int,
+            default=20,
+            help='Rodadas de textos de aquecimento processadas por worker (padrão: 20)',
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            self.stdout.write(self.style.ERROR('❌ Este comando requer os.fork (Linux/macOS)'))
+            return
+
+        connections.close_all()
+        workers = options['workers']
+        requisicoes = options['requisicoes']
+
+        # Primeiro sem pré-carregamento: o mestre ainda não carregou o modelo
+        sem_preload = self._medir(workers, requisicoes)
+
+        inicio = time.perf_counter()
+        if not preparar_para_fork():
+            self.stdout.write(self.style.ERROR('❌ Modelo não encontrado. Execute treinar_modelo primeiro.'))
+            return
+        self.stdout.write(f'\n✓ Modelo carregado e aquecido no mestre em {time.perf_counter() - inicio:.2f}s')
+        com_preload = self._medir(workers, requisicoes)
+
+        for titulo, medidas in (('SEM PRÉ-CARREGAMENTO', sem_preload), ('COM PRÉ-CARREGAMENTO (pré-fork)', com_preload)):
+            self.stdout.write('\n' + '=' * 70)
+            self.stdout.write(titulo)
+            self.stdout.write('=' * 70)
+            self.stdout.write(f'{"PID":>8} {"RSS MB":>10} {"USS MB":>10} {"PSS MB":>10} {"1ª rodada ms":>13}')
+            for medida in medidas:
+                self.stdout.write(
+                    f'{medida["pid"]:>8} {formatar_mb(medida["rss"]):>10} {formatar_mb(medida["uss"]):>10} '
+                    f'{formatar_mb(medida["pss"]):>10} {medida["primeira_ms"]:>13.1f}'
+                )
+            self.stdout.write(
+                f'{"Total":>8} {formatar_mb(sum(m["rss"] for m in medidas)):>10} '
+                f'{formatar_mb(sum(m["uss"] for m in medidas)):>10} '
+                f'{formatar_mb(sum(m["pss"] for m in medidas)):>10}'
+            )
+
+        uss_antes = sum(m['uss'] for m in sem_preload)
+        uss_depois = sum(m['uss'] for m in com_preload)
+        self.stdout.write(
+            f'\n📊 Memória exclusiva (USS) somada dos workers: {formatar_mb(uss_antes)} MB → {formatar_mb(uss_depois)} MB'
+        )
+
+    def _medir(self, workers, requisicoes):
+        """Cria os workers por fork e coleta a memória de todos vivos ao mesmo tempo."""
+        filhos = []
+        for _ in range(workers):
+            leitura, escrita = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(leitura)
+                self._worker(escrita, requisicoes)
+            os.close(escrita)
+            filhos.append((pid, leitura))
+
+        medidas = []
+        for pid, leitura in filhos:
+            with os.fdopen(leitura) as f:
+                primeira_ms = json.loads(f.readline())['primeira_ms']
+            # Medido pelo pai enquanto todos os filhos seguem vivos (PSS correto)
+            medidas.append(dict(uso_memoria(pid), pid=pid, primeira_ms=primeira_ms))
+
+        for pid, _ in filhos:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        return medidas
+
+    def _worker(self, escrita, requisicoes):
+        """Processo filho: atende requisições simuladas e reporta a latência da primeira."""
+        try:
+            inicio = time.perf_counter()
+            aquecer()
+            primeira_ms = (time.perf_counter() - inicio) * 1000
+            for _ in range(requisicoes - 1):
+                aquecer()
+            with os.fdopen(escrita, 'w') as f:
+                f.write(json.dumps({'primeira_ms': primeira_ms}) + '\n')
+            signal.pause()
+        finally:
+            os._exit(0)
@@ -0,0 +1,98 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from pedidos.models import JobClassificacao
+from pedidos.services.jobs import (
+    criar_pool, identificador_worker, processar_job, reivindicar_job
+)
+
+
+class Command(BaseCommand):
+    help = 'Worker da fila local de jobs de classificação (sem broker externo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processos',
+            type=int,
+            default=2,
+            help='Número de processos do pool de classificação (padrão: 2)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos entre consultas à fila quando vazia (padrão: 2.0)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=300,
+            help='Segundos sem progresso para considerar um job órfão (padrão: 300)',
+        )
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa os jobs disponíveis e encerra quando a fila esvaziar',
+        )
+        parser.add_argument(
+            '--agrupar',
+            action='store_true',
+            help='Pedidos quase idênticos do mesmo lote compartilham a predição ML (regex roda em todos)',
+        )
+
+    def handle(self, *args, **options):
+        processos = options['processos']
+        worker = identificador_worker()
+
+        self.stdout.write(f'✓ Worker {worker} iniciado ({processos} processos)')
+
+        pool = criar_pool(processos) if processos > 1 else None
+        em_andamento = None
+        try:
+            while True:
+                job = reivindicar_job(worker, timeout_segundos=options['timeout'])
+
+                if job is None:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                retomado = ' (retomando do chunk %d)' % (job.ultimo_chunk + 1) if job.ultimo_chunk >= 0 else ''
+                self.stdout.write(f'\n▸ Job {job.id}: {job.nome_original}{retomado}')
+                inicio = time.perf_counter()
+
+                em_andamento = job
+                try:
+                    job = processar_job(job, pool=pool, processos=processos, agrupar=options['agrupar'])
+                except Exception as e:
+                    em_andamento = None
+                    JobClassificacao.objects.filter(pk=job.pk, worker=worker).update(
+                        status=JobClassificacao.ERRO,
+                        erro=str(e),
+                        atualizado_em=timezone.now(),
+                    )
+                    self.stdout.write(self.style.ERROR(f'❌ Job {job.id} falhou: {e}'))
+                    continue
+                em_andamento = None
+                if job.worker != worker:
+                    self.stdout.write(self.style.WARNING(
+                        f'⚠️  Job {job.id} assumido por {job.worker}; processamento interrompido'
+                    ))
+                    continue
+
+                duracao = time.perf_counter() - inicio
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Job {job.id} concluído: {job.total_linhas} linhas em {duracao:.1f}s'
+                ))
+        except KeyboardInterrupt:
+            if em_andamento is not None:
+                # Devolver o job à fila; o próximo worker retoma do último chunk
+                JobClassificacao.objects.filter(pk=em_andamento.pk, worker=worker).update(
+                    status=JobClassificacao.PENDENTE,
+                    atualizado_em=timezone.now(),
+                )
+            self.stdout.write('\n⚠️  Worker interrompido; jobs em andamento serão retomados do último chunk')
+        finally:
+            if pool is not None:
+                pool.terminate()
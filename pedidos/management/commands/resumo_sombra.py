@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Q
+from pedidos.models import AvaliacaoSombra
+from pedidos.services.metricas import percentil
+
+
+class Command(BaseCommand):
+    help = 'Resume a concordância entre o modelo ativo e o candidato avaliado em sombra'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--candidata',
+            metavar='VERSAO',
+            help='Filtra por versão candidata (padrão: todas)',
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Apaga as avaliações (da candidata filtrada) depois de exibir o resumo',
+        )
+
+    def handle(self, *args, **options):
+        avaliacoes = AvaliacaoSombra.objects.all()
+        if options['candidata']:
+            avaliacoes = avaliacoes.filter(versao_candidata=options['candidata'])
+
+        pares = avaliacoes.values('versao_ativa', 'versao_candidata').annotate(
+            total=Count('id'),
+            so_ativo=Count('id', filter=Q(contem_ativo=True, contem_candidato=False)),
+            so_candidato=Count('id', filter=Q(contem_ativo=False, contem_candidato=True)),
+            positivos_ativo=Count('id', filter=Q(contem_ativo=True)),
+            positivos_candidato=Count('id', filter=Q(contem_candidato=True)),
+            confianca_ativa=Avg('confianca_ativa'),
+            confianca_candidata=Avg('confianca_candidata'),
+        ).order_by('versao_candidata', 'versao_ativa')
+
+        if not pares:
+            self.stdout.write(self.style.ERROR('❌ Nenhuma avaliação em sombra registrada.'))
+            self.stdout.write('Defina PARTICIPADF_SOMBRA_MODELO=<versão> no servidor da API.')
+            return
+
+        for par in pares:
+            total = par['total']
+            discordancias = par['so_ativo'] + par['so_candidato']
+            latencias = sorted(
+                avaliacoes.filter(
+                    versao_ativa=par['versao_ativa'], versao_candidata=par['versao_candidata']
+                ).values_list('latencia_ms', flat=True)
+            )
+
+            self.stdout.write('\n' + '=' * 70)
+            self.stdout.write(f'ATIVO {par["versao_ativa"]}  x  CANDIDATO {par["versao_candidata"]}')
+            self.stdout.write('=' * 70)
+            self.stdout.write(f'Textos avaliados:           {total}')
+            self.stdout.write(f'Concordância:               {(total - discordancias) / total:.2%}')
+            self.stdout.write(f'  Só o ativo detectou:      {par["so_ativo"]}')
+            self.stdout.write(f'  Só o candidato detectou:  {par["so_candidato"]}')
+            self.stdout.write(
+                f'Taxa de positivos:          {par["positivos_ativo"] / total:.2%} (ativo) '
+                f'→ {par["positivos_candidato"] / total:.2%} (candidato)'
+            )
+            self.stdout.write(
+                f'Confiança média:            {par["confianca_ativa"]:.4f} (ativo) '
+                f'→ {par["confianca_candidata"]:.4f} (candidato)'
+            )
+            self.stdout.write(
+                f'Latência do candidato (ms): p50={percentil(latencias, 50):.2f} '
+                f'p95={percentil(latencias, 95):.2f} p99={percentil(latencias, 99):.2f}'
+            )
+
+        if options['limpar']:
+            apagadas, _ = avaliacoes.delete()
+            self.stdout.write(f'\n✓ {apagadas} avaliações apagadas')
@@ -1,13 +1,24 @@
 from django.core.management.base import BaseCommand
-import pandas as pd
 import os
-from pedidos.services.detector import detect_personal_data
-from sklearn.metrics import classification_report, confusion_matrix, f1_score
+from pedidos.services.avaliacao_shards import (
+    THRESHOLDS_PADRAO, ResultadoParcial, caminho_parcial_padrao, interpretar_shard, interpretar_thresholds,
+    shard_do_texto,
+)
+from pedidos.services.detector import detect_personal_data, batch_detect
+from pedidos.services.fluxo_resultados import EscritorResultados, ler_lotes_rotulados
+from pedidos.services.metricas import AmostraReservatorio
+from pedidos.services.ml_model import get_model_version
+from pedidos.services.quase_duplicatas import get_cluster_stats, reset_cluster_stats
+from pedidos.services.regex_rules import normalizar_tipos
+from pedidos.services.regras_pii import versao_regras
+from pedidos.services.validators import get_validation_stats, reset_validation_stats
 
 
 class Command(BaseCommand):
     help = 'Testa o modelo no dataset de teste'
 
+    DEFAULT_SAIDA = 'resultado_teste.xlsx'
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--only-regex',
@@ -20,13 +31,83 @@ class Command(BaseCommand):
             default=0.35,
             help='Threshold de confiança para classificação (padrão: 0.35)',
         )
+        parser.add_argument(
+            '--reutilizar',
+            action='store_true',
+            help='Reaproveita classificações já gravadas para a versão atual do modelo',
+        )
+        parser.add_argument(
+            '--agrupar',
+            action='store_true',
+            help='Textos quase idênticos compartilham a predição ML (regex roda em todos)',
+        )
+        parser.add_argument(
+            '--file',
+            help='Dataset rotulado .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv ou dataset_teste.xlsx)',
+        )
+        parser.add_argument(
+            '--saida',
+            default=self.DEFAULT_SAIDA,
+            help='Arquivo de resultados .xlsx, .csv ou .jsonl, gravado em fluxo (padrão: resultado_teste.xlsx)',
+        )
+        parser.add_argument(
+            '--exemplos',
+            type=int,
+            default=3,
+            help='Falsos positivos/negativos mostrados na análise de erros, amostrados ao acaso (padrão: 3)',
+        )
+        parser.add_argument(
+            '--shard',
+            metavar='I/N',
+            help='Avalia só a fatia I de N (por hash do texto); grava um resultado parcial para mesclar_shards',
+        )
+        parser.add_argument(
+            '--parcial',
+            metavar='ARQUIVO',
+            help='Resultado parcial em JSON (padrão com --shard: parcial_shard_I_de_N.json)',
+        )
+        parser.add_argument(
+            '--tipos',
+            help='Procura só esses tipos, separados por vírgula (ex.: cpf,email); o ML não é consultado',
+        )
+        parser.add_argument(
+            '--early-exit',
+            action='store_true',
+            help='Para cada texto no primeiro tipo confirmado pelo regex (só o sim/não importa)',
+        )
+        parser.add_argument(
+            '--thresholds',
+            default=','.join(f'{t:g}' for t in THRESHOLDS_PADRAO),
+            help='Thresholds contados no resultado parcial (padrão: 0.2,0.35,0.5,0.7); '
+                 'a cascata do ML fica desligada para que o score seja exato em todos',
+        )
 
     def handle(self, *args, **options):
         only_regex = options['only_regex']
         threshold = options['threshold']
+        reutilizar = options['reutilizar']
+        agrupar = options['agrupar']
+        early_exit = options['early_exit']
+        
+        tipos = None
+        if options['tipos']:
+            try:
+                tipos = normalizar_tipos(options['tipos'].split(','))
+            except ValueError as e:
+                self.stdout.write(self.style.ERROR(f'❌ {e}'))
+                return
+        
+        shard = None
+        try:
+            if options['shard']:
+                shard = interpretar_shard(options['shard'])
+            thresholds = interpretar_thresholds(options['thresholds'])
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(f'❌ {e}'))
+            return
         
         # Procurar arquivo em múltiplas localizações
-        possiveis_caminhos = [
+        possiveis_caminhos = [options['file']] if options['file'] else [
             'ml/dataset.csv',           # Dataset rotulado
             'dataset_teste.xlsx',       # Raiz
             'ml/dataset_teste.xlsx',    # Pasta ml
@@ -47,78 +128,119 @@ class Command(BaseCommand):
         
         self.stdout.write(f'\n✓ Usando dataset: {file_path}')
         
-        # Carregar dataset
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-        
-        # Verificar se tem coluna 'label'
-        if 'label' not in df.columns:
-            self.stdout.write(self.style.ERROR('\n❌ Dataset não possui coluna "label"!'))
+        # Carregar dataset em lotes: só o lote atual fica na memória
+        try:
+            coluna_texto, lotes = ler_lotes_rotulados(file_path)
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(f'\n❌ {e}!'))
             self.stdout.write('Use o dataset rotulado em ml/dataset.csv')
             return
         
-        # Identificar coluna de texto
-        coluna_texto = None
-        for col in ['texto', 'Texto Mascarado', 'text']:
-            if col in df.columns:
-                coluna_texto = col
-                break
-        
-        if not coluna_texto:
-            self.stdout.write(self.style.ERROR('❌ Coluna de texto não encontrada!'))
-            return
-        
         self.stdout.write(f'✓ Coluna de texto: {coluna_texto}')
         
         # Fazer predições
         self.stdout.write('\n' + '='*70)
-        modo = 'APENAS REGEX' if only_regex else f'HÍBRIDO (threshold={threshold})'
+        modo = 'APENAS REGEX' if only_regex or tipos else f'HÍBRIDO (threshold={threshold})'
+        if tipos:
+            modo += f' - tipos: {", ".join(tipos)}'
+        if early_exit:
+            modo += ' - early exit'
         self.stdout.write(f'TESTANDO - {modo}')
         self.stdout.write('='*70)
         
-        y_true = []
-        y_pred = []
-        resultados_detalhados = []
+        # Contadores e amostras de erros no lugar de guardar todas as linhas
+        parcial = ResultadoParcial(
+            thresholds=thresholds,
+            metadados={
+                'arquivo': os.path.basename(file_path),
+                'total_shards': shard[1] if shard else 1,
+                'threshold': threshold,
+                'modo': 'regex' if only_regex or tipos else 'hibrido',
+                'tipos': tipos,
+                'versao_modelo': None if only_regex or tipos else get_model_version(),
+                'versao_regras': versao_regras(),
+            },
+        )
+        parcial.shards = [shard[0] if shard else 1]
+        matriz = parcial.matriz
+        falsos_positivos = AmostraReservatorio(options['exemplos'])
+        falsos_negativos = AmostraReservatorio(options['exemplos'], semente=1)
+        output_file = options['saida']
+        arquivo_parcial = options['parcial']
+        if shard:
+            self.stdout.write(f'✓ Shard {shard[0]}/{shard[1]}')
+            # Um arquivo de saída por shard, para rodar vários na mesma máquina
+            if output_file == self.DEFAULT_SAIDA:
+                raiz, extensao = os.path.splitext(output_file)
+                output_file = f'{raiz}_shard_{shard[0]}_de_{shard[1]}{extensao}'
+            arquivo_parcial = arquivo_parcial or caminho_parcial_padrao(*shard)
         
-        for idx, row in df.iterrows():
-            texto = row[coluna_texto]
-            label_real = row['label']
-            
-            # Fazer predição
-            if only_regex:
-                # Forçar uso apenas de regex
-                from pedidos.services.regex_rules import detect_personal_data_regex
-                resultado = detect_personal_data_regex(texto)
-                predicao = 1 if resultado['detected'] else 0
-                confianca = 1.0 if predicao == 1 else 0.0
-                metodo = 'regex'
-            else:
-                # Usar detector híbrido
-                resultado = detect_personal_data(texto, threshold=threshold)
-                predicao = 1 if resultado['contem_dados_pessoais'] else 0
-                confianca = resultado['confianca']
-                metodo = resultado['metodo']
-            
-            y_true.append(label_real)
-            y_pred.append(predicao)
-            
-            resultados_detalhados.append({
-                'texto': texto,  # ← TEXTO COMPLETO (SEM TRUNCAMENTO)
-                'label_real': label_real,
-                'predicao': predicao,
-                'metodo': metodo,
-                'confianca': confianca,
-                'acertou': label_real == predicao
-            })
-            
-            # Mostrar progresso (truncado apenas para exibição no terminal)
-            status = '✓' if label_real == predicao else '✗'
-            self.stdout.write(
-                f'[{idx+1}/{len(df)}] {status} Real={label_real} Pred={predicao} '
-                f'Conf={confianca:.2f} | {texto[:60]}...'
-            )
+        reset_validation_stats()
+        reset_cluster_stats()
+        
+        idx = 0
+        with EscritorResultados(output_file) as escritor:
+            for lote in lotes:
+                if shard:
+                    lote = [(texto, label) for texto, label in lote if shard_do_texto(texto, shard[1]) == shard[0]]
+                textos = [texto for texto, _ in lote]
+                
+                # Classificar o lote reaproveitando resultados já persistidos
+                # e/ou a predição ML de textos quase idênticos (dentro do lote).
+                # Sem cascata: na saída antecipada o score só vale para `threshold`,
+                # e o resultado parcial conta todos os `thresholds`
+                resultados_lote = None
+                if (reutilizar or agrupar or tipos) and not only_regex:
+                    resultados_lote = batch_detect(
+                        textos, threshold, reutilizar=reutilizar, agrupar=agrupar,
+                        tipos=tipos, early_exit=early_exit, cascata=False,
+                    )
+                
+                for i, (texto, label_real) in enumerate(lote):
+                    idx += 1
+                    
+                    # Fazer predição
+                    if only_regex:
+                        # Forçar uso apenas de regex
+                        from pedidos.services.regex_rules import detect_personal_data_regex
+                        resultado = detect_personal_data_regex(texto, tipos=tipos, early_exit=early_exit)
+                        predicao = 1 if resultado['detected'] else 0
+                        confianca = 1.0 if predicao == 1 else 0.0
+                        metodo = 'regex'
+                    else:
+                        # Usar detector híbrido
+                        if resultados_lote is not None:
+                            resultado = resultados_lote[i]
+                        else:
+                            resultado = detect_personal_data(
+                                texto, threshold=threshold, cascata=False, early_exit=early_exit
+                            )
+                        predicao = 1 if resultado['contem_dados_pessoais'] else 0
+                        confianca = resultado['confianca']
+                        metodo = resultado['metodo']
+                    
+                    score_ml = resultado.get('detalhes', {}).get('ml_score') if metodo == 'ml' else None
+                    parcial.adicionar(label_real, predicao, metodo, score_ml)
+                    
+                    escritor.escrever({
+                        'texto': texto,  # ← TEXTO COMPLETO (SEM TRUNCAMENTO)
+                        'label_real': label_real,
+                        'predicao': predicao,
+                        'metodo': metodo,
+                        'confianca': confianca,
+                        'acertou': label_real == predicao
+                    })
+                    
+                    if label_real != predicao:
+                        texto_preview = texto[:100] + '...' if len(texto) > 100 else texto
+                        (falsos_positivos if predicao == 1 else falsos_negativos).adicionar(texto_preview)
+                    
+                    # Mostrar progresso (truncado apenas para exibição no terminal)
+                    status = '✓' if label_real == predicao else '✗'
+                    self.stdout.write(
+                        f'[{idx}] {status} Real={label_real} Pred={predicao} '
+                        f'Conf={confianca:.2f} | {texto[:60]}...'
+                    )
         
         # Calcular métricas
         self.stdout.write('\n' + '='*70)
@@ -126,65 +248,56 @@ class Command(BaseCommand):
         self.stdout.write('='*70)
         
         # Relatório de classificação
-        self.stdout.write('\n' + classification_report(
-            y_true, y_pred,
+        self.stdout.write('\n' + matriz.relatorio(
             target_names=['Sem Dados Pessoais', 'Com Dados Pessoais'],
             digits=4
         ))
         
         # Matriz de confusão
-        cm = confusion_matrix(y_true, y_pred)
+        cm = matriz.como_lista()
         self.stdout.write('\nMatriz de Confusão:')
         self.stdout.write(f'                 Predito: Sem PII  Predito: Com PII')
         self.stdout.write(f'Real: Sem PII         {cm[0][0]:5d}           {cm[0][1]:5d}')
         self.stdout.write(f'Real: Com PII         {cm[1][0]:5d}           {cm[1][1]:5d}')
         
         # F1-Score
-        f1 = f1_score(y_true, y_pred)
+        f1 = matriz.f1()
         self.stdout.write(f'\n📊 F1-Score: {f1:.4f}')
         
-        # Salvar resultados detalhados COM TEXTO COMPLETO
-        df_resultado = pd.DataFrame(resultados_detalhados)
-        output_file = 'resultado_teste.xlsx'
+        # Candidatos numéricos descartados pelos validadores (CPF, telefone, CEP...)
+        rejeicoes = {tipo: n for tipo, n in get_validation_stats().items() if n}
+        if rejeicoes:
+            self.stdout.write('\nCandidatos rejeitados pelos validadores:')
+            for tipo, quantidade in sorted(rejeicoes.items()):
+                self.stdout.write(f'  - {tipo}: {quantidade}')
         
-        # Configurar Excel com largura de coluna maior para texto completo
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            df_resultado.to_excel(writer, index=False, sheet_name='Resultados')
-            
-            # Ajustar largura das colunas
-            worksheet = writer.sheets['Resultados']
-            worksheet.column_dimensions['A'].width = 120  # Coluna 'texto' - MUITO LARGA
-            worksheet.column_dimensions['B'].width = 15   # label_real
-            worksheet.column_dimensions['C'].width = 15   # predicao
-            worksheet.column_dimensions['D'].width = 15   # metodo
-            worksheet.column_dimensions['E'].width = 15   # confianca
-            worksheet.column_dimensions['F'].width = 15   # acertou
+        # Grupos de quase duplicatas e predições ML evitadas
+        if agrupar and not only_regex:
+            grupos = get_cluster_stats()
+            self.stdout.write(
+                f'\nQuase duplicatas: {grupos.get("grupos", 0)} grupos para {grupos.get("textos", 0)} textos '
+                f'(maior grupo: {grupos.get("maior_grupo", 0)}); '
+                f'predições ML evitadas: {grupos.get("ml_evitadas", 0)}'
+            )
         
         self.stdout.write(f'\n✓ Resultados salvos em: {output_file}')
+        if arquivo_parcial:
+            parcial.gravar(arquivo_parcial)
+            self.stdout.write(f'✓ Resultado parcial salvo em: {arquivo_parcial} (mescle com mesclar_shards)')
         
-        # Análise de erros
-        erros = df_resultado[~df_resultado['acertou']]
-        if len(erros) > 0:
+        # Análise de erros (amostra aleatória de cada tipo)
+        total_erros = matriz.fp + matriz.fn
+        if total_erros > 0:
             self.stdout.write('\n' + '='*70)
-            self.stdout.write(f'ANÁLISE DE ERROS ({len(erros)} erros)')
+            self.stdout.write(f'ANÁLISE DE ERROS ({total_erros} erros)')
             self.stdout.write('='*70)
             
-            # Falsos positivos
-            falsos_positivos = erros[erros['predicao'] == 1]
-            if len(falsos_positivos) > 0:
-                self.stdout.write(f'\n⚠️  Falsos Positivos: {len(falsos_positivos)}')
-                for i, row in falsos_positivos.head(3).iterrows():
-                    texto_preview = row["texto"][:100] + '...' if len(row["texto"]) > 100 else row["texto"]
-                    self.stdout.write(f'  - {texto_preview}')
-            
-            # Falsos negativos
-            falsos_negativos = erros[erros['predicao'] == 0]
-            if len(falsos_negativos) > 0:
-                self.stdout.write(f'\n⚠️  Falsos Negativos: {len(falsos_negativos)}')
-                for i, row in falsos_negativos.head(3).iterrows():
-                    texto_preview = row["texto"][:100] + '...' if len(row["texto"]) > 100 else row["texto"]
-                    self.stdout.write(f'  - {texto_preview}')
+            for titulo, amostra in (('Falsos Positivos', falsos_positivos), ('Falsos Negativos', falsos_negativos)):
+                if amostra.vistos > 0:
+                    self.stdout.write(f'\n⚠️  {titulo}: {amostra.vistos}')
+                    for texto_preview in amostra.itens:
+                        self.stdout.write(f'  - {texto_preview}')
         
         self.stdout.write('\n' + '='*70)
         self.stdout.write('✓ TESTE CONCLUÍDO')
-        self.stdout.write('='*70)
\ No newline at end of file
+        self.stdout.write('='*70)
@@ -0,0 +1,134 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.carga import (
+    FECHADO, MODOS, ClienteCarga, executar_aberto, executar_fechado, resumir, servidor_em_processo
+)
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga do endpoint classificar-pedido/ (circuito aberto ou fechado, varrendo níveis)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default='requests.jsonl',
+            help='Textos a enviar: .jsonl, .csv ou .xlsx (padrão: requests.jsonl)',
+        )
+        parser.add_argument(
+            '--url',
+            help='Endpoint de um servidor já rodando, ex.: http://127.0.0.1:8000/classificar-pedido/ '
+                 '(padrão: sobe um servidor no próprio processo)',
+        )
+        parser.add_argument(
+            '--modo',
+            choices=MODOS,
+            default=FECHADO,
+            help='fechado: concorrência fixa; aberto: taxa de chegada fixa (padrão: fechado)',
+        )
+        parser.add_argument(
+            '--niveis',
+            default='1,2,4,8',
+            help='Concorrências (modo fechado) ou requisições/s (modo aberto) de cada etapa (padrão: 1,2,4,8)',
+        )
+        parser.add_argument(
+            '--duracao',
+            type=float,
+            default=10.0,
+            help='Segundos por etapa (padrão: 10)',
+        )
+        parser.add_argument(
+            '--requisicoes',
+            type=int,
+            help='Modo fechado: número fixo de requisições por etapa, em vez de --duracao',
+        )
+        parser.add_argument(
+            '--max-conexoes',
+            type=int,
+            default=64,
+            help='Modo aberto: conexões simultâneas do cliente (padrão: 64)',
+        )
+        parser.add_argument(
+            '--aquecimento',
+            type=int,
+            default=5,
+            help='Requisições enviadas antes da primeira etapa, fora da medição (padrão: 5)',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='ARQUIVO',
+            help='Grava o resultado de todas as etapas em JSON',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            textos = ler_textos(options['file'], COLUNAS_TEXTO + ['body'])
+            niveis = [float(n) for n in options['niveis'].split(',')]
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if options['modo'] == FECHADO:
+            niveis = [int(n) for n in niveis]
+
+        if options['url']:
+            self._executar(options['url'], textos, niveis, options)
+        else:
+            with servidor_em_processo() as url:
+                self._executar(url, textos, niveis, options)
+
+    def _executar(self, url, textos, niveis, options):
+        modo = options['modo']
+        cliente = ClienteCarga(url)
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'TESTE DE CARGA - modo {modo}, {len(textos)} textos de {options["file"]}')
+        self.stdout.write(f'Endpoint: {url}' + ('' if options['url'] else ' (servidor no próprio processo)'))
+        self.stdout.write('=' * 70)
+
+        # Aquecimento: carrega o modelo no servidor fora da medição
+        for texto in textos[:options['aquecimento']]:
+            if cliente.enviar(texto).status == 0:
+                raise CommandError(f'Servidor não respondeu em {url}')
+
+        nome_nivel = 'Conc.' if modo == FECHADO else 'Req/s'
+        self.stdout.write(
+            f'\n{nome_nivel:>6} {"Enviadas":>8} {"Vazão/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"p99 ms":>8} {"Erros":>6} {"429":>5} {"Regex/ML/Degr.":>16}'
+        )
+        self.stdout.write('-' * 86)
+
+        etapas = []
+        for nivel in niveis:
+            if modo == FECHADO:
+                amostras, segundos = executar_fechado(
+                    cliente, textos, nivel, options['duracao'], options['requisicoes']
+                )
+            else:
+                amostras, segundos = executar_aberto(
+                    cliente, textos, nivel, options['duracao'], options['max_conexoes']
+                )
+            resumo = resumir(amostras, segundos)
+            resumo['nivel'] = nivel
+            etapas.append(resumo)
+
+            metodos = resumo['metodos']
+            respondidas = max(resumo['sucesso'], 1)
+            divisao = '/'.join(
+                f'{metodos.get(m, 0) / respondidas:.0%}' for m in ('regex', 'ml', 'regex_degradado')
+            )
+            latencia = resumo['latencia_ms']
+            self.stdout.write(
+                f'{nivel:>6g} {resumo["requisicoes"]:>8} {resumo["vazao"]:>8.1f} {latencia["p50"]:>8.1f} '
+                f'{latencia["p95"]:>8.1f} {latencia["p99"]:>8.1f} {resumo["taxa_erro"]:>6.1%} '
+                f'{resumo["rejeitadas_429"]:>5} {divisao:>16}'
+            )
+
+        melhor = max(etapas, key=lambda e: e['vazao'])
+        self.stdout.write(
+            f'\n✓ Maior vazão: {melhor["vazao"]:.1f} req/s com {nome_nivel.lower()} {melhor["nivel"]:g} '
+            f'(p95 {melhor["latencia_ms"]["p95"]:.1f} ms)'
+        )
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump({'modo': modo, 'url': url, 'textos': len(textos), 'etapas': etapas}, f, indent=2)
+            self.stdout.write(f'✓ Resultado gravado em {options["json"]}')
@@ -1,10 +1,17 @@
 import csv
 from django.core.management.base import BaseCommand
-from pedidos.services.ml_model import train_model
+from pedidos.services.treinamento import train_model
 
 class Command(BaseCommand):
     help = "Treina o modelo de detecção de dados pessoais"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ativar',
+            action='store_true',
+            help='Torna a nova versão a ativa (por padrão só ativa se nenhuma versão registrada estiver ativa)',
+        )
+
     def handle(self, *args, **kwargs):
         texts = []
         labels = []
@@ -15,5 +22,5 @@ class Command(BaseCommand):
                 texts.append(row["texto"])
                 labels.append(int(row["label"]))
 
-        train_model(texts, labels)
-        self.stdout.write(self.style.SUCCESS("Modelo treinado com sucesso"))
\ No newline at end of file
+        train_model(texts, labels, ativar=kwargs['ativar'] or None)
+        self.stdout.write(self.style.SUCCESS("Modelo treinado com sucesso"))
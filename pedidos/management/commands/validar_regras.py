@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from pedidos.services.jobs import COLUNAS_TEXTO, ler_textos
+from pedidos.services.preprocessing import analisar_texto
+from pedidos.services.regex_rules import detect_personal_data_regex
+from pedidos.services.regras_pii import caminho_regras, ler_regras, regras_ativas
+
+
+class Command(BaseCommand):
+    help = 'Compila um arquivo de regras de dados pessoais e compara seus veredictos com as regras em uso'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'arquivo',
+            nargs='?',
+            help='Arquivo de regras JSON (padrão: o configurado em REGRAS_PII_PATH)',
+        )
+        parser.add_argument(
+            '--file',
+            default='ml/dataset.csv',
+            help='Textos para comparar: .csv, .jsonl ou .xlsx (padrão: ml/dataset.csv)',
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo'] or caminho_regras()
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(f'VALIDAÇÃO DE REGRAS - {arquivo}')
+        self.stdout.write('=' * 70)
+        try:
+            novas = ler_regras(arquivo)
+        except ValueError as e:
+            raise CommandError(f'❌ {e}')
+        self.stdout.write(
+            f'✓ {len(novas.regras)} regras compiladas, versão {novas.versao}\n'
+            f'  Tipos: {", ".join(novas.tipos)}\n'
+            f'  Ordem do early_exit: {", ".join(regra.chave for regra in novas.ordem_early_exit)}'
+        )
+
+        try:
+            atuais = regras_ativas()
+            textos = ler_textos(options['file'], COLUNAS_TEXTO + ['body'])
+        except (OSError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f'⚠️  Sem comparação: {e}'))
+            return
+        if atuais.versao == novas.versao:
+            self.stdout.write(f'✓ Mesma versão das regras em uso ({atuais.caminho})')
+            return
+
+        mudancas = []
+        for texto in textos:
+            analisado = analisar_texto(texto)
+            antes = detect_personal_data_regex(texto, analisado, regras=atuais)['tipos_detectados']
+            depois = detect_personal_data_regex(texto, analisado, regras=novas)['tipos_detectados']
+            if antes != depois:
+                mudancas.append((texto, antes, depois))
+
+        self.stdout.write(
+            f'\nRegras em uso: versão {atuais.versao} ({atuais.caminho})\n'
+            f'Textos com tipos diferentes: {len(mudancas)} de {len(textos)} ({options["file"]})'
+        )
+        for texto, antes, depois in mudancas[:10]:
+            self.stdout.write(f'  {texto[:60]!r}: {", ".join(antes) or "-"} → {", ".join(depois) or "-"}')
+        if len(mudancas) > 10:
+            self.stdout.write(f'  ... e mais {len(mudancas) - 10}')
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoAcesso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto', models.TextField()),
+                ('contem_dados_pessoais', models.BooleanField(default=False)),
+                ('analisado', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClassificacaoPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto_hash', models.CharField(max_length=64)),
+                ('contem_dados_pessoais', models.BooleanField()),
+                ('metodo', models.CharField(max_length=20)),
+                ('tipos_detectados', models.JSONField(default=list)),
+                ('confianca', models.FloatField()),
+                ('versao_modelo', models.CharField(max_length=64)),
+                ('classificado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['versao_modelo'], name='classificacao_versao_idx')],
+                'constraints': [models.UniqueConstraint(fields=('texto_hash', 'versao_modelo'), name='classificacao_unica_por_versao')],
+            },
+        ),
+    ]
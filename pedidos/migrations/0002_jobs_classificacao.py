@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:41
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobClassificacao',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('arquivo', models.CharField(max_length=500)),
+                ('nome_original', models.CharField(blank=True, max_length=255)),
+                ('threshold', models.FloatField(default=0.35)),
+                ('tamanho_chunk', models.PositiveIntegerField(default=1000)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=20)),
+                ('total_linhas', models.PositiveIntegerField(blank=True, null=True)),
+                ('linhas_processadas', models.PositiveIntegerField(default=0)),
+                ('ultimo_chunk', models.IntegerField(default=-1)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('atualizado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='job_status_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResultadoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('linha', models.PositiveIntegerField()),
+                ('contem_dados_pessoais', models.BooleanField()),
+                ('metodo', models.CharField(max_length=20)),
+                ('tipos_detectados', models.JSONField(default=list)),
+                ('confianca', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultados', to='pedidos.jobclassificacao')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'linha'), name='resultado_unico_por_linha')],
+            },
+        ),
+    ]
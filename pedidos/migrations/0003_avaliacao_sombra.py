@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0002_jobs_classificacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvaliacaoSombra',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto_hash', models.CharField(max_length=64)),
+                ('versao_ativa', models.CharField(max_length=64)),
+                ('versao_candidata', models.CharField(max_length=64)),
+                ('threshold', models.FloatField()),
+                ('confianca_ativa', models.FloatField()),
+                ('confianca_candidata', models.FloatField()),
+                ('contem_ativo', models.BooleanField()),
+                ('contem_candidato', models.BooleanField()),
+                ('latencia_ms', models.FloatField()),
+                ('avaliado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['versao_candidata', 'versao_ativa'], name='sombra_versoes_idx')],
+            },
+        ),
+    ]
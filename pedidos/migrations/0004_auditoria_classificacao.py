@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0003_avaliacao_sombra'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditoriaClassificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto_hash', models.CharField(max_length=64)),
+                ('contem_dados_pessoais', models.BooleanField()),
+                ('metodo', models.CharField(max_length=20)),
+                ('tipos_detectados', models.JSONField(default=list)),
+                ('confianca', models.FloatField()),
+                ('versao_modelo', models.CharField(blank=True, max_length=64)),
+                ('latencia_ms', models.FloatField()),
+                ('classificado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['classificado_em'], name='auditoria_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0004_auditoria_classificacao'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='classificacaopedido',
+            name='classificacao_unica_por_versao',
+        ),
+        migrations.AddField(
+            model_name='auditoriaclassificacao',
+            name='versao_regras',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='classificacaopedido',
+            name='versao_regras',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='classificacaopedido',
+            constraint=models.UniqueConstraint(fields=('texto_hash', 'versao_modelo', 'versao_regras'), name='classificacao_unica_por_versoes'),
+        ),
+    ]
@@ -1,6 +1,162 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 
 class PedidoAcesso(models.Model):
     texto = models.TextField()
     contem_dados_pessoais = models.BooleanField(default=False)
-    analisado = models.BooleanField(default=False)
\ No newline at end of file
+    analisado = models.BooleanField(default=False)
+
+
+class ClassificacaoPedido(models.Model):
+    """
+    Resultado de classificação persistido por hash do texto, versão do
+    modelo e versão do conjunto de regras (services/regras_pii.py).
+
+    O texto original e os trechos encontrados pelo regex NÃO são gravados
+    (seriam os próprios dados pessoais); apenas o hash SHA-256 do texto.
+    """
+    texto_hash = models.CharField(max_length=64)
+    contem_dados_pessoais = models.BooleanField()
+    metodo = models.CharField(max_length=20)
+    tipos_detectados = models.JSONField(default=list)
+    confianca = models.FloatField()
+    versao_modelo = models.CharField(max_length=64)
+    # Vazio nos registros anteriores às regras versionadas: nunca reaproveitados
+    versao_regras = models.CharField(max_length=64, blank=True, default='')
+    classificado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['texto_hash', 'versao_modelo', 'versao_regras'],
+                name='classificacao_unica_por_versoes',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['versao_modelo'], name='classificacao_versao_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.texto_hash[:12]} ({self.versao_modelo}): {self.metodo}'
+
+
+class JobClassificacao(models.Model):
+    """
+    Job assíncrono de classificação de um arquivo (fila local no SQLite).
+
+    O progresso é registrado por lote (chunk): `ultimo_chunk` só avança na
+    mesma transação que grava os resultados do lote, permitindo retomar o
+    processamento após a queda de um worker.
+    """
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDO, 'Concluído'),
+        (ERRO, 'Erro'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    arquivo = models.CharField(max_length=500)
+    nome_original = models.CharField(max_length=255, blank=True)
+    threshold = models.FloatField(default=0.35)
+    tamanho_chunk = models.PositiveIntegerField(default=1000)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDENTE)
+    total_linhas = models.PositiveIntegerField(null=True, blank=True)
+    linhas_processadas = models.PositiveIntegerField(default=0)
+    ultimo_chunk = models.IntegerField(default=-1)
+    worker = models.CharField(max_length=100, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    atualizado_em = models.DateTimeField(default=timezone.now)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='job_status_idx'),
+        ]
+
+    @property
+    def progresso(self):
+        if not self.total_linhas:
+            return 0.0
+        return self.linhas_processadas / self.total_linhas
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
+
+
+class ResultadoJob(models.Model):
+    """Resultado de uma linha do arquivo de um JobClassificacao."""
+    job = models.ForeignKey(JobClassificacao, on_delete=models.CASCADE, related_name='resultados')
+    linha = models.PositiveIntegerField()
+    contem_dados_pessoais = models.BooleanField()
+    metodo = models.CharField(max_length=20)
+    tipos_detectados = models.JSONField(default=list)
+    confianca = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'linha'], name='resultado_unico_por_linha'),
+        ]
+
+
+class AvaliacaoSombra(models.Model):
+    """
+    Comparação entre o modelo ativo e um modelo candidato em tráfego real.
+
+    Gravada em segundo plano (services/sombra.py), depois da resposta da
+    API. Assim como ClassificacaoPedido, guarda apenas o hash do texto.
+    """
+    texto_hash = models.CharField(max_length=64)
+    versao_ativa = models.CharField(max_length=64)
+    versao_candidata = models.CharField(max_length=64)
+    threshold = models.FloatField()
+    confianca_ativa = models.FloatField()
+    confianca_candidata = models.FloatField()
+    contem_ativo = models.BooleanField()
+    contem_candidato = models.BooleanField()
+    latencia_ms = models.FloatField()
+    avaliado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['versao_candidata', 'versao_ativa'], name='sombra_versoes_idx'),
+        ]
+
+    @property
+    def concordam(self):
+        return self.contem_ativo == self.contem_candidato
+
+    def __str__(self):
+        return f'{self.texto_hash[:12]} {self.versao_ativa} x {self.versao_candidata}'
+
+
+class AuditoriaClassificacao(models.Model):
+    """
+    Registro de auditoria de cada decisão de /classificar-pedido/.
+
+    Gravado em lotes por uma thread de fundo (services/auditoria.py), fora
+    do caminho da requisição. Guarda apenas o hash do texto.
+    """
+    texto_hash = models.CharField(max_length=64)
+    contem_dados_pessoais = models.BooleanField()
+    metodo = models.CharField(max_length=20)
+    tipos_detectados = models.JSONField(default=list)
+    confianca = models.FloatField()
+    versao_modelo = models.CharField(max_length=64, blank=True)
+    versao_regras = models.CharField(max_length=64, blank=True, default='')
+    latencia_ms = models.FloatField()
+    classificado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['classificado_em'], name='auditoria_data_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.texto_hash[:12]} {self.classificado_em:%Y-%m-%d %H:%M:%S}: {self.metodo}'
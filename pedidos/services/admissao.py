@@ -0,0 +1,120 @@
+"""
+Controle de admissão da camada ML.
+
+Limita quantas requisições executam o ML ao mesmo tempo em cada processo
+e por quanto tempo uma requisição pode esperar uma vaga. Quem não
+consegue vaga dentro da espera máxima é tratado conforme a política:
+
+    'degradar': responde só com o regex, com metodo='regex_degradado'
+    'rejeitar': a view responde 429 com Retry-After
+
+Configuração (settings):
+    ML_MAX_EM_VOO: requisições simultâneas no ML por processo (0 desativa)
+    ML_ESPERA_MAX_MS: espera máxima por uma vaga
+    ML_POLITICA_SOBRECARGA: 'degradar' ou 'rejeitar'
+    ML_RETRY_AFTER: segundos sugeridos no cabeçalho Retry-After
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.conf import settings
+
+
+DEGRADAR = 'degradar'
+REJEITAR = 'rejeitar'
+POLITICAS = (DEGRADAR, REJEITAR)
+
+
+class SobrecargaML(Exception):
+    """Requisição recusada pelo controle de admissão (política 'rejeitar')."""
+
+    def __init__(self, retry_after):
+        super().__init__('Camada ML sobrecarregada')
+        self.retry_after = retry_after
+
+
+class ControleAdmissao:
+    """Semáforo com espera limitada e contadores de admitidas/degradadas/rejeitadas."""
+
+    def __init__(self, max_em_voo, espera_max_ms=50, politica=DEGRADAR, retry_after=1):
+        if politica not in POLITICAS:
+            raise ValueError(f'Política de sobrecarga inválida: {politica} (use {", ".join(POLITICAS)})')
+        self.max_em_voo = max_em_voo
+        self.espera_max = espera_max_ms / 1000
+        self.politica = politica
+        self.retry_after = retry_after
+        self._vagas = threading.BoundedSemaphore(max_em_voo)
+        self._lock = threading.Lock()
+        self._contadores = Counter()
+        self._em_voo = 0
+
+    def _contar(self, chave):
+        with self._lock:
+            self._contadores[chave] += 1
+
+    @contextmanager
+    def vaga(self):
+        """
+        Ocupa uma vaga no ML durante o bloco `with`.
+
+        Produz True se a vaga foi obtida; False se a requisição deve ser
+        degradada. Na política 'rejeitar' levanta SobrecargaML.
+        """
+        if not self._vagas.acquire(timeout=self.espera_max):
+            if self.politica == REJEITAR:
+                self._contar('rejeitadas')
+                raise SobrecargaML(self.retry_after)
+            self._contar('degradadas')
+            yield False
+            return
+
+        with self._lock:
+            self._contadores['admitidas'] += 1
+            self._em_voo += 1
+            self._contadores['pico_em_voo'] = max(self._contadores['pico_em_voo'], self._em_voo)
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._em_voo -= 1
+            self._vagas.release()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'max_em_voo': self.max_em_voo,
+                'espera_max_ms': self.espera_max * 1000,
+                'politica': self.politica,
+                'em_voo': self._em_voo,
+                'admitidas': self._contadores['admitidas'],
+                'degradadas': self._contadores['degradadas'],
+                'rejeitadas': self._contadores['rejeitadas'],
+                'pico_em_voo': self._contadores['pico_em_voo'],
+            }
+
+
+_controles = {}
+_controles_lock = threading.Lock()
+
+
+def obter_controle():
+    """Controle de admissão do processo, ou None se ML_MAX_EM_VOO for 0."""
+    max_em_voo = getattr(settings, 'ML_MAX_EM_VOO', 0)
+    if not max_em_voo:
+        return None
+
+    configuracao = (
+        max_em_voo,
+        getattr(settings, 'ML_ESPERA_MAX_MS', 50),
+        getattr(settings, 'ML_POLITICA_SOBRECARGA', DEGRADAR),
+        getattr(settings, 'ML_RETRY_AFTER', 1),
+    )
+    controle = _controles.get(configuracao)
+    if controle is None:
+        with _controles_lock:
+            if configuracao not in _controles:
+                _controles.clear()
+                _controles[configuracao] = ControleAdmissao(*configuracao)
+            controle = _controles[configuracao]
+    return controle
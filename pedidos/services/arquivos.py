@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+
+def escrever_atomico(caminho, conteudo):
+    """
+    Grava um arquivo de texto de forma atômica.
+
+    O conteúdo vai para um temporário no mesmo diretório, que substitui o
+    destino com os.replace: quem lê o arquivo vê a versão antiga ou a nova,
+    nunca uma gravação pela metade. Em caso de erro o temporário é removido.
+    """
+    diretorio = os.path.dirname(caminho) or '.'
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
@@ -0,0 +1,234 @@
+"""
+Log de auditoria das classificações com gravação em segundo plano.
+
+Cada decisão de /classificar-pedido/ (hash do texto, tipos, método,
+confiança, versão do modelo e latência) entra num buffer em memória com
+capacidade limitada. Uma thread de fundo grava o buffer em lotes, numa
+transação por lote, quando ele atinge `lote` itens ou quando passa
+`intervalo_s` desde a última gravação, o que vier primeiro. A requisição
+paga só o hash e um `append` sob um lock; nenhuma escrita no SQLite
+acontece no caminho da requisição.
+
+Com o buffer cheio (banco lento ou travado), a política decide:
+
+    'bloquear':         a requisição espera até `espera_max_ms` por espaço;
+                        se não houver, o registro é descartado e contado
+    'descartar':        o registro novo é descartado e contado
+    'descartar_antigo': o registro mais antigo do buffer dá lugar ao novo
+
+No encerramento do processo (atexit) o buffer é gravado antes de sair.
+
+Configuração (settings):
+    AUDITORIA_ATIVA: liga o log de auditoria
+    AUDITORIA_FILA_MAX: capacidade do buffer
+    AUDITORIA_LOTE: registros por transação (gatilho de tamanho)
+    AUDITORIA_INTERVALO_S: tempo máximo de um registro no buffer (gatilho de tempo)
+    AUDITORIA_POLITICA: 'bloquear', 'descartar' ou 'descartar_antigo'
+    AUDITORIA_ESPERA_MAX_MS: espera máxima da política 'bloquear'
+"""
+
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from .classification_store import hash_texto
+
+
+logger = logging.getLogger(__name__)
+
+BLOQUEAR = 'bloquear'
+DESCARTAR = 'descartar'
+DESCARTAR_ANTIGO = 'descartar_antigo'
+POLITICAS = (BLOQUEAR, DESCARTAR, DESCARTAR_ANTIGO)
+
+
+class RegistradorAuditoria:
+    """Buffer limitado + thread de fundo que grava os registros em lotes."""
+
+    def __init__(self, capacidade=10000, lote=500, intervalo_s=1.0, politica=BLOQUEAR, espera_max_ms=100):
+        if politica not in POLITICAS:
+            raise ValueError(f'Política de auditoria inválida: {politica} (use {", ".join(POLITICAS)})')
+        if capacidade < 1 or lote < 1:
+            raise ValueError('Capacidade e lote da auditoria devem ser maiores que zero')
+        self.capacidade = capacidade
+        self.lote = lote
+        self.intervalo = intervalo_s
+        self.politica = politica
+        self.espera_max = espera_max_ms / 1000
+        self._itens = deque()
+        self._lock = threading.Lock()
+        self._tem_itens = threading.Condition(self._lock)
+        self._tem_espaco = threading.Condition(self._lock)
+        self._estatisticas = Counter()
+        self._thread = None
+        self._encerrando = False
+
+    def registrar(self, texto, resultado, latencia_ms, versao_modelo=None):
+        """
+        Coloca a decisão no buffer (o texto não é guardado, só o hash).
+
+        `versao_modelo` é a versão em uso na requisição; sem ela, vale a
+        que o ML informou nos detalhes (decisões do regex ficam sem versão).
+        A versão das regras vem sempre dos detalhes do resultado.
+
+        Returns:
+            bool: False se o registro foi descartado pela política
+        """
+        detalhes = resultado.get('detalhes', {})
+        item = (
+            hash_texto(texto),
+            bool(resultado['contem_dados_pessoais']),
+            resultado['metodo'],
+            list(resultado['tipos_detectados']),
+            float(resultado['confianca']),
+            versao_modelo or detalhes.get('versao_modelo', ''),
+            detalhes.get('versao_regras', ''),
+            float(latencia_ms),
+            time.time(),
+        )
+        with self._lock:
+            if len(self._itens) >= self.capacidade:
+                if self.politica == DESCARTAR:
+                    self._estatisticas['descartadas'] += 1
+                    return False
+                if self.politica == DESCARTAR_ANTIGO:
+                    self._itens.popleft()
+                    self._estatisticas['descartadas'] += 1
+                else:
+                    self._estatisticas['esperas'] += 1
+                    if not self._tem_espaco.wait_for(lambda: len(self._itens) < self.capacidade, self.espera_max):
+                        self._estatisticas['descartadas'] += 1
+                        return False
+            self._itens.append(item)
+            self._estatisticas['registradas'] += 1
+            if len(self._itens) == self.lote:
+                self._tem_itens.notify()
+
+        if self._thread is None:
+            self._garantir_thread()
+        return True
+
+    def estatisticas(self):
+        """Contadores do processo: registradas, gravadas, lotes, descartadas, esperas, erros e buffer atual."""
+        with self._lock:
+            return dict(self._estatisticas, fila=len(self._itens))
+
+    def _garantir_thread(self):
+        with self._lock:
+            if self._thread is None and not self._encerrando:
+                self._thread = threading.Thread(target=self._executar, name='auditoria', daemon=True)
+                self._thread.start()
+
+    def _retirar(self):
+        """Tira até `lote` itens do buffer (chamar com o lock)."""
+        quantidade = min(self.lote, len(self._itens))
+        itens = [self._itens.popleft() for _ in range(quantidade)]
+        if itens:
+            self._tem_espaco.notify_all()
+        return itens
+
+    def _executar(self):
+        while True:
+            with self._lock:
+                prazo = time.monotonic() + self.intervalo
+                while len(self._itens) < self.lote and not self._encerrando:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._tem_itens.wait(restante)
+                itens = self._retirar()
+                terminou = self._encerrando and not self._itens
+            if itens:
+                close_old_connections()
+                self.gravar(itens)
+            if terminou:
+                return
+
+    def gravar(self, itens):
+        """Grava os itens numa transação; falhas são registradas no log e contadas."""
+        from ..models import AuditoriaClassificacao
+
+        fuso = datetime.timezone.utc if settings.USE_TZ else None
+        registros = [
+            AuditoriaClassificacao(
+                texto_hash=texto_hash,
+                contem_dados_pessoais=contem,
+                metodo=metodo,
+                tipos_detectados=tipos,
+                confianca=confianca,
+                versao_modelo=versao or '',
+                versao_regras=regras,
+                latencia_ms=latencia_ms,
+                classificado_em=datetime.datetime.fromtimestamp(instante, fuso),
+            )
+            for texto_hash, contem, metodo, tipos, confianca, versao, regras, latencia_ms, instante in itens
+        ]
+        try:
+            with transaction.atomic():
+                AuditoriaClassificacao.objects.bulk_create(registros)
+        except Exception:
+            logger.exception('Falha ao gravar %s registros de auditoria', len(registros))
+            with self._lock:
+                self._estatisticas['erros'] += len(registros)
+            return
+        with self._lock:
+            self._estatisticas['gravadas'] += len(registros)
+            self._estatisticas['lotes'] += 1
+
+    def descarregar(self):
+        """Grava agora, na thread atual, tudo o que está no buffer."""
+        while True:
+            with self._lock:
+                itens = self._retirar()
+            if not itens:
+                return
+            self.gravar(itens)
+
+    def encerrar(self, timeout=10):
+        """Para a thread de fundo depois de gravar o buffer (chamado no atexit)."""
+        with self._lock:
+            self._encerrando = True
+            self._tem_itens.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.descarregar()
+
+
+_registradores = {}
+_registradores_lock = threading.Lock()
+
+
+def obter_registrador():
+    """
+    Registrador do processo atual, ou None se a auditoria estiver desativada.
+
+    Criado sob demanda em cada processo (workers pré-fork não herdam a
+    thread nem o buffer do mestre) e encerrado no atexit.
+    """
+    if not getattr(settings, 'AUDITORIA_ATIVA', False):
+        return None
+
+    pid = os.getpid()
+    registrador = _registradores.get(pid)
+    if registrador is not None:
+        return registrador
+
+    with _registradores_lock:
+        if pid not in _registradores:
+            _registradores.clear()
+            registrador = RegistradorAuditoria(
+                capacidade=getattr(settings, 'AUDITORIA_FILA_MAX', 10000),
+                lote=getattr(settings, 'AUDITORIA_LOTE', 500),
+                intervalo_s=getattr(settings, 'AUDITORIA_INTERVALO_S', 1.0),
+                politica=getattr(settings, 'AUDITORIA_POLITICA', BLOQUEAR),
+                espera_max_ms=getattr(settings, 'AUDITORIA_ESPERA_MAX_MS', 100),
+            )
+            atexit.register(registrador.encerrar)
+            _registradores[pid] = registrador
+        return _registradores[pid]
@@ -0,0 +1,174 @@
+"""
+Avaliação dividida em shards, com resultados parciais mescláveis.
+
+Cada processo (ou máquina) avalia uma fatia determinística do dataset:
+o texto vai para o shard `crc32(texto) % N`, independente da ordem das
+linhas e sem coordenação entre os processos. Textos repetidos caem no
+mesmo shard, o que mantém o --agrupar/--reutilizar eficazes.
+
+O resultado parcial de um shard é só um punhado de contadores (matriz
+de confusão geral, por método e por threshold), gravado em JSON. Como
+contadores se somam, mesclar os shards dá métricas globais exatas.
+"""
+
+import json
+import zlib
+from .arquivos import escrever_atomico
+from .metricas import MatrizConfusao
+
+
+FORMATO_PARCIAL = 1
+THRESHOLDS_PADRAO = (0.2, 0.35, 0.5, 0.7)
+
+
+def interpretar_shard(texto):
+    """
+    Converte 'i/N' (1 <= i <= N) em (i, N).
+
+    Raises:
+        ValueError: Se o formato ou os números forem inválidos
+    """
+    try:
+        indice, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise ValueError(f'Shard inválido: {texto} (use i/N, ex.: 1/4)')
+    if total < 1 or not 1 <= indice <= total:
+        raise ValueError(f'Shard inválido: {texto} (i deve estar entre 1 e N)')
+    return indice, total
+
+
+def interpretar_thresholds(texto):
+    """
+    Converte '0.2,0.35,...' na lista de thresholds (cada um entre 0 e 1).
+
+    Raises:
+        ValueError: Se algum valor não for número ou estiver fora de [0, 1]
+    """
+    thresholds = []
+    for parte in texto.split(','):
+        try:
+            threshold = float(parte)
+        except ValueError:
+            raise ValueError(f'Threshold inválido: {parte.strip() or "(vazio)"} (use números separados por vírgula)')
+        if not 0 <= threshold <= 1:
+            raise ValueError(f'Threshold inválido: {parte.strip()} (deve estar entre 0 e 1)')
+        thresholds.append(threshold)
+    return thresholds
+
+
+def shard_do_texto(texto, total):
+    """Shard (1..total) a que o texto pertence."""
+    return zlib.crc32(texto.encode('utf-8')) % total + 1
+
+
+def _chave_threshold(threshold):
+    return f'{threshold:g}'
+
+
+class ResultadoParcial:
+    """
+    Contadores de uma avaliação (ou de vários shards já mesclados).
+
+    `por_threshold` reclassifica cada texto em vários thresholds sem
+    rodar o detector de novo: o que o regex detectou é positivo em todos;
+    o que foi ao ML é positivo quando o score atinge o threshold.
+    """
+
+    def __init__(self, thresholds=THRESHOLDS_PADRAO, metadados=None):
+        self.matriz = MatrizConfusao()
+        self.por_metodo = {}
+        self.por_threshold = {_chave_threshold(t): MatrizConfusao() for t in thresholds}
+        self.metadados = dict(metadados or {})
+        self.shards = []
+
+    def adicionar(self, label, predicao, metodo, score_ml=None):
+        self.matriz.adicionar(label, predicao)
+        self.por_metodo.setdefault(metodo, MatrizConfusao()).adicionar(label, predicao)
+        for chave, matriz in self.por_threshold.items():
+            if score_ml is not None:
+                matriz.adicionar(label, score_ml >= float(chave))
+            else:
+                matriz.adicionar(label, predicao)
+
+    def como_dict(self):
+        return {
+            'formato': FORMATO_PARCIAL,
+            'metadados': self.metadados,
+            'shards': self.shards,
+            'matriz': self.matriz.como_dict(),
+            'por_metodo': {m: matriz.como_dict() for m, matriz in sorted(self.por_metodo.items())},
+            'por_threshold': {t: matriz.como_dict() for t, matriz in self.por_threshold.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        if dados.get('formato') != FORMATO_PARCIAL:
+            raise ValueError(f'Formato de resultado parcial não suportado: {dados.get("formato")}')
+        parcial = cls(thresholds=(), metadados=dados.get('metadados'))
+        parcial.shards = list(dados.get('shards', []))
+        parcial.matriz = MatrizConfusao.de_dict(dados['matriz'])
+        parcial.por_metodo = {m: MatrizConfusao.de_dict(c) for m, c in dados['por_metodo'].items()}
+        parcial.por_threshold = {t: MatrizConfusao.de_dict(c) for t, c in dados['por_threshold'].items()}
+        return parcial
+
+    def gravar(self, caminho):
+        """Grava o JSON de forma atômica (um shard interrompido não deixa arquivo pela metade)."""
+        escrever_atomico(caminho, json.dumps(self.como_dict(), indent=2, ensure_ascii=False))
+
+    @classmethod
+    def ler(cls, caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return cls.de_dict(json.load(f))
+
+
+# Metadados que precisam ser iguais em todos os shards de uma avaliação
+METADADOS_COMPATIVEIS = (
+    'arquivo', 'total_shards', 'threshold', 'modo', 'tipos', 'versao_modelo', 'versao_regras'
+)
+
+
+def mesclar(parciais):
+    """
+    Soma os contadores de vários resultados parciais.
+
+    Raises:
+        ValueError: Se os shards forem de avaliações diferentes, se houver
+            shard repetido ou faltando
+    """
+    if not parciais:
+        raise ValueError('Nenhum resultado parcial para mesclar')
+
+    referencia = parciais[0].metadados
+    for parcial in parciais[1:]:
+        for chave in METADADOS_COMPATIVEIS:
+            if parcial.metadados.get(chave) != referencia.get(chave):
+                raise ValueError(
+                    f'Shards incompatíveis: {chave} = {referencia.get(chave)!r} e {parcial.metadados.get(chave)!r}'
+                )
+        if set(parcial.por_threshold) != set(parciais[0].por_threshold):
+            raise ValueError('Shards avaliados com thresholds diferentes')
+
+    shards = [shard for parcial in parciais for shard in parcial.shards]
+    repetidos = sorted({s for s in shards if shards.count(s) > 1})
+    if repetidos:
+        raise ValueError(f'Shards repetidos: {", ".join(map(str, repetidos))}')
+    total = referencia.get('total_shards')
+    if total:
+        faltando = sorted(set(range(1, total + 1)) - set(shards))
+        if faltando:
+            raise ValueError(f'Shards faltando: {", ".join(map(str, faltando))} de {total}')
+
+    mesclado = ResultadoParcial(thresholds=(), metadados=referencia)
+    mesclado.shards = sorted(shards)
+    mesclado.por_threshold = {t: MatrizConfusao() for t in parciais[0].por_threshold}
+    for parcial in parciais:
+        mesclado.matriz.somar(parcial.matriz)
+        for metodo, matriz in parcial.por_metodo.items():
+            mesclado.por_metodo.setdefault(metodo, MatrizConfusao()).somar(matriz)
+        for chave, matriz in parcial.por_threshold.items():
+            mesclado.por_threshold[chave].somar(matriz)
+    return mesclado
+
+
+def caminho_parcial_padrao(indice, total):
+    return f'parcial_shard_{indice}_de_{total}.json'
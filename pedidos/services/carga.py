@@ -0,0 +1,237 @@
+"""
+Gerador de carga para o endpoint classificar-pedido/.
+
+Reproduz textos de um arquivo contra um servidor local (runserver,
+gunicorn...) ou contra um servidor WSGI iniciado no próprio processo,
+sem acesso à rede externa. Dois modos:
+
+    'fechado': N clientes simultâneos, cada um envia a próxima requisição
+               assim que recebe a resposta (concorrência fixa)
+    'aberto':  requisições disparadas a uma taxa fixa, independente de o
+               servidor acompanhar; a latência é medida a partir do
+               instante programado, então a fila do lado do cliente entra
+               na conta (sem "coordinated omission")
+
+Cada etapa devolve vazão, percentis de latência, taxa de erro (429 à
+parte) e a divisão entre os métodos da resposta (regex, ml,
+regex_degradado).
+"""
+
+import http.client
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from .metricas import percentil
+
+
+ABERTO = 'aberto'
+FECHADO = 'fechado'
+MODOS = (ABERTO, FECHADO)
+
+CAMINHO_ENDPOINT = '/classificar-pedido/'
+
+# status 0: falha de conexão/timeout, sem resposta HTTP
+Amostra = namedtuple('Amostra', 'latencia_ms status metodo')
+
+
+class ClienteCarga:
+    """Cliente HTTP mínimo (http.client) com uma conexão keep-alive por thread."""
+
+    def __init__(self, url, timeout=30):
+        partes = urlsplit(url)
+        if partes.scheme != 'http':
+            raise ValueError(f'Só URLs http:// são suportadas: {url}')
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.caminho = partes.path or CAMINHO_ENDPOINT
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+            self._local.conexao = conexao
+        return conexao
+
+    def _fechar(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+    def enviar(self, texto, inicio=None):
+        """
+        Envia um texto e retorna a Amostra.
+
+        `inicio` (perf_counter) é o instante a partir do qual a latência é
+        contada; por padrão, o momento do envio.
+        """
+        if inicio is None:
+            inicio = time.perf_counter()
+        corpo = json.dumps({'texto': texto})
+        try:
+            conexao = self._conexao()
+            conexao.request('POST', self.caminho, corpo, {'Content-Type': 'application/json'})
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+            if resposta.getheader('Connection', '').lower() == 'close':
+                self._fechar()
+        except (OSError, http.client.HTTPException):
+            self._fechar()
+            return Amostra((time.perf_counter() - inicio) * 1000, 0, None)
+
+        latencia = (time.perf_counter() - inicio) * 1000
+        metodo = None
+        if resposta.status == 200:
+            try:
+                metodo = json.loads(dados).get('metodo')
+            except ValueError:
+                pass
+        return Amostra(latencia, resposta.status, metodo)
+
+
+class _Textos:
+    """Iterador circular sobre os textos, compartilhado entre threads."""
+
+    def __init__(self, textos):
+        if not textos:
+            raise ValueError('Nenhum texto para enviar')
+        self._ciclo = itertools.cycle(textos)
+        self._lock = threading.Lock()
+
+    def proximo(self):
+        with self._lock:
+            return next(self._ciclo)
+
+
+def executar_fechado(cliente, textos, concorrencia, duracao=10.0, requisicoes=None):
+    """
+    Carga em circuito fechado: `concorrencia` clientes em laço.
+
+    Para após `duracao` segundos, ou após `requisicoes` envios se informado.
+
+    Returns:
+        tuple: (lista de Amostra, segundos decorridos)
+    """
+    fonte = _Textos(textos)
+    amostras = []
+    lock = threading.Lock()
+    enviadas = itertools.count()
+    inicio = time.perf_counter()
+    prazo = inicio + duracao
+
+    def cliente_em_laco():
+        locais = []
+        while True:
+            if requisicoes is not None:
+                if next(enviadas) >= requisicoes:
+                    break
+            elif time.perf_counter() >= prazo:
+                break
+            locais.append(cliente.enviar(fonte.proximo()))
+        with lock:
+            amostras.extend(locais)
+
+    threads = [threading.Thread(target=cliente_em_laco, daemon=True) for _ in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return amostras, time.perf_counter() - inicio
+
+
+def executar_aberto(cliente, textos, taxa, duracao=10.0, max_conexoes=64):
+    """
+    Carga em circuito aberto: `taxa` requisições por segundo durante `duracao`.
+
+    Os envios são programados em instantes fixos (i / taxa). Se as
+    `max_conexoes` estiverem ocupadas, a requisição espera na fila do
+    cliente e essa espera conta na latência.
+
+    Returns:
+        tuple: (lista de Amostra, segundos decorridos)
+    """
+    fonte = _Textos(textos)
+    total = max(1, int(round(taxa * duracao)))
+    futuros = []
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_conexoes) as executor:
+        for i in range(total):
+            programado = inicio + i / taxa
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            futuros.append(executor.submit(cliente.enviar, fonte.proximo(), programado))
+        amostras = [futuro.result() for futuro in futuros]
+
+    return amostras, time.perf_counter() - inicio
+
+
+def resumir(amostras, segundos):
+    """Vazão, percentis de latência, erros e métodos de uma etapa."""
+    total = len(amostras)
+    status = Counter(a.status for a in amostras)
+    sucesso = status.get(200, 0)
+    rejeitadas = status.get(429, 0)
+    latencias = sorted(a.latencia_ms for a in amostras if a.status == 200)
+    metodos = Counter(a.metodo for a in amostras if a.status == 200)
+
+    return {
+        'requisicoes': total,
+        'segundos': segundos,
+        'vazao': sucesso / segundos if segundos else 0.0,
+        'sucesso': sucesso,
+        'rejeitadas_429': rejeitadas,
+        'erros': total - sucesso - rejeitadas,
+        'taxa_erro': (total - sucesso) / total if total else 0.0,
+        'sem_resposta': status.get(0, 0),
+        'latencia_ms': {
+            'p50': percentil(latencias, 50),
+            'p90': percentil(latencias, 90),
+            'p95': percentil(latencias, 95),
+            'p99': percentil(latencias, 99),
+            'max': latencias[-1] if latencias else 0.0,
+        },
+        'metodos': dict(metodos),
+    }
+
+
+@contextmanager
+def servidor_em_processo():
+    """
+    Sobe o projeto num servidor WSGI com threads em 127.0.0.1 (porta livre).
+
+    Produz a URL do endpoint classificar-pedido/. O servidor roda no mesmo
+    processo do gerador de carga, então os dois disputam a mesma CPU (e o
+    GIL): serve para comparar etapas entre si, não para números absolutos.
+    Os avisos de 4xx do Django (429 sob sobrecarga) ficam silenciados.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class HandlerSilencioso(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    servidor = ThreadedWSGIServer(('127.0.0.1', 0), HandlerSilencioso, allow_reuse_address=False)
+    servidor.set_app(WSGIHandler())
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    logger = logging.getLogger('django.request')
+    nivel_original = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        yield f'http://127.0.0.1:{servidor.server_address[1]}{CAMINHO_ENDPOINT}'
+    finally:
+        logger.setLevel(nivel_original)
+        servidor.shutdown()
+        servidor.server_close()
+        thread.join()
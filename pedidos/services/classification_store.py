@@ -0,0 +1,154 @@
+import hashlib
+from django.db import transaction
+from django.utils import timezone
+from ..models import ClassificacaoPedido
+
+
+# SQLite limita a quantidade de parâmetros por consulta (999 em versões antigas)
+LOTE_CONSULTA = 500
+
+
+def hash_texto(text):
+    """Retorna o hash SHA-256 (hex) do texto, usado como chave de cache."""
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+def buscar_classificacoes(hashes, versao_modelo, versao_regras):
+    """
+    Busca classificações já persistidas para uma versão de modelo e de regras.
+
+    Args:
+        hashes (iterable): Hashes de texto (ver hash_texto)
+        versao_modelo (str): Versão do modelo
+        versao_regras (str): Versão do conjunto de regras (ver regras_pii)
+
+    Returns:
+        dict: {texto_hash: ClassificacaoPedido}
+    """
+    hashes = list(dict.fromkeys(hashes))
+    encontrados = {}
+    for inicio in range(0, len(hashes), LOTE_CONSULTA):
+        lote = hashes[inicio:inicio + LOTE_CONSULTA]
+        consulta = ClassificacaoPedido.objects.filter(
+            versao_modelo=versao_modelo,
+            versao_regras=versao_regras,
+            texto_hash__in=lote,
+        )
+        for registro in consulta:
+            encontrados[registro.texto_hash] = registro
+    return encontrados
+
+
+def resultado_de_registro(registro, threshold=0.35):
+    """
+    Reconstrói o dicionário de resultado do detector a partir do registro.
+
+    Para o método 'ml' a decisão é recalculada a partir da confiança
+    gravada, de modo que o cache vale para qualquer threshold.
+    """
+    if registro.metodo == 'ml':
+        contem = registro.confianca >= threshold
+        tipos = ['Detectado por ML'] if contem else []
+        detalhes = {'ml_score': registro.confianca, 'reutilizado': True}
+    else:
+        contem = registro.contem_dados_pessoais
+        tipos = list(registro.tipos_detectados)
+        detalhes = {'reutilizado': True}
+    detalhes['versao_regras'] = registro.versao_regras
+
+    return {
+        'contem_dados_pessoais': contem,
+        'metodo': registro.metodo,
+        'tipos_detectados': tipos,
+        'confianca': registro.confianca,
+        'detalhes': detalhes,
+    }
+
+
+class BufferClassificacoes:
+    """
+    Acumula resultados em memória e grava em lote com bulk_create/bulk_update.
+
+    Uso:
+        with BufferClassificacoes(versao, versao_regras) as buffer:
+            for texto, resultado in ...:
+                buffer.adicionar(hash_texto(texto), resultado)
+    """
+
+    def __init__(self, versao_modelo, versao_regras, batch_size=500):
+        self.versao_modelo = versao_modelo
+        self.versao_regras = versao_regras
+        self.batch_size = batch_size
+        self.pendentes = {}
+        self.total_gravados = 0
+
+    def adicionar(self, texto_hash, resultado):
+        """Enfileira um resultado do detector; grava quando o lote enche."""
+        # Resultados de falha ou sobrecarga do ML não devem ser reaproveitados
+        detalhes = resultado.get('detalhes', {})
+        if 'erro_ml' in detalhes or detalhes.get('degradado'):
+            return
+        # Score ML emprestado de um texto quase idêntico, não deste texto
+        if detalhes.get('ml_do_grupo'):
+            return
+        # Saída antecipada da cascata: a confiança é aproximada e só vale
+        # para o threshold usado, não pode ser reaproveitada para outros
+        if detalhes.get('saida_antecipada'):
+            return
+        # Busca por tipos ou com early_exit: faltam tipos na resposta
+        if detalhes.get('busca_parcial'):
+            return
+        # Classificado por outro conjunto de regras (recarregado no meio do lote)
+        if detalhes.get('versao_regras', self.versao_regras) != self.versao_regras:
+            return
+        # Score de outro modelo: gravá-lo sob esta versão envenenaria o cache
+        if detalhes.get('versao_modelo', self.versao_modelo) != self.versao_modelo:
+            return
+
+        self.pendentes[texto_hash] = resultado
+        if len(self.pendentes) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Grava os resultados pendentes em uma única transação."""
+        if not self.pendentes:
+            return
+
+        existentes = buscar_classificacoes(self.pendentes.keys(), self.versao_modelo, self.versao_regras)
+        agora = timezone.now()
+        novos = []
+        atualizados = []
+
+        for texto_hash, resultado in self.pendentes.items():
+            registro = existentes.get(texto_hash)
+            if registro is None:
+                registro = ClassificacaoPedido(
+                    texto_hash=texto_hash, versao_modelo=self.versao_modelo, versao_regras=self.versao_regras
+                )
+                novos.append(registro)
+            else:
+                atualizados.append(registro)
+
+            registro.contem_dados_pessoais = bool(resultado['contem_dados_pessoais'])
+            registro.metodo = resultado['metodo']
+            registro.tipos_detectados = list(resultado['tipos_detectados'])
+            registro.confianca = float(resultado['confianca'])
+            registro.classificado_em = agora
+
+        with transaction.atomic():
+            ClassificacaoPedido.objects.bulk_create(novos, batch_size=self.batch_size)
+            ClassificacaoPedido.objects.bulk_update(
+                atualizados,
+                ['contem_dados_pessoais', 'metodo', 'tipos_detectados', 'confianca', 'classificado_em'],
+                batch_size=self.batch_size,
+            )
+
+        self.total_gravados += len(self.pendentes)
+        self.pendentes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
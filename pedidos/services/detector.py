@@ -1,73 +1,143 @@
 from .regex_rules import contains_personal_data_regex, detect_personal_data_regex
-from .ml_model import predict, predict_proba
-import os
+from .ml_model import cascata_padrao, get_model_version, predict, predict_proba, predict_proba_cascata
+from .preprocessing import analisar_texto
+from .regras_pii import regras_ativas
+from . import registro_modelos
+import time
+from contextlib import nullcontext
 
-def detect_personal_data(text, threshold=0.35):
+def detect_personal_data(text, threshold=0.35, modelo=None, cascata=None, admissao=None,
+                         confianca_ml=None, tipos=None, early_exit=False, regras=None):
     """
     Detecta dados pessoais usando abordagem híbrida (regex + ML).
     
     Args:
-        text (str): Texto para análise
+        text (str ou TextoAnalisado): Texto para análise. Um TextoAnalisado
+            criado pelo chamador recebe em `.tempos` o custo de cada etapa.
         threshold (float): Limiar de confiança para ML (0.0 a 1.0)
+        modelo (str): Versão do modelo ML (padrão: a ativa no registro)
+        cascata (bool): Avalia NB e LR antes e só chama a RandomForest se a
+            decisão ainda depender dela (padrão: settings.ML_CASCATA)
+        admissao (ControleAdmissao): Limita as execuções simultâneas do ML;
+            sem vaga, retorna metodo='regex_degradado' ou levanta
+            SobrecargaML, conforme a política
+        confianca_ml (float): Score ML já calculado para um texto quase
+            idêntico (mesmo grupo); o regex roda normalmente e o ML é pulado
+        tipos (list): Procura só esses tipos (ver regex_rules.TIPOS_REGEX).
+            O ML não distingue tipos, então não é consultado
+        early_exit (bool): Responde no primeiro tipo confirmado pelo regex;
+            `tipos_detectados` traz só esse tipo
+        regras (ConjuntoRegras): Regras do regex (padrão: o conjunto ativo,
+            recarregado se o arquivo mudou). A versão usada vai em
+            `detalhes['versao_regras']`
         
     Returns:
         dict: {
             'contem_dados_pessoais': bool,
-            'metodo': str ('regex', 'ml', 'hibrido'),
+            'metodo': str ('regex', 'ml', 'hibrido', 'regex_degradado'),
             'tipos_detectados': list,
             'confianca': float (0.0 a 1.0),
             'detalhes': dict
         }
     """
+    # Um único conjunto de regras do início ao fim, mesmo se o arquivo for recarregado
+    regras = regras or regras_ativas()
+    resultado = _detectar(
+        text, threshold, modelo, cascata, admissao, confianca_ml, tipos, early_exit, regras
+    )
+    resultado['detalhes']['versao_regras'] = regras.versao
+    return resultado
+
+
+def _detectar(text, threshold, modelo, cascata, admissao, confianca_ml, tipos, early_exit, regras):
+    """Regex e, se ele não decidir, ML (ver detect_personal_data)."""
+    # Pré-processamento único, compartilhado por regex e ML
+    analisado = analisar_texto(text)
+    text = analisado.original
+    
     # 1. PRIMEIRA CAMADA: Tentar regex
-    resultado_regex = detect_personal_data_regex(text)
+    inicio = time.perf_counter()
+    resultado_regex = detect_personal_data_regex(text, analisado, tipos, early_exit, regras)
+    analisado.registrar_tempo('regex', time.perf_counter() - inicio)
+    # Busca restrita a alguns tipos ou interrompida no primeiro acerto:
+    # a resposta não traz todos os tipos e não deve ser reaproveitada
+    parcial = tipos is not None or (early_exit and resultado_regex['detected'])
     
     if resultado_regex['detected']:
         # Se regex detectou, retornar com alta confiança
+        detalhes = resultado_regex['detalhes']
         return {
             'contem_dados_pessoais': True,
             'metodo': 'regex',
             'tipos_detectados': resultado_regex['tipos_detectados'],
             'confianca': 1.0,
-            'detalhes': resultado_regex['detalhes']
+            'detalhes': {**detalhes, 'busca_parcial': True} if parcial else detalhes
+        }
+    
+    if tipos is not None:
+        return {
+            'contem_dados_pessoais': False,
+            'metodo': 'regex',
+            'tipos_detectados': [],
+            'confianca': 0.0,
+            'detalhes': {'busca_parcial': True}
         }
     
     # 2. SEGUNDA CAMADA: Se regex não detectou, tentar ML
-    modelo_path = 'ml/modelo.pkl'
-    vectorizer_path = 'ml/vectorizer.pkl'
+    versao = modelo or get_model_version()
     
-    if os.path.exists(modelo_path) and os.path.exists(vectorizer_path):
-        try:
-            from .ml_model import predict_proba
-            
-            # Obter probabilidade do modelo ML
-            confianca_ml = predict_proba(text)
-            
-            if confianca_ml >= threshold:
+    if registro_modelos.existe(versao):
+        # Controle de admissão: sem vaga no ML, responde só com o regex
+        with admissao.vaga() if admissao is not None else nullcontext(True) as admitida:
+            if not admitida:
                 return {
-                    'contem_dados_pessoais': True,
-                    'metodo': 'ml',
-                    'tipos_detectados': ['Detectado por ML'],
-                    'confianca': float(confianca_ml),
-                    'detalhes': {'ml_score': float(confianca_ml)}
+                    'contem_dados_pessoais': False,
+                    'metodo': 'regex_degradado',
+                    'tipos_detectados': [],
+                    'confianca': 0.0,
+                    'detalhes': {'degradado': True, 'motivo': 'sobrecarga_ml'}
                 }
-            else:
+            
+            try:
+                # Obter probabilidade do modelo ML
+                inicio = time.perf_counter()
+                detalhes = {'versao_modelo': versao}
+                if confianca_ml is not None:
+                    detalhes['ml_do_grupo'] = True
+                elif cascata if cascata is not None else cascata_padrao():
+                    confianca_ml, detalhes['estagio_cascata'], detalhes['saida_antecipada'] = (
+                        predict_proba_cascata(analisado, threshold, versao)
+                    )
+                else:
+                    confianca_ml = predict_proba(analisado, versao)
+                analisado.registrar_tempo('ml', time.perf_counter() - inicio)
+                detalhes = {'ml_score': float(confianca_ml), **detalhes}
+            
+                if confianca_ml >= threshold:
+                    return {
+                        'contem_dados_pessoais': True,
+                        'metodo': 'ml',
+                        'tipos_detectados': ['Detectado por ML'],
+                        'confianca': float(confianca_ml),
+                        'detalhes': detalhes
+                    }
+                else:
+                    return {
+                        'contem_dados_pessoais': False,
+                        'metodo': 'ml',
+                        'tipos_detectados': [],
+                        'confianca': float(confianca_ml),
+                        'detalhes': detalhes
+                    }
+            except Exception as e:
+                # Se ML falhar, retornar resultado do regex
                 return {
                     'contem_dados_pessoais': False,
-                    'metodo': 'ml',
+                    'metodo': 'regex',
                     'tipos_detectados': [],
-                    'confianca': float(confianca_ml),
-                    'detalhes': {'ml_score': float(confianca_ml)}
+                    'confianca': 0.0,
+                    'detalhes': {'erro_ml': str(e)}
                 }
-        except Exception as e:
-            # Se ML falhar, retornar resultado do regex
-            return {
-                'contem_dados_pessoais': False,
-                'metodo': 'regex',
-                'tipos_detectados': [],
-                'confianca': 0.0,
-                'detalhes': {'erro_ml': str(e)}
-            }
     else:
         # Se modelo ML não existe, retornar apenas resultado do regex
         return {
@@ -92,15 +162,105 @@ def classify_request(text):
     return detect_personal_data(text, threshold=0.35)
 
 
-def batch_detect(texts, confidence_threshold=0.35):
+def detectar_agrupando(texts, threshold=0.35, modelo=None, grupos=None, early_exit=False, regras=None,
+                       cascata=None):
+    """
+    Classifica agrupando textos quase idênticos: o regex roda em todos, o
+    ML só no primeiro membro de cada grupo que chegar até ele.
+    
+    Args:
+        grupos (list): Grupo de cada texto (ver quase_duplicatas.agrupar_textos);
+            calculado aqui se não informado
+        cascata (bool): Ver detect_personal_data
+    """
+    from .quase_duplicatas import agrupar_textos, contar_ml_reaproveitado
+    
+    if grupos is None:
+        grupos = agrupar_textos(texts)
+    
+    scores = {}
+    resultados = []
+    for text, grupo in zip(texts, grupos):
+        resultado = detect_personal_data(
+            text, threshold, modelo, cascata, confianca_ml=scores.get(grupo), early_exit=early_exit, regras=regras
+        )
+        if resultado['metodo'] == 'ml':
+            if resultado['detalhes'].get('ml_do_grupo'):
+                contar_ml_reaproveitado()
+            else:
+                scores[grupo] = resultado['confianca']
+        resultados.append(resultado)
+    return resultados
+
+
+def batch_detect(texts, confidence_threshold=0.35, reutilizar=False, modelo=None, agrupar=False,
+                 tipos=None, early_exit=False, cascata=None):
     """
     Detecção em lote para processamento eficiente.
     
     Args:
         texts (list): Lista de textos
         confidence_threshold (float): Limiar ML
+        reutilizar (bool): Se True, pula textos já classificados na versão
+            atual do modelo e das regras (tabela ClassificacaoPedido) e
+            persiste os novos
+        modelo (str): Versão do modelo ML (padrão: a ativa no registro)
+        agrupar (bool): Se True, textos quase idênticos (MinHash) compartilham
+            uma única predição ML; o regex roda em todos
+        tipos, early_exit: Ver detect_personal_data. Com `tipos`, os textos
+            são sempre classificados de novo (o armazenado é de uma busca completa)
+        cascata (bool): Ver detect_personal_data
     
     Returns:
         list: Lista de dicionários com resultados
     """
-    return [detect_personal_data(text, confidence_threshold) for text in texts]
\ No newline at end of file
+    # O lote inteiro usa o mesmo conjunto de regras
+    regras = regras_ativas()
+    if tipos is not None:
+        return [
+            detect_personal_data(
+                text, confidence_threshold, modelo, cascata, tipos=tipos, early_exit=early_exit, regras=regras
+            )
+            for text in texts
+        ]
+    if not reutilizar:
+        if agrupar:
+            return detectar_agrupando(
+                texts, confidence_threshold, modelo, early_exit=early_exit, regras=regras, cascata=cascata
+            )
+        return [
+            detect_personal_data(text, confidence_threshold, modelo, cascata, early_exit=early_exit, regras=regras)
+            for text in texts
+        ]
+    
+    from .classification_store import (
+        BufferClassificacoes, buscar_classificacoes, hash_texto, resultado_de_registro
+    )
+    
+    versao = modelo or get_model_version()
+    hashes = [hash_texto(text) for text in texts]
+    existentes = buscar_classificacoes(hashes, versao, regras.versao)
+    
+    pendentes = [i for i, texto_hash in enumerate(hashes) if texto_hash not in existentes]
+    textos_pendentes = [texts[i] for i in pendentes]
+    if agrupar:
+        novos = detectar_agrupando(
+            textos_pendentes, confidence_threshold, versao, early_exit=early_exit, regras=regras, cascata=cascata
+        )
+    else:
+        novos = [
+            detect_personal_data(text, confidence_threshold, versao, cascata, early_exit=early_exit, regras=regras)
+            for text in textos_pendentes
+        ]
+    
+    resultados = [None] * len(texts)
+    with BufferClassificacoes(versao, regras.versao) as buffer:
+        for i, resultado in zip(pendentes, novos):
+            buffer.adicionar(hashes[i], resultado)
+            resultados[i] = resultado
+    
+    for i, texto_hash in enumerate(hashes):
+        if resultados[i] is None:
+            resultados[i] = resultado_de_registro(existentes[texto_hash], confidence_threshold)
+    
+    return resultados
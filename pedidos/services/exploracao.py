@@ -0,0 +1,217 @@
+"""
+Busca de configurações do modelo: F1 x latência x tamanho.
+
+Cada candidato é uma combinação de parâmetros do TF-IDF (max_features,
+ngram_range, min_df) com um subconjunto de estimadores do ensemble. A
+matriz TF-IDF de cada configuração de vectorizer é calculada uma vez,
+guardada em disco (chave: hash do dataset + parâmetros) e reaproveitada
+por todos os ensembles e pelas execuções seguintes.
+
+A validação cruzada e o treino final rodam em paralelo num pool de
+processos; tamanho, tempo de carga e latência são medidos depois, um
+candidato por vez, para que os processos não disputem a CPU durante a
+medição.
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import registro_modelos
+from .metricas import percentil
+
+
+DIRETORIO_CACHE = 'ml/cache_exploracao'
+TEXTOS_LATENCIA = 50
+FOLDS = 5
+
+
+def gerar_grade(max_features, ngram_ranges, min_dfs, ensembles):
+    """Lista de configurações (dicts aceitos por treinamento.configuracao_completa)."""
+    return [
+        {
+            'max_features': mf,
+            'ngram_range': tuple(ngram),
+            'min_df': min_df,
+            'estimadores': tuple(estimadores),
+        }
+        for mf, ngram, min_df, estimadores in itertools.product(max_features, ngram_ranges, min_dfs, ensembles)
+    ]
+
+
+def _chave_vectorizer(configuracao):
+    return (configuracao['max_features'], tuple(configuracao['ngram_range']), configuracao['min_df'])
+
+
+def caminho_matriz(diretorio_cache, hash_dados, configuracao):
+    """Arquivo de cache da matriz TF-IDF de uma configuração de vectorizer."""
+    mf, (ng_min, ng_max), min_df = _chave_vectorizer(configuracao)
+    return os.path.join(diretorio_cache, f'{hash_dados}_mf{mf}_ng{ng_min}-{ng_max}_df{min_df}.joblib')
+
+
+def matriz_em_cache(textos, labels, configuracao, diretorio_cache=DIRETORIO_CACHE):
+    """
+    (caminho do cache, reaproveitado?) da matriz TF-IDF da configuração,
+    calculando e gravando (vectorizer, X) se ainda não existir.
+    """
+    import joblib
+    from .treinamento import criar_vectorizer, hash_dataset
+
+    os.makedirs(diretorio_cache, exist_ok=True)
+    caminho = caminho_matriz(diretorio_cache, hash_dataset(textos, labels), configuracao)
+    if os.path.exists(caminho):
+        return caminho, True
+
+    vectorizer = criar_vectorizer(configuracao)
+    X = vectorizer.fit_transform(textos)
+    if hasattr(vectorizer, 'stop_words_'):
+        del vectorizer.stop_words_
+    fd, temporario = tempfile.mkstemp(dir=diretorio_cache, prefix='.tmp-')
+    os.close(fd)
+    joblib.dump((vectorizer, X), temporario)
+    os.replace(temporario, caminho)
+    return caminho, False
+
+
+def _treinar_candidato(argumentos):
+    """
+    Roda no pool: validação cruzada e treino final de um candidato sobre
+    a matriz em cache. Grava os artefatos em `diretorio` e retorna os
+    scores da validação cruzada.
+    """
+    import joblib
+    import numpy as np
+    from sklearn.model_selection import cross_val_score
+    from .treinamento import criar_ensemble, salvar_artefatos
+
+    configuracao, caminho_cache, labels, diretorio = argumentos
+    vectorizer, X = joblib.load(caminho_cache)
+    y = np.array(labels)
+
+    inicio = time.perf_counter()
+    modelo = criar_ensemble(configuracao)
+    scores = cross_val_score(modelo, X, y, cv=FOLDS, scoring='f1')
+    modelo.fit(X, y)
+    salvar_artefatos(modelo, vectorizer, diretorio)
+    return [float(s) for s in scores], time.perf_counter() - inicio
+
+
+def medir_artefatos(diretorio, textos):
+    """
+    Tamanho, tempo de carga e latência (um texto e em lote) dos artefatos.
+
+    A latência de um texto usa o mesmo caminho da API (VetorizadorRapido
+    + predict_proba); a de lote, `transform` do scikit-learn sobre todos
+    os textos de uma vez, dividida pelo número de textos.
+    """
+    import joblib
+    from .fast_vectorizer import VetorizadorRapido
+
+    caminhos = {nome: os.path.join(diretorio, arquivo) for nome, arquivo in registro_modelos.ARTEFATOS.items()}
+    tamanho = sum(os.path.getsize(caminhos[nome]) for nome in ('modelo', 'vectorizer'))
+
+    inicio = time.perf_counter()
+    modelo = joblib.load(caminhos['modelo'])
+    vectorizer = joblib.load(caminhos['vectorizer'])
+    tempo_carga = time.perf_counter() - inicio
+
+    transformar = VetorizadorRapido(vectorizer).transform
+    amostra = textos[:TEXTOS_LATENCIA]
+    modelo.predict_proba(transformar(amostra[0]))  # aquecimento
+    latencias = []
+    for texto in amostra:
+        inicio = time.perf_counter()
+        modelo.predict_proba(transformar(texto))
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    latencias.sort()
+
+    inicio = time.perf_counter()
+    modelo.predict_proba(vectorizer.transform(textos))
+    lote_ms = (time.perf_counter() - inicio) * 1000 / max(len(textos), 1)
+
+    return {
+        'tamanho_bytes': tamanho,
+        'carga_ms': tempo_carga * 1000,
+        'latencia_p50_ms': percentil(latencias, 50),
+        'latencia_p95_ms': percentil(latencias, 95),
+        'lote_ms_por_texto': lote_ms,
+    }
+
+
+def fronteira_pareto(candidatos):
+    """
+    Marca `pareto=True` nos candidatos não dominados em (F1 maior,
+    latência p50 menor, tamanho menor). Retorna os da fronteira.
+    """
+    def objetivos(c):
+        return (-c['f1_cv_medio'], c['latencia_p50_ms'], c['tamanho_bytes'])
+
+    for candidato in candidatos:
+        proprio = objetivos(candidato)
+        candidato['pareto'] = not any(
+            all(a <= b for a, b in zip(objetivos(outro), proprio)) and objetivos(outro) != proprio
+            for outro in candidatos
+        )
+    return [c for c in candidatos if c['pareto']]
+
+
+def explorar(textos, labels, grade, processos=1, diretorio_cache=DIRETORIO_CACHE, progresso=None):
+    """
+    Avalia todas as configurações da grade.
+
+    Returns:
+        list: Um dict por candidato (id, configuração, F1 da validação
+            cruzada, tamanho, carga, latências, tempo de treino, se a
+            matriz veio do cache e se está na fronteira de Pareto)
+    """
+    progresso = progresso or (lambda mensagem: None)
+
+    # 1. Matrizes TF-IDF: uma por configuração de vectorizer
+    caches = {}
+    for configuracao in grade:
+        chave = _chave_vectorizer(configuracao)
+        if chave not in caches:
+            caches[chave] = matriz_em_cache(textos, labels, configuracao, diretorio_cache)
+    reaproveitadas = sum(1 for _, reaproveitada in caches.values() if reaproveitada)
+    progresso(f'{len(caches)} matrizes TF-IDF ({reaproveitadas} do cache) para {len(grade)} candidatos')
+
+    # 2. Validação cruzada + treino final em paralelo
+    raiz = tempfile.mkdtemp(prefix='exploracao-')
+    try:
+        tarefas = [
+            (configuracao, caches[_chave_vectorizer(configuracao)][0], list(labels), os.path.join(raiz, str(i)))
+            for i, configuracao in enumerate(grade, 1)
+        ]
+        for _, _, _, diretorio in tarefas:
+            os.makedirs(diretorio)
+        if processos > 1:
+            with ProcessPoolExecutor(max_workers=processos) as pool:
+                treinos = list(pool.map(_treinar_candidato, tarefas))
+        else:
+            treinos = [_treinar_candidato(tarefa) for tarefa in tarefas]
+        progresso(f'{len(tarefas)} candidatos treinados ({processos} processo(s))')
+
+        # 3. Medições sequenciais, sem concorrência pela CPU
+        candidatos = []
+        for (configuracao, caminho_cache, _, diretorio), (scores, tempo_treino) in zip(tarefas, treinos):
+            candidato = {
+                'id': len(candidatos) + 1,
+                'configuracao': {
+                    **configuracao,
+                    'ngram_range': list(configuracao['ngram_range']),
+                    'estimadores': list(configuracao['estimadores']),
+                },
+                'f1_cv_medio': sum(scores) / len(scores),
+                'f1_cv_folds': scores,
+                'treino_s': tempo_treino,
+                'matriz_do_cache': caches[_chave_vectorizer(configuracao)][1],
+            }
+            candidato.update(medir_artefatos(diretorio, textos))
+            candidatos.append(candidato)
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+    fronteira_pareto(candidatos)
+    return candidatos
@@ -0,0 +1,117 @@
+import re
+import numpy as np
+from scipy.sparse import csr_matrix
+from .preprocessing import TOKEN_PATTERN, analisar_texto
+from .vocabulario import VocabularioCompacto
+
+
+class VetorizadorRapido:
+    """
+    Transformação TF-IDF de um único texto, equivalente ao
+    `TfidfVectorizer.transform([texto])` treinado, sem o analisador genérico
+    do scikit-learn nem a validação na construção da matriz esparsa.
+
+    Construído a partir do vectorizer já treinado (vocabulário, IDF, stop
+    words, padrão de token e parâmetros de normalização) ou de um
+    VocabularioCompacto mapeado em memória, que dispensa o vectorizer.pkl.
+    """
+
+    def __init__(self, fonte):
+        if isinstance(fonte, VocabularioCompacto):
+            self._configurar_de_vocabulario(fonte)
+        else:
+            self._configurar_de_vectorizer(fonte)
+        self._token_re = re.compile(self.token_pattern)
+
+    def _configurar_de_vectorizer(self, vectorizer):
+        if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+            raise ValueError('VetorizadorRapido suporta apenas o analisador "word" padrão')
+        # Parâmetros que mudam o texto antes da tokenização e não são reproduzidos aqui
+        if vectorizer.strip_accents is not None or vectorizer.input != 'content' or vectorizer.decode_error != 'strict':
+            raise ValueError('VetorizadorRapido não suporta strip_accents, input nem decode_error diferentes do padrão')
+
+        self.vocabulario = vectorizer.vocabulary_
+        self.stop_words = vectorizer.get_stop_words() or frozenset()
+        self.ngram_range = vectorizer.ngram_range
+        self.token_pattern = vectorizer.token_pattern or TOKEN_PATTERN
+        self.lowercase = vectorizer.lowercase
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.norm = vectorizer.norm
+        self.dtype = vectorizer.dtype
+        self.n_features = len(self.vocabulario)
+        self.idf = vectorizer.idf_.astype(np.float64) if vectorizer.use_idf else None
+
+    def _configurar_de_vocabulario(self, vocabulario):
+        cabecalho = vocabulario.cabecalho
+        if cabecalho.get('strip_accents') is not None:
+            raise ValueError('VetorizadorRapido não suporta strip_accents')
+        self.vocabulario = vocabulario
+        self.stop_words = frozenset(cabecalho['stop_words'])
+        self.ngram_range = tuple(cabecalho['ngram_range'])
+        self.token_pattern = cabecalho['token_pattern'] or TOKEN_PATTERN
+        self.lowercase = cabecalho['lowercase']
+        self.binary = cabecalho['binary']
+        self.sublinear_tf = cabecalho['sublinear_tf']
+        self.norm = cabecalho['norm']
+        self.dtype = np.dtype(cabecalho['dtype'])
+        self.n_features = cabecalho['n_features']
+        # Array somente leitura sobre o mmap: páginas compartilhadas entre processos
+        self.idf = vocabulario.idf if cabecalho['use_idf'] else None
+
+    def _tokens(self, text):
+        analisado = analisar_texto(text)
+        if self.lowercase:
+            tokens = [token for token, _, _ in analisado.tokens(self.token_pattern)]
+        else:
+            tokens = self._token_re.findall(analisado.original)
+        return [token for token in tokens if token not in self.stop_words]
+
+    def contar(self, text):
+        """Retorna {índice_feature: contagem} dos n-gramas do vocabulário."""
+        tokens = self._tokens(text)
+        vocabulario = self.vocabulario
+        contagens = {}
+        min_n, max_n = self.ngram_range
+        total = len(tokens)
+
+        # N-gramas gerados e consultados direto no vocabulário, sem lista intermediária
+        for n in range(min_n, min(max_n, total) + 1):
+            for i in range(total - n + 1):
+                indice = vocabulario.get(tokens[i] if n == 1 else ' '.join(tokens[i:i + n]))
+                if indice is not None:
+                    contagens[indice] = contagens.get(indice, 0) + 1
+        return contagens
+
+    def transform(self, text):
+        """Retorna a matriz esparsa 1 x n_features normalizada (str ou TextoAnalisado)."""
+        contagens = self.contar(text)
+
+        indices = np.fromiter(sorted(contagens), dtype=np.int32, count=len(contagens))
+        if self.binary:
+            valores = np.ones(len(indices), dtype=np.float64)
+        else:
+            valores = np.fromiter((contagens[i] for i in indices.tolist()), dtype=np.float64, count=len(indices))
+            if self.sublinear_tf:
+                np.log(valores, out=valores)
+                valores += 1
+
+        if self.idf is not None:
+            valores *= self.idf[indices]
+
+        if self.norm == 'l2':
+            norma = np.sqrt(np.dot(valores, valores))
+        elif self.norm == 'l1':
+            norma = np.abs(valores).sum()
+        else:
+            norma = 0.0
+        if norma > 0:
+            valores /= norma
+
+        # Atribuição direta dos arrays evita a validação do construtor
+        matriz = csr_matrix((1, self.n_features), dtype=self.dtype)
+        matriz.data = valores.astype(self.dtype, copy=False)
+        matriz.indices = indices
+        matriz.indptr = np.array([0, len(indices)], dtype=np.int32)
+        matriz.has_sorted_indices = True
+        return matriz
@@ -0,0 +1,145 @@
+"""
+Leitura e gravação em fluxo para avaliar datasets grandes.
+
+O dataset rotulado é lido em lotes (pandas com `chunksize` para CSV e
+JSONL, openpyxl em modo somente leitura para .xlsx) e cada resultado é
+gravado no disco assim que é produzido (openpyxl em modo somente
+escrita, CSV ou JSONL). A memória usada não cresce com o número de
+linhas: só o lote atual fica carregado.
+"""
+
+import csv
+import json
+import os
+
+
+COLUNAS_TEXTO_ROTULADO = ['texto', 'Texto Mascarado', 'text']
+COLUNA_LABEL = 'label'
+TAMANHO_LOTE = 1000
+
+COLUNAS_RESULTADO = ['texto', 'label_real', 'predicao', 'metodo', 'confianca', 'acertou']
+# Larguras da planilha: texto completo numa coluna bem larga
+LARGURAS_XLSX = {'A': 120, 'B': 15, 'C': 15, 'D': 15, 'E': 15, 'F': 15}
+FORMATOS_SAIDA = ('.xlsx', '.csv', '.jsonl')
+
+
+def _lotes_pandas(caminho, tamanho_lote):
+    import pandas as pd
+
+    if caminho.endswith('.jsonl'):
+        return pd.read_json(caminho, lines=True, chunksize=tamanho_lote)
+    return pd.read_csv(caminho, chunksize=tamanho_lote)
+
+
+def _lotes_xlsx(caminho, tamanho_lote):
+    """DataFrames de até `tamanho_lote` linhas lidos com openpyxl em modo somente leitura."""
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(caminho, read_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None) or ()
+        lote = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= tamanho_lote:
+                yield pd.DataFrame(lote, columns=cabecalho)
+                lote = []
+        if lote or not cabecalho:
+            yield pd.DataFrame(lote, columns=cabecalho)
+    finally:
+        planilha.close()
+
+
+def ler_lotes_rotulados(caminho, tamanho_lote=TAMANHO_LOTE):
+    """
+    Lê um dataset rotulado (.csv, .jsonl ou .xlsx) em lotes.
+
+    Returns:
+        tuple: (nome da coluna de texto, gerador de listas [(texto, label)])
+
+    Raises:
+        ValueError: Se faltar a coluna 'label' ou a coluna de texto
+    """
+    if caminho.endswith('.xlsx'):
+        blocos = iter(_lotes_xlsx(caminho, tamanho_lote))
+    else:
+        blocos = iter(_lotes_pandas(caminho, tamanho_lote))
+
+    primeiro = next(blocos, None)
+    colunas = list(primeiro.columns) if primeiro is not None else []
+    if COLUNA_LABEL not in colunas:
+        raise ValueError('Dataset não possui coluna "label"')
+    coluna_texto = next((c for c in COLUNAS_TEXTO_ROTULADO if c in colunas), None)
+    if coluna_texto is None:
+        raise ValueError(
+            f'Coluna de texto não encontrada (esperado uma de: {", ".join(COLUNAS_TEXTO_ROTULADO)})'
+        )
+
+    def lotes():
+        bloco = primeiro
+        while bloco is not None:
+            textos = bloco[coluna_texto].fillna('').astype(str).tolist()
+            labels = bloco[COLUNA_LABEL].astype(int).tolist()
+            yield list(zip(textos, labels))
+            bloco = next(blocos, None)
+
+    return coluna_texto, lotes()
+
+
+class EscritorResultados:
+    """
+    Grava uma linha de resultado por vez em .xlsx, .csv ou .jsonl.
+
+    A planilha usa o modo somente escrita do openpyxl, em que as linhas
+    vão para um arquivo temporário em vez de ficarem na memória.
+    Use como gerenciador de contexto: o arquivo só é finalizado no `close()`.
+    """
+
+    def __init__(self, caminho, colunas=COLUNAS_RESULTADO):
+        extensao = os.path.splitext(caminho)[1].lower()
+        if extensao not in FORMATOS_SAIDA:
+            raise ValueError(f'Formato de saída não suportado: {caminho} (use {", ".join(FORMATOS_SAIDA)})')
+        self.caminho = caminho
+        self.colunas = list(colunas)
+        self.formato = extensao
+        self.linhas = 0
+
+        if extensao == '.xlsx':
+            from openpyxl import Workbook
+
+            self._planilha = Workbook(write_only=True)
+            self._aba = self._planilha.create_sheet('Resultados')
+            for coluna, largura in LARGURAS_XLSX.items():
+                self._aba.column_dimensions[coluna].width = largura
+            self._aba.append(self.colunas)
+        else:
+            self._arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+            if extensao == '.csv':
+                self._csv = csv.writer(self._arquivo)
+                self._csv.writerow(self.colunas)
+
+    def escrever(self, resultado):
+        """Grava um dicionário com as chaves de `colunas`."""
+        valores = [resultado.get(coluna) for coluna in self.colunas]
+        if self.formato == '.xlsx':
+            self._aba.append(valores)
+        elif self.formato == '.csv':
+            self._csv.writerow(valores)
+        else:
+            self._arquivo.write(json.dumps(dict(zip(self.colunas, valores)), ensure_ascii=False) + '\n')
+        self.linhas += 1
+
+    def close(self):
+        if self.formato == '.xlsx':
+            self._planilha.save(self.caminho)
+        else:
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,178 @@
+"""
+Índice de offsets de linha de arquivos JSONL grandes.
+
+O índice guarda o byte em que cada linha não vazia começa (array de
+inteiros de 8 bytes, ~8 MB por milhão de linhas). Ele é construído numa
+varredura do arquivo mapeado em memória (mmap + `find`, sem decodificar
+nem copiar as linhas) e gravado ao lado do arquivo (`<arquivo>.idx`),
+sendo reaproveitado enquanto o tamanho e a data de modificação do arquivo
+não mudarem.
+
+Com o índice, ler as linhas 5.000.000 a 5.001.000 é um seek direto. Para
+dividir o trabalho entre workers não é preciso índice: cada um recebe uma
+faixa de bytes e começa na primeira linha que inicia dentro dela
+(`linhas_no_intervalo`), de modo que toda linha cai em exatamente uma faixa.
+"""
+
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left
+
+
+FORMATO_INDICE = 1
+EXTENSAO_INDICE = '.idx'
+_BRANCOS = b' \t\r'
+
+
+def identidade_arquivo(caminho):
+    """(tamanho, mtime_ns) do arquivo: o índice só vale para essa versão dele."""
+    estado = os.stat(caminho)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def _linha_vazia(mapa, inicio, fim):
+    # Linhas JSON começam quase sempre com '{': só as outras são copiadas
+    return fim == inicio or (mapa[inicio] in _BRANCOS and not mapa[inicio:fim].strip())
+
+
+def linhas_no_intervalo(caminho, inicio=0, fim=None):
+    """
+    Gera (offset, bytes) das linhas não vazias que começam em [inicio, fim).
+
+    Se `inicio` cai no meio de uma linha, ela pertence à faixa anterior e
+    é pulada. Os bytes não incluem a quebra de linha.
+    """
+    tamanho = os.path.getsize(caminho)
+    fim = tamanho if fim is None else min(fim, tamanho)
+    if tamanho == 0 or inicio >= fim:
+        return
+    with open(caminho, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        posicao = inicio
+        if posicao > 0 and mapa[posicao - 1] != 0x0A:
+            quebra = mapa.find(b'\n', posicao)
+            posicao = tamanho if quebra < 0 else quebra + 1
+        while posicao < fim:
+            quebra = mapa.find(b'\n', posicao)
+            final = tamanho if quebra < 0 else quebra
+            if not _linha_vazia(mapa, posicao, final):
+                yield posicao, mapa[posicao:final]
+            posicao = final + 1
+
+
+def intervalo_da_parte(tamanho, parte, total):
+    """Faixa de bytes [inicio, fim) da parte `parte` (1..total) de um arquivo de `tamanho` bytes."""
+    return (parte - 1) * tamanho // total, parte * tamanho // total
+
+
+def texto_da_linha(linha, colunas):
+    """
+    Texto de uma linha JSONL: o primeiro campo existente entre `colunas` ('' se nenhum).
+
+    Raises:
+        ValueError: Se a linha não for um objeto JSON
+    """
+    registro = json.loads(linha)
+    if not isinstance(registro, dict):
+        raise ValueError('Linha JSONL não é um objeto')
+    for coluna in colunas:
+        valor = registro.get(coluna)
+        if valor is not None:
+            return str(valor)
+    return ''
+
+
+class IndiceLinhas:
+    """Offsets de início das linhas não vazias de um arquivo."""
+
+    def __init__(self, caminho, inicios, tamanho, mtime_ns):
+        self.caminho = caminho
+        self.inicios = inicios
+        self.tamanho = tamanho
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def construir(cls, caminho):
+        """Varre o arquivo (mmap) e registra onde cada linha não vazia começa."""
+        tamanho, mtime_ns = identidade_arquivo(caminho)
+        inicios = array('Q')
+        if tamanho:
+            with open(caminho, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                posicao = 0
+                while posicao < tamanho:
+                    quebra = mapa.find(b'\n', posicao)
+                    final = tamanho if quebra < 0 else quebra
+                    if not _linha_vazia(mapa, posicao, final):
+                        inicios.append(posicao)
+                    posicao = final + 1
+        return cls(caminho, inicios, tamanho, mtime_ns)
+
+    @classmethod
+    def abrir(cls, caminho, cache=True):
+        """
+        Índice do arquivo, lido de `<arquivo>.idx` se ainda for válido ou
+        construído (e gravado, com `cache`) se não.
+        """
+        arquivo_indice = caminho + EXTENSAO_INDICE
+        tamanho, mtime_ns = identidade_arquivo(caminho)
+        if cache and os.path.exists(arquivo_indice):
+            with open(arquivo_indice, 'rb') as f:
+                try:
+                    cabecalho = json.loads(f.readline())
+                    valido = (cabecalho['formato'], cabecalho['tamanho'], cabecalho['mtime_ns']) == (
+                        FORMATO_INDICE, tamanho, mtime_ns
+                    )
+                    if valido:
+                        inicios = array('Q')
+                        inicios.fromfile(f, cabecalho['linhas'])
+                        return cls(caminho, inicios, tamanho, mtime_ns)
+                except (ValueError, KeyError, EOFError):
+                    pass  # Índice corrompido ou de outro formato: reconstrói
+
+        indice = cls.construir(caminho)
+        if cache:
+            indice.gravar(arquivo_indice)
+        return indice
+
+    def gravar(self, arquivo_indice):
+        """Grava o índice de forma atômica: cabeçalho JSON + offsets binários."""
+        cabecalho = {
+            'formato': FORMATO_INDICE,
+            'tamanho': self.tamanho,
+            'mtime_ns': self.mtime_ns,
+            'linhas': len(self.inicios),
+        }
+        diretorio = os.path.dirname(arquivo_indice) or '.'
+        fd, temporario = tempfile.mkstemp(dir=diretorio, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(cabecalho).encode('utf-8') + b'\n')
+                self.inicios.tofile(f)
+            os.replace(temporario, arquivo_indice)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def offset(self, linha):
+        """Byte em que a linha começa; `len(self)` dá o fim do arquivo."""
+        if linha >= len(self.inicios):
+            return self.tamanho
+        return self.inicios[linha]
+
+    def linha_do_offset(self, offset):
+        """Número da primeira linha que começa em `offset` ou depois."""
+        return bisect_left(self.inicios, offset)
+
+    def ler(self, inicio=0, fim=None):
+        """Gera (número da linha, offset, bytes) das linhas [inicio, fim)."""
+        fim = len(self) if fim is None else min(fim, len(self))
+        numero = inicio
+        for offset, linha in linhas_no_intervalo(self.caminho, self.offset(inicio), self.offset(fim)):
+            yield numero, offset, linha
+            numero += 1
@@ -0,0 +1,326 @@
+import json
+import os
+import socket
+import multiprocessing
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import JobClassificacao, ResultadoJob
+
+
+COLUNAS_TEXTO = ['texto', 'Texto Mascarado', 'text']
+EXTENSOES_ACEITAS = ('.csv', '.xlsx', '.jsonl')
+
+
+def diretorio_jobs():
+    """Diretório onde os arquivos enviados para os jobs são guardados."""
+    return getattr(settings, 'CLASSIFICACAO_JOBS_DIR', os.path.join(settings.BASE_DIR, 'jobs'))
+
+
+def submeter_job(arquivo, threshold=0.35, tamanho_chunk=1000):
+    """
+    Grava o arquivo enviado e cria um job pendente na fila.
+
+    Args:
+        arquivo: UploadedFile do Django (ou qualquer objeto com .name e .chunks())
+        threshold (float): Limiar ML usado na classificação
+        tamanho_chunk (int): Linhas por lote confirmado no banco
+
+    Returns:
+        JobClassificacao: Job criado
+    """
+    extensao = os.path.splitext(arquivo.name)[1].lower()
+    if extensao not in EXTENSOES_ACEITAS:
+        raise ValueError(f'Formato não suportado: {extensao} (use {", ".join(EXTENSOES_ACEITAS)})')
+
+    job = JobClassificacao(
+        nome_original=arquivo.name,
+        threshold=threshold,
+        tamanho_chunk=tamanho_chunk,
+    )
+    os.makedirs(diretorio_jobs(), exist_ok=True)
+    job.arquivo = os.path.join(diretorio_jobs(), f'{job.id}{extensao}')
+
+    with open(job.arquivo, 'wb') as destino:
+        for bloco in arquivo.chunks():
+            destino.write(bloco)
+
+    job.save()
+    return job
+
+
+def ler_textos(caminho, colunas=None):
+    """
+    Lê a coluna de texto de um arquivo .csv, .xlsx ou .jsonl.
+
+    Usa a primeira coluna existente entre `colunas` (padrão: COLUNAS_TEXTO).
+    """
+    colunas = colunas or COLUNAS_TEXTO
+    import pandas as pd
+
+    if caminho.endswith('.csv'):
+        df = pd.read_csv(caminho)
+    elif caminho.endswith('.jsonl'):
+        df = pd.read_json(caminho, lines=True)
+    else:
+        df = pd.read_excel(caminho)
+
+    for coluna in colunas:
+        if coluna in df.columns:
+            return df[coluna].fillna('').astype(str).tolist()
+
+    raise ValueError(f'Coluna de texto não encontrada (esperado uma de: {", ".join(colunas)})')
+
+
+def reivindicar_job(worker, timeout_segundos=300):
+    """
+    Reivindica o próximo job da fila para este worker.
+
+    Jobs 'processando' sem atualização há mais de `timeout_segundos` são
+    considerados órfãos (worker caiu) e podem ser retomados.
+
+    Returns:
+        JobClassificacao ou None
+    """
+    limite = timezone.now() - timedelta(seconds=timeout_segundos)
+    candidatos = JobClassificacao.objects.filter(
+        Q(status=JobClassificacao.PENDENTE)
+        | Q(status=JobClassificacao.PROCESSANDO, atualizado_em__lt=limite)
+    ).order_by('criado_em')
+
+    for job in candidatos[:10]:
+        # Compare-and-set: só um worker consegue mudar o registro lido
+        with transaction.atomic():
+            reivindicado = JobClassificacao.objects.filter(
+                pk=job.pk, status=job.status, atualizado_em=job.atualizado_em,
+            ).update(
+                status=JobClassificacao.PROCESSANDO,
+                worker=worker,
+                atualizado_em=timezone.now(),
+            )
+        if reivindicado:
+            job.refresh_from_db()
+            return job
+
+    return None
+
+
+def _classificar_lote(args):
+    """
+    Executado nos processos do pool: classifica uma fatia de textos.
+
+    Com `grupos` (quase duplicatas), o ML roda uma vez por grupo. A versão
+    do modelo vem fixada pelo job: trocar o ATIVO no meio não mistura modelos.
+    """
+    from .detector import detect_personal_data, detectar_agrupando
+
+    textos, threshold, grupos, versao = args
+    if grupos is not None:
+        return detectar_agrupando(textos, threshold, modelo=versao, grupos=grupos)
+    return [detect_personal_data(texto, threshold, modelo=versao) for texto in textos]
+
+
+def _fatiar_por_grupo(indices, grupos, partes):
+    """
+    Divide os índices em `partes` fatias sem separar membros de um mesmo
+    grupo (maiores grupos primeiro, sempre na fatia mais leve).
+    """
+    membros = {}
+    for i in indices:
+        membros.setdefault(grupos[i], []).append(i)
+
+    fatias = [[] for _ in range(partes)]
+    for grupo in sorted(membros.values(), key=len, reverse=True):
+        min(fatias, key=len).extend(grupo)
+    return [sorted(fatia) for fatia in fatias if fatia]
+
+
+def criar_pool(processos):
+    """
+    Cria o pool de processos que classifica os lotes.
+
+    O modelo é carregado no processo pai antes do fork, de modo que os
+    filhos compartilham as páginas de memória do modelo já carregado.
+    """
+    from .ml_model import carregar_inferencia, get_model_version
+
+    if get_model_version() != 'sem-modelo':
+        carregar_inferencia()
+
+    # Conexões de banco não podem ser herdadas pelos filhos
+    connections.close_all()
+
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    return contexto.Pool(processes=processos)
+
+
+class _LeitorJsonl:
+    """Chunks de um .jsonl lidos direto do disco pelo índice de offsets de linha."""
+
+    def __init__(self, caminho):
+        from .indice_linhas import IndiceLinhas
+
+        self.indice = IndiceLinhas.abrir(caminho)
+        self.colunas = COLUNAS_TEXTO
+        if len(self.indice):
+            primeira = json.loads(next(self.indice.ler(0, 1))[2])
+            if not any(coluna in primeira for coluna in COLUNAS_TEXTO):
+                raise ValueError(f'Coluna de texto não encontrada (esperado uma de: {", ".join(COLUNAS_TEXTO)})')
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __call__(self, inicio, fim):
+        from .indice_linhas import texto_da_linha
+
+        return [texto_da_linha(linha, self.colunas) for _, _, linha in self.indice.ler(inicio, fim)]
+
+
+class _LeitorTabela:
+    def __init__(self, caminho):
+        self.textos = ler_textos(caminho)
+
+    def __len__(self):
+        return len(self.textos)
+
+    def __call__(self, inicio, fim):
+        return self.textos[inicio:fim]
+
+
+def _leitor_de_chunks(caminho):
+    """
+    Leitor de chunks do arquivo do job: .jsonl é lido só no trecho de cada
+    chunk (retomar um job não relê o arquivo desde o início); .csv e .xlsx
+    são carregados inteiros.
+    """
+    if caminho.endswith('.jsonl'):
+        return _LeitorJsonl(caminho)
+    return _LeitorTabela(caminho)
+
+
+def processar_job(job, pool=None, processos=1, agrupar=False):
+    """
+    Processa um job a partir do último chunk confirmado.
+
+    Cada chunk é classificado (em paralelo no pool, se fornecido) e gravado
+    junto com o avanço de `ultimo_chunk` em uma única transação. Com
+    `agrupar`, pedidos quase idênticos do chunk compartilham a predição ML.
+
+    Cada transação só confirma se o job ainda pertence a `job.worker`. Se
+    outro worker o reivindicou (este ficou parado além do timeout), o chunk
+    é desfeito e o processamento para. O job retornado mantém o status e o
+    worker do banco.
+    """
+    from .classification_store import (
+        BufferClassificacoes, buscar_classificacoes, hash_texto, resultado_de_registro
+    )
+    from .ml_model import get_model_version
+    from .regras_pii import versao_regras
+
+    ler_chunk = _leitor_de_chunks(job.arquivo)
+    total = len(ler_chunk)
+    tamanho = job.tamanho_chunk
+    versao = get_model_version()
+
+    JobClassificacao.objects.filter(pk=job.pk).update(total_linhas=total)
+    job.total_linhas = total
+
+    inicio_chunk = job.ultimo_chunk + 1
+    total_chunks = (total + tamanho - 1) // tamanho
+
+    for numero_chunk in range(inicio_chunk, total_chunks):
+        inicio = numero_chunk * tamanho
+        textos_chunk = ler_chunk(inicio, inicio + tamanho)
+
+        # Reaproveitar classificações já persistidas para esta versão do modelo e das regras
+        regras = versao_regras()
+        hashes = [hash_texto(texto) for texto in textos_chunk]
+        existentes = buscar_classificacoes(hashes, versao, regras)
+        pendentes = [i for i, h in enumerate(hashes) if h not in existentes]
+        textos_pendentes = [textos_chunk[i] for i in pendentes]
+
+        grupos = None
+        if agrupar:
+            from .quase_duplicatas import agrupar_textos
+
+            grupos = agrupar_textos(textos_pendentes)
+
+        if pool is not None and len(textos_pendentes) > 1:
+            if grupos is not None:
+                fatias = _fatiar_por_grupo(range(len(textos_pendentes)), grupos, processos)
+            else:
+                fatia = max(1, (len(textos_pendentes) + processos - 1) // processos)
+                fatias = [
+                    range(i, min(i + fatia, len(textos_pendentes)))
+                    for i in range(0, len(textos_pendentes), fatia)
+                ]
+            partes = [
+                (
+                    [textos_pendentes[i] for i in fatia],
+                    job.threshold,
+                    [grupos[i] for i in fatia] if grupos is not None else None,
+                    versao,
+                )
+                for fatia in fatias
+            ]
+            novos = [None] * len(textos_pendentes)
+            for fatia, parte in zip(fatias, pool.map(_classificar_lote, partes)):
+                for i, resultado in zip(fatia, parte):
+                    novos[i] = resultado
+        else:
+            novos = _classificar_lote((textos_pendentes, job.threshold, grupos, versao))
+
+        resultados = [None] * len(textos_chunk)
+        for i, resultado in zip(pendentes, novos):
+            resultados[i] = resultado
+        for i, texto_hash in enumerate(hashes):
+            if resultados[i] is None:
+                resultados[i] = resultado_de_registro(existentes[texto_hash], job.threshold)
+
+        linhas = [
+            ResultadoJob(
+                job_id=job.pk,
+                linha=inicio + i,
+                contem_dados_pessoais=bool(r['contem_dados_pessoais']),
+                metodo=r['metodo'],
+                tipos_detectados=list(r['tipos_detectados']),
+                confianca=float(r['confianca']),
+            )
+            for i, r in enumerate(resultados)
+        ]
+
+        with transaction.atomic():
+            # Apaga resquícios de um chunk interrompido antes de regravar
+            ResultadoJob.objects.filter(job_id=job.pk, linha__gte=inicio).delete()
+            ResultadoJob.objects.bulk_create(linhas, batch_size=500)
+            with BufferClassificacoes(versao, regras) as buffer:
+                for i, resultado in zip(pendentes, novos):
+                    buffer.adicionar(hashes[i], resultado)
+            confirmado = JobClassificacao.objects.filter(pk=job.pk, worker=job.worker).update(
+                ultimo_chunk=numero_chunk,
+                linhas_processadas=inicio + len(textos_chunk),
+                atualizado_em=timezone.now(),
+            )
+            if not confirmado:
+                transaction.set_rollback(True)
+        if not confirmado:
+            # Job perdido para outro worker: ele retoma do último chunk confirmado
+            job.refresh_from_db()
+            return job
+
+    JobClassificacao.objects.filter(pk=job.pk, worker=job.worker).update(
+        status=JobClassificacao.CONCLUIDO,
+        linhas_processadas=total,
+        atualizado_em=timezone.now(),
+        concluido_em=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def identificador_worker():
+    """Identificador do worker: host e PID."""
+    return f'{socket.gethostname()}:{os.getpid()}'
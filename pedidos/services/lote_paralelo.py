@@ -0,0 +1,155 @@
+"""
+Detecção em lote usando vários núcleos.
+
+O regex e o pré-processamento rodam em Python puro e seguram o GIL: no
+CPython comum, threads não classificam dois textos ao mesmo tempo e só
+processos escalam (cada um com sua cópia do modelo, herdada por fork com
+copy-on-write, e os textos/resultados serializados entre eles). Num build
+free-threaded (3.13t+, `sys._is_gil_enabled()` falso) as threads rodam de
+fato em paralelo sobre o mesmo modelo, sem cópia nem serialização.
+
+O detector pode ser chamado de várias threads: o estado compartilhado
+(cache de modelos, registro de versões, contadores) fica atrás de locks e
+o resto é local a cada chamada. O modo 'auto' escolhe threads quando o GIL
+está desligado e processos quando não está.
+
+Os textos são divididos em fatias contíguas (algumas por worker, para
+equilibrar a carga) e os resultados voltam na ordem da entrada.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+AUTO = 'auto'
+THREADS = 'threads'
+PROCESSOS = 'processos'
+MODOS = (AUTO, THREADS, PROCESSOS)
+
+# Fatias por worker: mais fatias equilibram textos de custo desigual
+FATIAS_POR_WORKER = 4
+
+
+def gil_ativo():
+    """Se o interpretador roda com o GIL (sempre True antes do Python 3.13)."""
+    verificar = getattr(sys, '_is_gil_enabled', None)
+    return True if verificar is None else verificar()
+
+
+def resolver_modo(modo=AUTO):
+    """
+    Modo efetivo: 'auto' vira 'threads' sem GIL e 'processos' com GIL.
+
+    Raises:
+        ValueError: Se o modo for desconhecido
+    """
+    if modo not in MODOS:
+        raise ValueError(f'Modo desconhecido: {modo} (use {", ".join(MODOS)})')
+    if modo == AUTO:
+        return PROCESSOS if gil_ativo() else THREADS
+    return modo
+
+
+def fatiar(textos, workers):
+    """Divide `textos` em fatias contíguas, FATIAS_POR_WORKER por worker."""
+    tamanho = max(-(-len(textos) // (workers * FATIAS_POR_WORKER)), 1)
+    return [textos[i:i + tamanho] for i in range(0, len(textos), tamanho)]
+
+
+def _inicializar_processo():
+    # Processos criados por spawn (sem fork) começam sem o Django configurado
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _detectar_fatia(fatia, threshold, modelo, opcoes):
+    from .detector import batch_detect
+
+    return batch_detect(fatia, threshold, modelo=modelo, **opcoes)
+
+
+class ExecutorLotes:
+    """
+    Pool de workers reaproveitado entre lotes.
+
+    Uso:
+        with ExecutorLotes(workers=8) as executor:
+            for lote in lotes:
+                resultados = executor.detectar(lote)
+
+    Args:
+        workers (int): Threads ou processos (padrão: os.cpu_count())
+        modo (str): 'auto', 'threads' ou 'processos'
+        threshold (float): Limiar ML
+        modelo (str): Versão do modelo, fixada na criação (padrão: a ativa),
+            para que todas as fatias usem a mesma mesmo se ATIVO mudar
+        agrupar, tipos, early_exit: Repassados a batch_detect em cada fatia
+            (com `agrupar`, só textos da mesma fatia compartilham predição)
+    """
+
+    def __init__(self, workers=None, modo=AUTO, threshold=0.35, modelo=None, **opcoes):
+        from .ml_model import carregar_inferencia, get_model_version
+        from . import registro_modelos
+
+        self.workers = max(workers or os.cpu_count() or 1, 1)
+        self.modo = resolver_modo(modo)
+        self.threshold = threshold
+        self.modelo = modelo or get_model_version()
+        self.opcoes = opcoes
+
+        # Carregado antes de criar o pool: as threads compartilham o objeto
+        # e os processos criados por fork o herdam já carregado
+        if registro_modelos.existe(self.modelo):
+            carregar_inferencia(self.modelo)
+
+        if self.modo == THREADS:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='detector')
+        else:
+            import multiprocessing
+            from django.db import connections
+
+            # Conexões abertas não podem ser herdadas pelos filhos
+            connections.close_all()
+            metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(metodo),
+                initializer=_inicializar_processo,
+            )
+
+    def detectar(self, textos):
+        """Classifica `textos` nos workers; resultados na ordem da entrada."""
+        textos = list(textos)
+        if not textos:
+            return []
+        fatias = fatiar(textos, self.workers)
+        futuros = [
+            self._pool.submit(_detectar_fatia, fatia, self.threshold, self.modelo, self.opcoes)
+            for fatia in fatias
+        ]
+        return [resultado for futuro in futuros for resultado in futuro.result()]
+
+    def encerrar(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+        return False
+
+
+def detectar_em_paralelo(textos, threshold=0.35, workers=None, modo=AUTO, modelo=None, **opcoes):
+    """
+    Classifica um lote em paralelo (ver ExecutorLotes).
+
+    Returns:
+        list: Resultados de detect_personal_data, na ordem de `textos`
+    """
+    with ExecutorLotes(workers, modo, threshold, modelo, **opcoes) as executor:
+        return executor.detectar(textos)
@@ -0,0 +1,45 @@
+import os
+import sys
+
+
+def uso_memoria(pid='self'):
+    """
+    Retorna o uso de memória de um processo, em bytes.
+
+    No Linux lê /proc/<pid>/smaps_rollup:
+        rss: memória residente total
+        pss: residente proporcional (páginas compartilhadas divididas entre processos)
+        uss: memória exclusiva do processo (Private_Clean + Private_Dirty)
+        compartilhada: Shared_Clean + Shared_Dirty
+
+    Em outros sistemas retorna apenas o pico de RSS (getrusage), se for do
+    próprio processo, e nada onde não há getrusage (Windows).
+    """
+    caminho = f'/proc/{pid}/smaps_rollup'
+    if os.path.exists(caminho):
+        campos = {}
+        with open(caminho) as f:
+            for linha in f:
+                partes = linha.split()
+                if len(partes) >= 3 and partes[-1] == 'kB':
+                    campos[partes[0].rstrip(':')] = int(partes[1]) * 1024
+        return {
+            'rss': campos.get('Rss', 0),
+            'pss': campos.get('Pss', 0),
+            'uss': campos.get('Private_Clean', 0) + campos.get('Private_Dirty', 0),
+            'compartilhada': campos.get('Shared_Clean', 0) + campos.get('Shared_Dirty', 0),
+        }
+
+    if pid != 'self':
+        return {}
+    try:
+        import resource
+    except ImportError:
+        return {}
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta em bytes, Linux/BSD em KB
+    return {'rss': pico if sys.platform == 'darwin' else pico * 1024}
+
+
+def formatar_mb(valor):
+    return f'{valor / (1024 * 1024):.1f}'
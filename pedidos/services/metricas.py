@@ -0,0 +1,136 @@
+"""
+Métricas de classificação binária calculadas a partir de contadores.
+
+Equivalente ao `classification_report`/`f1_score` do scikit-learn para o
+caso binário, sem precisar das listas completas de rótulos em memória nem
+importar o scikit-learn.
+"""
+
+import random
+
+
+def _dividir(numerador, denominador):
+    return numerador / denominador if denominador else 0.0
+
+
+def _f1(precisao, recall):
+    return _dividir(2 * precisao * recall, precisao + recall)
+
+
+def percentil(valores_ordenados, p):
+    """Percentil `p` (0-100) de uma lista já ordenada, pelo valor mais próximo."""
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+class MatrizConfusao:
+    """Contadores de uma classificação binária (classe positiva = 1)."""
+
+    def __init__(self, vn=0, fp=0, fn=0, vp=0):
+        self.vn = vn
+        self.fp = fp
+        self.fn = fn
+        self.vp = vp
+
+    def adicionar(self, real, predito):
+        real = int(real)
+        predito = int(predito)
+        if real == 1:
+            if predito == 1:
+                self.vp += 1
+            else:
+                self.fn += 1
+        elif predito == 1:
+            self.fp += 1
+        else:
+            self.vn += 1
+
+    @property
+    def total(self):
+        return self.vn + self.fp + self.fn + self.vp
+
+    def precisao(self):
+        return _dividir(self.vp, self.vp + self.fp)
+
+    def recall(self):
+        return _dividir(self.vp, self.vp + self.fn)
+
+    def f1(self):
+        return _f1(self.precisao(), self.recall())
+
+    def acuracia(self):
+        return _dividir(self.vp + self.vn, self.total)
+
+    def somar(self, outra):
+        """Acumula os contadores de outra matriz (ex.: de outro shard)."""
+        self.vn += outra.vn
+        self.fp += outra.fp
+        self.fn += outra.fn
+        self.vp += outra.vp
+        return self
+
+    def como_dict(self):
+        return {'vn': self.vn, 'fp': self.fp, 'fn': self.fn, 'vp': self.vp}
+
+    @classmethod
+    def de_dict(cls, contadores):
+        return cls(**{chave: int(contadores.get(chave, 0)) for chave in ('vn', 'fp', 'fn', 'vp')})
+
+    def como_lista(self):
+        """Matriz no formato do sklearn: [[VN, FP], [FN, VP]]."""
+        return [[self.vn, self.fp], [self.fn, self.vp]]
+
+    def relatorio(self, target_names=('0', '1'), digits=4):
+        """Texto no mesmo formato do `classification_report` do scikit-learn."""
+        # Métricas por classe: classe 0 trata VN como "verdadeiro positivo"
+        classe_0 = (_dividir(self.vn, self.vn + self.fn), _dividir(self.vn, self.vn + self.fp))
+        classe_1 = (self.precisao(), self.recall())
+        suporte = (self.vn + self.fp, self.fn + self.vp)
+
+        linhas = []
+        for nome, (p, r), s in zip(target_names, (classe_0, classe_1), suporte):
+            linhas.append((nome, p, r, _f1(p, r), s))
+
+        headers = ['precision', 'recall', 'f1-score', 'support']
+        width = max(max(len(nome) for nome in target_names), len('weighted avg'), digits)
+        head_fmt = '{:>{width}s} ' + ' {:>9}' * len(headers)
+        row_fmt = '{:>{width}s} ' + ' {:>9.{digits}f}' * 3 + ' {:>9}\n'
+
+        report = head_fmt.format('', *headers, width=width) + '\n\n'
+        for linha in linhas:
+            report += row_fmt.format(*linha, width=width, digits=digits)
+        report += '\n'
+
+        total = self.total
+        report += ('{:>{width}s} ' + ' {:>9.{digits}}' * 2 + ' {:>9.{digits}f}' + ' {:>9}\n').format(
+            'accuracy', '', '', self.acuracia(), total, width=width, digits=digits
+        )
+        macro = [sum(linha[i] for linha in linhas) / 2 for i in (1, 2, 3)]
+        report += row_fmt.format('macro avg', *macro, total, width=width, digits=digits)
+        ponderada = [_dividir(sum(linha[i] * linha[4] for linha in linhas), total) for i in (1, 2, 3)]
+        report += row_fmt.format('weighted avg', *ponderada, total, width=width, digits=digits)
+        return report
+
+
+class AmostraReservatorio:
+    """
+    Amostra uniforme de até `capacidade` itens de um fluxo de tamanho
+    desconhecido (algoritmo R), com memória fixa.
+    """
+
+    def __init__(self, capacidade, semente=0):
+        self.capacidade = capacidade
+        self.vistos = 0
+        self.itens = []
+        self._aleatorio = random.Random(semente)
+
+    def adicionar(self, item):
+        self.vistos += 1
+        if len(self.itens) < self.capacidade:
+            self.itens.append(item)
+            return
+        posicao = self._aleatorio.randrange(self.vistos)
+        if posicao < self.capacidade:
+            self.itens[posicao] = item
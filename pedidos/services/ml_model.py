@@ -1,97 +1,316 @@
-import joblib
+"""
+Inferência do modelo ML (camada usada pela API e pelos comandos em lote).
+
+O treinamento fica em treinamento.py. Imports pesados (joblib, NumPy,
+SciPy, scikit-learn) são adiados até o primeiro uso do modelo, para que
+iniciar a API ou rodar apenas o regex não pague esse custo.
+
+Várias versões (registro_modelos.py) podem ficar carregadas ao mesmo
+tempo; as menos usadas recentemente são descartadas quando o tamanho
+estimado ultrapassa ML_CACHE_MODELOS_MB.
+"""
+
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import VotingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.model_selection import cross_val_score
-import numpy as np
+import threading
+from collections import Counter, OrderedDict
+from . import registro_modelos
+from .preprocessing import analisar_texto
+
+
+# Caminhos do layout legado (um único modelo em ml/)
+MODELO_PATH = registro_modelos.CAMINHOS_LEGADO['modelo']
+VECTORIZER_PATH = registro_modelos.CAMINHOS_LEGADO['vectorizer']
+VOCABULARIO_PATH = registro_modelos.CAMINHOS_LEGADO['vocabulario']
+
+LIMITE_CACHE_PADRAO_MB = 512
+
+# Ordem da cascata: estimadores mais baratos primeiro (NB e LR são um
+# produto esparso; a RandomForest percorre 100 árvores)
+ORDEM_CASCATA = ('nb', 'lr', 'rf')
+
+
+def get_model_version():
+    """
+    Retorna a versão ativa do modelo (hash dos arquivos .pkl).
+
+    Retorna 'sem-modelo' se não houver modelo treinado.
+    """
+    return registro_modelos.versao_ativa()
+
+
+def cascata_padrao():
+    """Se a inferência em cascata está ligada por padrão (settings.ML_CASCATA)."""
+    from django.conf import settings
 
+    return bool(settings.configured and getattr(settings, 'ML_CASCATA', False))
 
-# Lista de stopwords em português (palavras comuns que podem ser removidas)
-STOPWORDS_PT = [
-    'a', 'o', 'e', 'de', 'da', 'do', 'em', 'um', 'uma', 'os', 'as', 'dos', 'das',
-    'para', 'com', 'por', 'no', 'na', 'ao', 'aos', 'à', 'às', 'é', 'que', 'se',
-    'como', 'mais', 'foi', 'tem', 'são', 'essa', 'esse', 'isso', 'esta', 'este',
-    'muito', 'já', 'também', 'só', 'pelo', 'pela', 'ou', 'quando', 'mesmo', 'sem'
-]
 
+def limite_cache_bytes():
+    """Limite de memória dos modelos carregados (settings.ML_CACHE_MODELOS_MB)."""
+    from django.conf import settings
 
-def train_model(texts, labels):
+    mb = LIMITE_CACHE_PADRAO_MB
+    if settings.configured:
+        mb = getattr(settings, 'ML_CACHE_MODELOS_MB', mb)
+    return int(mb * 1024 * 1024)
+
+
+class CacheModelos:
     """
-    Treina um modelo ensemble para detecção de dados pessoais.
-    
-    Args:
-        texts (list): Lista de textos
-        labels (list): Lista de labels (0 ou 1)
+    Artefatos carregados por versão, com descarte LRU limitado por memória.
+
+    O tamanho de cada versão é estimado pelo tamanho em disco dos
+    artefatos carregados (o pickle de um ensemble ocupa em memória algo
+    próximo do arquivo). A versão ativa nunca é descartada.
     """
-    print("\n" + "="*60)
-    print("TREINANDO MODELO ML")
-    print("="*60)
-    
-    # Vetorização TF-IDF
-    print("\n1. Vetorizando textos (TF-IDF)...")
-    vectorizer = TfidfVectorizer(
-        max_features=5000,
-        ngram_range=(1, 3),
-        min_df=2,
-        stop_words=STOPWORDS_PT  # ← CORREÇÃO AQUI
-    )
-    X = vectorizer.fit_transform(texts)
-    y = np.array(labels)
-    
-    print(f"   Dimensão do vetor: {X.shape}")
-    print(f"   Total de features: {len(vectorizer.get_feature_names_out())}")
-    
-    # Criar ensemble de classificadores
-    print("\n2. Criando ensemble de classificadores...")
-    clf1 = LogisticRegression(max_iter=1000, random_state=42)
-    clf2 = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf3 = MultinomialNB()
-    
-    modelo = VotingClassifier(
-        estimators=[
-            ('lr', clf1),
-            ('rf', clf2),
-            ('nb', clf3)
-        ],
-        voting='soft'
-    )
-    
-    # Validação cruzada
-    print("\n3. Validação cruzada (5 folds)...")
-    scores = cross_val_score(modelo, X, y, cv=5, scoring='f1')
-    print(f"   F1-Score por fold: {scores}")
-    print(f"   F1-Score médio: {scores.mean():.4f} (+/- {scores.std():.4f})")
-    
-    # Treinar modelo final
-    print("\n4. Treinando modelo final...")
-    modelo.fit(X, y)
-    
-    # Salvar modelo e vectorizer
-    os.makedirs('ml', exist_ok=True)
-    joblib.dump(modelo, 'ml/modelo.pkl')
-    joblib.dump(vectorizer, 'ml/vectorizer.pkl')
-    
-    print("\n✓ Modelo salvo em: ml/modelo.pkl")
-    print("✓ Vectorizer salvo em: ml/vectorizer.pkl")
-    print("\n" + "="*60)
-
-
-def predict(text):
+
+    def __init__(self):
+        self._versoes = OrderedDict()
+        self._lock = threading.RLock()
+        # (versao, nome) -> Lock de quem está carregando esse artefato
+        self._carregando = {}
+
+    def artefatos(self, versao):
+        """Dicionário de artefatos da versão (marcado como usado mais recentemente)."""
+        with self._lock:
+            if versao not in self._versoes:
+                self._versoes[versao] = {'_bytes': {}}
+            self._versoes.move_to_end(versao)
+            return self._versoes[versao]
+
+    def obter(self, versao, nome, carregar, caminho=None):
+        """
+        Retorna o artefato `nome`, carregando-o (e contabilizando seu tamanho) se preciso.
+
+        O carregamento roda fora do lock geral: carregar um modelo candidato
+        em segundo plano não bloqueia as requisições que usam a versão
+        ativa. Threads que pedem o mesmo artefato ao mesmo tempo esperam a
+        primeira carga em vez de carregar cada uma a sua cópia.
+        """
+        chave = (versao, nome)
+        with self._lock:
+            artefatos = self.artefatos(versao)
+            if nome in artefatos:
+                return artefatos[nome]
+            carga = self._carregando.setdefault(chave, threading.Lock())
+
+        with carga:
+            with self._lock:
+                artefatos = self.artefatos(versao)
+                # Outra thread terminou de carregar enquanto esta esperava
+                if nome in artefatos:
+                    return artefatos[nome]
+
+            carregado = carregar()
+
+            with self._lock:
+                artefatos = self.artefatos(versao)
+                artefatos[nome] = carregado
+                if caminho and os.path.exists(caminho):
+                    artefatos['_bytes'][nome] = os.path.getsize(caminho)
+                self._carregando.pop(chave, None)
+                self._descartar(preservar=versao)
+                return artefatos[nome]
+
+    def _descartar(self, preservar):
+        limite = limite_cache_bytes()
+        protegidas = {preservar, get_model_version()}
+        for versao in list(self._versoes):
+            if self.total_bytes() <= limite:
+                break
+            if versao not in protegidas:
+                del self._versoes[versao]
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(sum(a['_bytes'].values()) for a in self._versoes.values())
+
+    def versoes(self):
+        """[(versao, bytes estimados)] da menos para a mais recentemente usada."""
+        with self._lock:
+            return [(v, sum(a['_bytes'].values())) for v, a in self._versoes.items()]
+
+    def limpar(self):
+        with self._lock:
+            self._versoes.clear()
+            self._carregando.clear()
+
+
+cache_modelos = CacheModelos()
+
+
+def _resolver(versao):
+    return registro_modelos.resolver_versao(versao)
+
+
+def _estimador(versao, caminhos):
+    def carregar():
+        import joblib
+
+        return joblib.load(caminhos['modelo'])
+
+    return cache_modelos.obter(versao, 'modelo', carregar, caminhos['modelo'])
+
+
+def carregar_modelo(versao=None):
+    """
+    Carrega (modelo, vectorizer) de uma versão (padrão: a ativa).
+
+    Cada versão é carregada uma única vez por processo enquanto estiver no
+    cache. Chamado antes de um fork, os processos filhos herdam os objetos
+    já carregados.
+
+    Raises:
+        ValueError: Se a versão não estiver registrada
+    """
+    versao = _resolver(versao)
+    caminhos = registro_modelos.caminhos_versao(versao)
+
+    def carregar():
+        import joblib
+
+        return joblib.load(caminhos['vectorizer'])
+
+    vectorizer = cache_modelos.obter(versao, 'vectorizer', carregar, caminhos['vectorizer'])
+    return _estimador(versao, caminhos), vectorizer
+
+
+def carregar_vetorizador_compacto(versao, caminho=None):
+    """
+    Abre o vocabulário compacto (mmap) se existir e corresponder à versão
+    informada. Retorna None caso contrário.
+    """
+    from .fast_vectorizer import VetorizadorRapido
+    from .vocabulario import VocabularioCompacto
+
+    if caminho is None:
+        caminho = registro_modelos.caminhos_versao(versao)['vocabulario']
+    if not os.path.exists(caminho):
+        return None
+    try:
+        vocabulario = VocabularioCompacto(caminho)
+        if vocabulario.versao_modelo != versao:
+            return None
+        return VetorizadorRapido(vocabulario)
+    except ValueError:
+        return None
+
+
+def carregar_inferencia(versao=None):
+    """
+    Carrega (modelo, transformar) para servir predições de uma versão.
+
+    `transformar(texto)` usa o vocabulário compacto mapeado em memória
+    quando disponível (sem carregar o vectorizer.pkl), senão um
+    VetorizadorRapido construído do vectorizer, e por último o
+    `transform` do próprio scikit-learn.
+
+    Raises:
+        ValueError: Se a versão não estiver registrada
+    """
+    versao = _resolver(versao)
+    caminhos = registro_modelos.caminhos_versao(versao)
+
+    def carregar():
+        rapido = carregar_vetorizador_compacto(versao, caminhos['vocabulario'])
+        if rapido is not None:
+            return rapido.transform
+
+        from .fast_vectorizer import VetorizadorRapido
+
+        _, vectorizer = carregar_modelo(versao)
+        try:
+            return VetorizadorRapido(vectorizer).transform
+        except ValueError:
+            return lambda text: vectorizer.transform([analisar_texto(text).original])
+
+    transformar = cache_modelos.obter(versao, 'transformar', carregar, caminhos['vocabulario'])
+    return _estimador(versao, caminhos), transformar
+
+
+def predict(text, versao=None):
     """Prediz se texto contém dados pessoais (retorna 0 ou 1)."""
-    modelo = joblib.load('ml/modelo.pkl')
-    vectorizer = joblib.load('ml/vectorizer.pkl')
-    
-    X = vectorizer.transform([text])
+    modelo, transformar = carregar_inferencia(versao)
+
+    X = transformar(text)
     return modelo.predict(X)[0]
 
 
-def predict_proba(text):
-    """Retorna probabilidade de conter dados pessoais (0.0 a 1.0)."""
-    modelo = joblib.load('ml/modelo.pkl')
-    vectorizer = joblib.load('ml/vectorizer.pkl')
-    
-    X = vectorizer.transform([text])
-    return modelo.predict_proba(X)[0][1]  # Probabilidade da classe 1
\ No newline at end of file
+def predict_proba(text, versao=None):
+    """
+    Retorna probabilidade de conter dados pessoais (0.0 a 1.0).
+
+    Aceita str ou TextoAnalisado (reaproveita o pré-processamento do regex).
+    """
+    modelo, transformar = carregar_inferencia(versao)
+
+    X = transformar(text)
+    return modelo.predict_proba(X)[0][1]  # Probabilidade da classe 1
+
+
+_saidas_cascata = Counter()
+_saidas_lock = threading.Lock()
+
+
+def _estagios_cascata(modelo):
+    """[(nome, estimador, peso)] do VotingClassifier, do mais barato ao mais caro."""
+    pesos = modelo.weights or [1.0] * len(modelo.estimators)
+    estagios = [
+        (nome, estimador, float(peso))
+        for (nome, _), estimador, peso in zip(modelo.estimators, modelo.estimators_, pesos)
+        if peso
+    ]
+    ordem = {nome: i for i, nome in enumerate(ORDEM_CASCATA)}
+    return sorted(estagios, key=lambda estagio: ordem.get(estagio[0], len(ordem)))
+
+
+def predict_proba_cascata(text, threshold, versao=None):
+    """
+    Votação soft em cascata: avalia os estimadores do mais barato ao mais
+    caro e para assim que os restantes não conseguem mais mudar o lado do
+    `threshold` em que a média ponderada vai cair.
+
+    Com pesos w_i e soma parcial S dos avaliados, a probabilidade final
+    fica em [S / W, (S + R) / W], onde R é o peso dos que faltam. A decisão
+    é sempre a mesma do ensemble completo; a probabilidade retornada numa
+    saída antecipada é a média dos avaliados, limitada a esse intervalo.
+
+    Returns:
+        tuple: (probabilidade da classe 1, nome do último estimador avaliado,
+            se saiu antes de avaliar todos)
+    """
+    versao = _resolver(versao)
+    modelo, transformar = carregar_inferencia(versao)
+    X = transformar(text)
+
+    estagios = cache_modelos.obter(versao, 'estagios_cascata', lambda: _estagios_cascata(modelo))
+    peso_total = sum(peso for _, _, peso in estagios)
+    restante = peso_total
+    soma = 0.0
+
+    for nome, estimador, peso in estagios:
+        soma += peso * estimador.predict_proba(X)[0][1]
+        restante -= peso
+        minimo = soma / peso_total
+        maximo = (soma + restante) / peso_total
+        if restante <= 0 or minimo >= threshold or maximo < threshold:
+            break
+
+    with _saidas_lock:
+        _saidas_cascata[nome] += 1
+
+    if restante <= 0:
+        return soma / peso_total, nome, False
+    media_avaliados = soma / (peso_total - restante)
+    return min(max(media_avaliados, minimo), maximo), nome, True
+
+
+def get_cascade_stats():
+    """Contagem de predições por estágio de saída da cascata ({'nb': n, 'lr': n, 'rf': n})."""
+    with _saidas_lock:
+        return dict(_saidas_cascata)
+
+
+def reset_cascade_stats():
+    with _saidas_lock:
+        _saidas_cascata.clear()
@@ -0,0 +1,303 @@
+"""
+Orçamento de memória dos componentes do serviço.
+
+Cada componente é carregado sozinho num processo Python novo, que mede a
+memória residente (RSS) e o heap Python (tracemalloc) antes e depois da
+carga. Assim o custo de um componente não se mistura com o que outro já
+deixou carregado. As bibliotecas de ML são importadas antes da medição do
+vectorizer e de cada estimador e medidas à parte, como um componente
+próprio; os estimadores do VotingClassifier são gravados um a um num
+diretório temporário para que cada processo carregue só o seu.
+
+As alocações por requisição são medidas num processo com o modelo
+carregado e aquecido: para cada texto, o pico do tracemalloc acima do que
+já estava alocado (memória transitória) e a diferença entre snapshots
+antes e depois (memória retida, que deveria ficar perto de zero).
+"""
+
+import gc
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from .memoria import uso_memoria
+from .metricas import percentil
+
+
+FORMATO_RELATORIO = 1
+
+# Importadas antes de medir vectorizer e estimadores (e medidas juntas em 'bibliotecas_ml')
+BIBLIOTECAS_ML = [
+    'numpy',
+    'scipy.sparse',
+    'joblib',
+    'sklearn.feature_extraction.text',
+    'sklearn.linear_model',
+    'sklearn.naive_bayes',
+    'sklearn.ensemble',
+]
+
+# Texto sem dados pessoais: passa por todas as regras do regex e pelo ML
+PARAGRAFO_GRANDE = (
+    'Prezados, boa tarde! Venho por meio deste solicitar a relação de servidores lotados na '
+    'administração regional, com os respectivos cargos e a carga horária semanal de cada um, '
+    'bem como a escala de atendimento ao público durante o mês de dezembro. '
+)
+
+_CODIGO_FILHO = 'from pedidos.services.perfil_memoria import executar_filho; executar_filho()'
+
+
+def _importar_bibliotecas_ml():
+    for nome in BIBLIOTECAS_ML:
+        importlib.import_module(nome)
+
+
+def _medir_carga(carregar):
+    """RSS e heap alocados por `carregar()`, descontada a memória do próprio tracemalloc."""
+    gc.collect()
+    rss_antes = uso_memoria().get('rss', 0)
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    objeto = carregar()
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    heap, pico = tracemalloc.get_traced_memory()
+    sobrecarga = tracemalloc.get_tracemalloc_memory()
+    rss_depois = uso_memoria().get('rss', 0)
+    tracemalloc.stop()
+    del objeto
+    return {
+        'rss': max(rss_depois - rss_antes - sobrecarga, 0),
+        'heap': heap,
+        'pico_heap': pico,
+        'segundos': round(segundos, 3),
+    }
+
+
+def _carregar_django():
+    import django
+    from django.conf import settings
+
+    django.setup()
+    return importlib.import_module(settings.ROOT_URLCONF)
+
+
+def _carregar_regex():
+    from . import regex_rules
+    from .warmup import TEXTOS_AQUECIMENTO
+
+    # Os padrões são compilados no import; a passada preenche o que é preguiçoso
+    for texto in TEXTOS_AQUECIMENTO:
+        regex_rules.detect_personal_data_regex(texto)
+    return regex_rules
+
+
+def _carregar_joblib(caminho):
+    import joblib
+
+    return joblib.load(caminho)
+
+
+def _arquivo_curto(caminho):
+    # pedidos/services/x.py para o projeto, sklearn/... para bibliotecas instaladas
+    if 'site-packages' in caminho:
+        return caminho.split('site-packages' + os.sep)[-1]
+    return os.path.relpath(caminho)
+
+
+def _alocacoes_requisicao(detectar, textos, repeticoes=1):
+    """Pico transitório e memória retida por chamada de `detectar`, com tracemalloc já ligado."""
+    picos, retidos = [], []
+    locais = Counter()
+    filtro = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    for texto in textos:
+        for _ in range(repeticoes):
+            gc.collect()
+            antes = tracemalloc.take_snapshot().filter_traces(filtro)
+            atual, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            resultado = detectar(texto)
+            _, pico = tracemalloc.get_traced_memory()
+            del resultado
+            gc.collect()
+            depois = tracemalloc.take_snapshot().filter_traces(filtro)
+            diferencas = depois.compare_to(antes, 'lineno')
+            picos.append(pico - atual)
+            retidos.append(sum(d.size_diff for d in diferencas))
+            for d in diferencas:
+                if d.size_diff > 0:
+                    quadro = d.traceback[0]
+                    locais[f'{_arquivo_curto(quadro.filename)}:{quadro.lineno}'] += d.size_diff
+            del antes, depois, diferencas
+    ordenados = sorted(picos)
+    return {
+        'textos': len(textos),
+        'chamadas': len(picos),
+        'bytes_medio': round(sum(len(t.encode('utf-8')) for t in textos) / max(len(textos), 1)),
+        'pico_p50': percentil(ordenados, 50),
+        'pico_p95': percentil(ordenados, 95),
+        'pico_max': max(picos),
+        'retido_total': sum(retidos),
+        'maiores_retencoes': [{'local': local, 'bytes': total} for local, total in locais.most_common(5)],
+    }
+
+
+def _medir_requisicoes(caminho_config):
+    import django
+
+    with open(caminho_config, encoding='utf-8') as f:
+        config = json.load(f)
+    django.setup()
+    from .detector import detect_personal_data
+    from .warmup import aquecer
+
+    aquecer()
+
+    def detectar(texto):
+        return detect_personal_data(texto, modelo=config['versao'])
+
+    tracemalloc.start()
+    try:
+        return {
+            categoria: _alocacoes_requisicao(detectar, config['textos'][categoria], config['repeticoes'][categoria])
+            for categoria in config['textos']
+        }
+    finally:
+        tracemalloc.stop()
+
+
+def executar_filho():
+    """Ponto de entrada do processo filho: mede um componente e escreve o JSON no stdout."""
+    componente, argumento = sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None
+    if componente == 'requisicoes':
+        medida = _medir_requisicoes(argumento)
+    elif componente == 'django':
+        medida = _medir_carga(_carregar_django)
+    elif componente == 'regex':
+        medida = _medir_carga(_carregar_regex)
+    elif componente == 'bibliotecas_ml':
+        medida = _medir_carga(_importar_bibliotecas_ml)
+    else:
+        # vectorizer, ensemble e estimadores: só o objeto, sem o import das bibliotecas
+        _importar_bibliotecas_ml()
+        medida = _medir_carga(lambda: _carregar_joblib(argumento))
+    sys.stdout.write(json.dumps(medida) + '\n')
+
+
+def medir_componente(componente, argumento=None, timeout=600):
+    """
+    Mede um componente num processo Python novo.
+
+    Args:
+        componente (str): 'django', 'regex', 'bibliotecas_ml', 'vectorizer',
+            'estimador' ou 'ensemble' (os três últimos com o caminho do
+            arquivo joblib), ou 'requisicoes' (com o arquivo de configuração)
+
+    Raises:
+        RuntimeError: Se o processo filho falhar
+    """
+    from django.conf import settings
+
+    env = dict(os.environ, PYTHONPATH=str(settings.BASE_DIR), PYTHONWARNINGS='ignore')
+    comando = [sys.executable, '-c', _CODIGO_FILHO, componente] + ([argumento] if argumento else [])
+    processo = subprocess.run(
+        comando, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    if processo.returncode != 0:
+        erro = processo.stderr.strip().splitlines()
+        raise RuntimeError(f'Falha ao medir {componente}: {erro[-1] if erro else processo.returncode}')
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def gravar_estimadores(caminho_modelo, diretorio):
+    """
+    Grava cada estimador do VotingClassifier num arquivo próprio.
+
+    Returns:
+        list: (nome, caminho) de cada estimador; um modelo sem
+            `named_estimators_` não é decomposto (lista vazia)
+    """
+    import joblib
+
+    modelo = joblib.load(caminho_modelo)
+    estimadores = []
+    for nome, estimador in getattr(modelo, 'named_estimators_', {}).items():
+        caminho = os.path.join(diretorio, f'{nome}.pkl')
+        joblib.dump(estimador, caminho)
+        estimadores.append((nome, caminho))
+    return estimadores
+
+
+def textos_grandes(tamanho_bytes):
+    """Um texto de ~`tamanho_bytes` sem dados pessoais (pior caso: todas as regras e o ML)."""
+    repeticoes = max(tamanho_bytes // len(PARAGRAFO_GRANDE.encode('utf-8')), 1)
+    return [PARAGRAFO_GRANDE * repeticoes]
+
+
+def perfilar(textos_tipicos, versao=None, tamanho_grande=100 * 1024, repeticoes_grande=5, progresso=None):
+    """
+    Mede cada componente em um processo separado e as alocações por requisição.
+
+    Args:
+        textos_tipicos (list): Textos reais (amostra do dataset)
+        versao (str): Versão do modelo (padrão: a ativa). Sem modelo, só
+            Django e regex são medidos
+        tamanho_grande (int): Tamanho em bytes do texto grande
+        repeticoes_grande (int): Chamadas medidas com o texto grande
+        progresso: função(nome do componente, medida) chamada a cada medição
+
+    Returns:
+        dict: Relatório com 'componentes' e 'requisicoes' (bytes)
+    """
+    from . import registro_modelos
+
+    relatorio = {
+        'formato': FORMATO_RELATORIO,
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'versao_modelo': None,
+        'componentes': {},
+        'requisicoes': {},
+    }
+
+    def medir(nome, componente, argumento=None):
+        medida = medir_componente(componente, argumento)
+        relatorio['componentes'][nome] = medida
+        if progresso is not None:
+            progresso(nome, medida)
+
+    medir('django', 'django')
+    medir('regex', 'regex')
+
+    try:
+        versao = versao or registro_modelos.versao_ativa()
+        caminhos = registro_modelos.caminhos_versao(versao)
+    except ValueError:
+        caminhos = None
+    if caminhos is None or not os.path.exists(caminhos['modelo']):
+        return relatorio
+
+    relatorio['versao_modelo'] = versao
+    medir('bibliotecas_ml', 'bibliotecas_ml')
+    medir('vectorizer', 'vectorizer', caminhos['vectorizer'])
+    with tempfile.TemporaryDirectory(prefix='perfil-memoria-') as diretorio:
+        for nome, caminho in gravar_estimadores(caminhos['modelo'], diretorio):
+            medir(f'estimador_{nome}', 'estimador', caminho)
+        medir('ensemble', 'ensemble', caminhos['modelo'])
+
+        config = os.path.join(diretorio, 'requisicoes.json')
+        with open(config, 'w', encoding='utf-8') as f:
+            json.dump({
+                'versao': versao,
+                'textos': {'tipico': list(textos_tipicos), 'grande': textos_grandes(tamanho_grande)},
+                'repeticoes': {'tipico': 1, 'grande': repeticoes_grande},
+            }, f)
+        relatorio['requisicoes'] = medir_componente('requisicoes', config)
+    return relatorio
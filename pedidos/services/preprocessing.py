@@ -0,0 +1,62 @@
+import re
+import time
+
+
+# Mesmo padrão de token do TfidfVectorizer (padrão do scikit-learn)
+TOKEN_PATTERN = r'(?u)\b\w\w+\b'
+
+_DIGITOS_RE = re.compile(r'\d+')
+
+
+class TextoAnalisado:
+    """
+    Texto pré-processado uma única vez por requisição e compartilhado
+    entre a camada de regex e a camada de ML.
+
+    Atributos:
+        original (str): Texto como recebido
+        normalizado (str): Visão em minúsculas (mesma do TfidfVectorizer)
+        digitos (list): Posições (início, fim) das sequências de dígitos
+        tempos (dict): Tempo gasto em cada etapa, em segundos
+
+    Os tokens são calculados sob demanda e reaproveitados; suas posições
+    referem-se à visão `normalizado`.
+    """
+
+    def __init__(self, text):
+        inicio = time.perf_counter()
+        self.original = text if isinstance(text, str) else ''
+        self.normalizado = self.original.lower()
+        self.digitos = [m.span() for m in _DIGITOS_RE.finditer(self.original)]
+        self.tempos = {'normalizacao': time.perf_counter() - inicio}
+        self._tokens = {}
+
+    @property
+    def tem_digitos(self):
+        return bool(self.digitos)
+
+    def contem(self, *termos):
+        """Indica se algum dos termos (em minúsculas) aparece no texto."""
+        return any(termo in self.normalizado for termo in termos)
+
+    def tokens(self, token_pattern=TOKEN_PATTERN):
+        """Retorna a lista de (token, início, fim) da visão normalizada."""
+        if token_pattern not in self._tokens:
+            inicio = time.perf_counter()
+            self._tokens[token_pattern] = [
+                (m.group(), m.start(), m.end())
+                for m in re.finditer(token_pattern, self.normalizado)
+            ]
+            self.tempos['tokens'] = time.perf_counter() - inicio
+        return self._tokens[token_pattern]
+
+    def registrar_tempo(self, etapa, segundos):
+        """Registra o tempo de uma etapa externa (ex.: 'regex', 'ml')."""
+        self.tempos[etapa] = self.tempos.get(etapa, 0.0) + segundos
+
+
+def analisar_texto(text):
+    """Cria o TextoAnalisado de uma requisição (aceita um já analisado)."""
+    if isinstance(text, TextoAnalisado):
+        return text
+    return TextoAnalisado(text)
@@ -0,0 +1,156 @@
+"""
+Classificação de arquivos JSONL grandes com checkpoints e retomada.
+
+O arquivo é lido por faixa de bytes (services/indice_linhas.py) e cada
+resultado vira uma linha JSON na saída. A cada N registros a saída é
+sincronizada no disco (fsync) e um checkpoint é gravado de forma atômica
+com o offset do próximo byte a ler, as linhas processadas e o tamanho da
+saída até ali. Nessa ordem, o checkpoint nunca aponta além do que já está
+no disco.
+
+Na retomada, a saída é truncada no tamanho registrado (descarta o que foi
+escrito depois do último checkpoint) e a leitura começa direto no offset
+salvo, sem reler nada do que já foi processado. O checkpoint só vale para
+o mesmo arquivo (tamanho e data de modificação) e a mesma faixa.
+"""
+
+import json
+import os
+from .arquivos import escrever_atomico
+from .indice_linhas import identidade_arquivo, linhas_no_intervalo, texto_da_linha
+
+
+FORMATO_CHECKPOINT = 1
+A_CADA_PADRAO = 1000
+
+
+def caminho_checkpoint(saida):
+    return saida + '.checkpoint.json'
+
+
+def ler_checkpoint(caminho):
+    """Checkpoint gravado em `caminho`, ou None se não existir."""
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _linha_saida(numero, offset, resultado):
+    registro = {} if numero is None else {'linha': numero}
+    registro['offset'] = offset
+    registro.update(
+        (campo, resultado[campo])
+        for campo in ('contem_dados_pessoais', 'metodo', 'tipos_detectados', 'confianca')
+    )
+    return json.dumps(registro, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def processar_arquivo(entrada, saida, classificar, colunas, a_cada=A_CADA_PADRAO, retomar=False,
+                      inicio=0, fim=None, primeira_linha=0, checkpoint=None, progresso=None):
+    """
+    Classifica as linhas que começam em [inicio, fim) bytes de `entrada`.
+
+    Args:
+        classificar: função(lista de textos) -> lista de resultados do detector
+        colunas (list): Campos de texto procurados em cada linha JSON
+        a_cada (int): Registros entre checkpoints
+        retomar (bool): Continua do checkpoint, se houver um
+        primeira_linha (int): Número da linha em `inicio`, ou None se a faixa
+            foi escolhida por bytes e a numeração não é conhecida (a saída
+            traz só o offset)
+        checkpoint (str): Arquivo do checkpoint (padrão: `<saida>.checkpoint.json`)
+        progresso: função(checkpoint) chamada após cada checkpoint
+
+    Returns:
+        dict: Último checkpoint, com `retomado_de` (offset) se houve retomada
+
+    Raises:
+        ValueError: Se o checkpoint for de outro arquivo ou de outra faixa
+    """
+    checkpoint = checkpoint or caminho_checkpoint(saida)
+    tamanho, mtime_ns = identidade_arquivo(entrada)
+    fim = tamanho if fim is None else min(fim, tamanho)
+    estado = {
+        'formato': FORMATO_CHECKPOINT,
+        'entrada': os.path.abspath(entrada),
+        'tamanho': tamanho,
+        'mtime_ns': mtime_ns,
+        'inicio': inicio,
+        'fim': fim,
+        'primeira_linha': primeira_linha,
+        'offset': inicio,
+        'linha': primeira_linha,
+        'processadas': 0,
+        'invalidas': 0,
+        'saida_bytes': 0,
+        'concluido': False,
+    }
+
+    anterior = ler_checkpoint(checkpoint) if retomar else None
+    if anterior is not None:
+        for chave in ('formato', 'entrada', 'tamanho', 'mtime_ns', 'inicio', 'fim', 'primeira_linha'):
+            if anterior.get(chave) != estado[chave]:
+                raise ValueError(
+                    f'Checkpoint {checkpoint} não corresponde a esta execução '
+                    f'({chave}: {anterior.get(chave)!r} x {estado[chave]!r}); rode sem --resume'
+                )
+        estado = anterior
+        if estado['concluido']:
+            return dict(estado, retomado_de=estado['offset'])
+        arquivo = open(saida, 'r+b')
+        arquivo.truncate(estado['saida_bytes'])
+        arquivo.seek(estado['saida_bytes'])
+    else:
+        arquivo = open(saida, 'wb')
+    retomado_de = estado['offset'] if anterior is not None else None
+
+    def confirmar(lote, proximo):
+        validos = [texto for _, texto in lote if texto is not None]
+        resultados = iter(classificar(validos))
+        numero = estado['linha']
+        for offset, texto in lote:
+            if texto is None:
+                registro = {} if numero is None else {'linha': numero}
+                registro.update(offset=offset, erro='JSON inválido')
+                arquivo.write(json.dumps(registro, ensure_ascii=False).encode('utf-8') + b'\n')
+                estado['invalidas'] += 1
+            else:
+                arquivo.write(_linha_saida(numero, offset, next(resultados)))
+            if numero is not None:
+                numero += 1
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+
+        estado.update(
+            offset=proximo,
+            linha=numero,
+            processadas=estado['processadas'] + len(lote),
+            saida_bytes=arquivo.tell(),
+        )
+        escrever_atomico(checkpoint, json.dumps(estado, indent=2))
+        if progresso is not None:
+            progresso(estado)
+
+    with arquivo:
+        lote = []
+        proximo = estado['offset']
+        for offset, bruto in linhas_no_intervalo(entrada, estado['offset'], fim):
+            try:
+                texto = texto_da_linha(bruto, colunas)
+            except ValueError:
+                texto = None
+            lote.append((offset, texto))
+            proximo = offset + len(bruto) + 1
+            if len(lote) >= a_cada:
+                confirmar(lote, proximo)
+                lote = []
+        estado['concluido'] = True
+        if lote:
+            confirmar(lote, max(proximo, fim))
+        else:
+            # Último lote já confirmado: só marca o checkpoint como concluído
+            estado['offset'] = max(proximo, fim)
+            escrever_atomico(checkpoint, json.dumps(estado, indent=2))
+
+    return dict(estado, retomado_de=retomado_de)
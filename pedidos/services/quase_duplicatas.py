@@ -0,0 +1,142 @@
+"""
+Agrupamento de pedidos quase idênticos (MinHash + LSH).
+
+Muitos pedidos são modelos repetidos: cartas-formulário, campanhas, o
+mesmo pedido de LAI com outra data. O cache por hash exato não os pega.
+Aqui cada texto vira um conjunto de shingles (trigramas de palavras, com
+números normalizados), resumido por uma assinatura MinHash; textos cujas
+assinaturas coincidem em alguma banda do LSH e têm similaridade de
+Jaccard estimada acima do limiar caem no mesmo grupo.
+
+Os comandos em lote usam os grupos para chamar o ML uma vez por grupo; o
+regex continua rodando em todos os membros, porque os dados pessoais
+mudam de um pedido para outro.
+"""
+
+import re
+import threading
+import zlib
+from collections import Counter
+
+
+NUM_PERMUTACOES = 64
+# 16 bandas x 4 linhas: pares com Jaccard 0,8 viram candidatos com prob. > 99,9%
+BANDAS = 16
+LIMIAR_SIMILARIDADE = 0.8
+TAMANHO_SHINGLE = 3
+
+_PRIMO = (1 << 31) - 1
+_TOKEN_RE = re.compile(r'\w+')
+_NUMERO_RE = re.compile(r'\d+')
+
+_estatisticas = Counter()
+_estatisticas_lock = threading.Lock()
+
+
+def _coeficientes():
+    import numpy as np
+
+    gerador = np.random.default_rng(20240519)
+    a = gerador.integers(1, _PRIMO, size=NUM_PERMUTACOES, dtype=np.uint64)
+    b = gerador.integers(0, _PRIMO, size=NUM_PERMUTACOES, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def shingles(texto):
+    """Hashes (crc32) dos trigramas de palavras do texto, com números trocados por '0'."""
+    tokens = _TOKEN_RE.findall(_NUMERO_RE.sub('0', str(texto).lower()))
+    if len(tokens) < TAMANHO_SHINGLE:
+        grams = [' '.join(tokens)]
+    else:
+        grams = [' '.join(tokens[i:i + TAMANHO_SHINGLE]) for i in range(len(tokens) - TAMANHO_SHINGLE + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) & _PRIMO for gram in grams}
+
+
+class IndiceQuaseDuplicatas:
+    """
+    Índice incremental: `adicionar(texto)` retorna o grupo do texto.
+
+    O grupo é o índice do primeiro texto (representante) com que o novo
+    texto foi considerado quase idêntico, ou o próprio índice do texto.
+    """
+
+    def __init__(self, limiar=LIMIAR_SIMILARIDADE, bandas=BANDAS):
+        if NUM_PERMUTACOES % bandas:
+            raise ValueError(f'{NUM_PERMUTACOES} permutações não dividem em {bandas} bandas')
+        self.limiar = limiar
+        self.bandas = bandas
+        self.linhas = NUM_PERMUTACOES // bandas
+        self._a, self._b = _coeficientes()
+        self._buckets = {}
+        self._assinaturas = []
+        self._grupos = []
+
+    def assinatura(self, texto):
+        import numpy as np
+
+        valores = np.fromiter(shingles(texto), dtype=np.uint64)
+        return ((self._a * valores[None, :] + self._b) % _PRIMO).min(axis=1)
+
+    def adicionar(self, texto):
+        assinatura = self.assinatura(texto)
+        indice = len(self._assinaturas)
+        self._assinaturas.append(assinatura)
+
+        grupo = indice
+        chaves = [
+            (banda, assinatura[banda * self.linhas:(banda + 1) * self.linhas].tobytes())
+            for banda in range(self.bandas)
+        ]
+        for chave in chaves:
+            candidato = self._buckets.get(chave)
+            # Compara só com o representante do bucket: custo linear mesmo
+            # com milhares de cópias do mesmo modelo de pedido
+            if candidato is not None and self.similaridade(indice, candidato) >= self.limiar:
+                grupo = self._grupos[candidato]
+                break
+        for chave in chaves:
+            self._buckets.setdefault(chave, indice)
+
+        self._grupos.append(grupo)
+        return grupo
+
+    def similaridade(self, i, j):
+        """Jaccard estimado pela fração de posições iguais nas assinaturas."""
+        return float((self._assinaturas[i] == self._assinaturas[j]).mean())
+
+
+def agrupar_textos(textos, limiar=LIMIAR_SIMILARIDADE):
+    """
+    Agrupa textos quase idênticos.
+
+    Returns:
+        list: Para cada texto, o índice do representante do seu grupo
+    """
+    indice = IndiceQuaseDuplicatas(limiar)
+    grupos = [indice.adicionar(texto) for texto in textos]
+
+    tamanhos = Counter(grupos)
+    with _estatisticas_lock:
+        _estatisticas['textos'] += len(textos)
+        _estatisticas['grupos'] += len(tamanhos)
+        _estatisticas['grupos_com_repeticao'] += sum(1 for n in tamanhos.values() if n > 1)
+        _estatisticas['textos_em_grupos_com_repeticao'] += sum(n for n in tamanhos.values() if n > 1)
+        _estatisticas['maior_grupo'] = max(_estatisticas['maior_grupo'], max(tamanhos.values(), default=0))
+    return grupos
+
+
+def contar_ml_reaproveitado(quantidade=1):
+    """Registra predições ML evitadas por reaproveitar o score do grupo."""
+    with _estatisticas_lock:
+        _estatisticas['ml_evitadas'] += quantidade
+
+
+def get_cluster_stats():
+    """Estatísticas acumuladas do agrupamento (textos, grupos, maior grupo, ML evitadas...)."""
+    with _estatisticas_lock:
+        return dict(_estatisticas)
+
+
+def reset_cluster_stats():
+    with _estatisticas_lock:
+        _estatisticas.clear()
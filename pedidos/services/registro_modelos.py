@@ -0,0 +1,265 @@
+"""
+Registro de versões do modelo ML.
+
+Cada treinamento gera um diretório imutável em ml/modelos/<versao>/ com os
+artefatos (modelo.pkl, vectorizer.pkl, vectorizer.vocab) e um
+manifesto.json (métricas, hash do dataset, parâmetros). O arquivo
+ml/modelos/ATIVO aponta a versão servida por padrão.
+
+A versão é o hash dos dois .pkl, o mesmo valor gravado em
+ClassificacaoPedido.versao_modelo. Os artefatos antigos em ml/*.pkl
+continuam válidos como uma versão "legado", usada quando não há ponteiro
+ATIVO.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+from .arquivos import escrever_atomico
+
+
+DIRETORIO_MODELOS = 'ml/modelos'
+ARQUIVO_ATIVO = 'ATIVO'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+
+ARTEFATOS = {
+    'modelo': 'modelo.pkl',
+    'vectorizer': 'vectorizer.pkl',
+    'vocabulario': 'vectorizer.vocab',
+}
+
+# Layout anterior ao registro (um único modelo em ml/)
+CAMINHOS_LEGADO = {nome: os.path.join('ml', arquivo) for nome, arquivo in ARTEFATOS.items()}
+
+SEM_MODELO = 'sem-modelo'
+
+# Versões são hashes; o formato fixo também impede caminhos arbitrários vindos da API
+FORMATO_VERSAO = re.compile(r'[0-9a-f]{16}')
+
+# Lidos e escritos por várias threads: consultas e escritas sob o lock, o
+# trabalho caro (hash, leitura do ponteiro) fora dele
+_hash_cache = {}
+_ativo_cache = {}
+_cache_lock = threading.Lock()
+
+
+def hash_artefatos(modelo_path, vectorizer_path):
+    """
+    Hash (16 hex) dos arquivos .pkl, que identifica a versão do modelo.
+
+    O hash só é recalculado quando data de modificação/tamanho mudam.
+    """
+    chave = tuple(
+        (os.path.abspath(caminho), os.path.getmtime(caminho), os.path.getsize(caminho))
+        for caminho in (modelo_path, vectorizer_path)
+    )
+    with _cache_lock:
+        versao = _hash_cache.get(chave)
+    if versao is None:
+        digest = hashlib.sha256()
+        for caminho in (modelo_path, vectorizer_path):
+            with open(caminho, 'rb') as f:
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(bloco)
+        versao = digest.hexdigest()[:16]
+        with _cache_lock:
+            if len(_hash_cache) > 64:
+                _hash_cache.clear()
+            _hash_cache[chave] = versao
+    return versao
+
+
+def versao_legada():
+    """Versão dos artefatos em ml/*.pkl, ou None se não existirem."""
+    modelo, vectorizer = CAMINHOS_LEGADO['modelo'], CAMINHOS_LEGADO['vectorizer']
+    if not (os.path.exists(modelo) and os.path.exists(vectorizer)):
+        return None
+    return hash_artefatos(modelo, vectorizer)
+
+
+def _diretorio_versao(versao):
+    return os.path.join(DIRETORIO_MODELOS, versao)
+
+
+def caminhos_versao(versao):
+    """
+    Caminhos dos artefatos de uma versão.
+
+    Raises:
+        ValueError: Se a versão não estiver registrada
+    """
+    if not isinstance(versao, str) or not FORMATO_VERSAO.fullmatch(versao):
+        raise ValueError(f'Versão de modelo desconhecida: {versao}')
+    diretorio = _diretorio_versao(versao)
+    if os.path.isfile(os.path.join(diretorio, ARTEFATOS['modelo'])):
+        return {nome: os.path.join(diretorio, arquivo) for nome, arquivo in ARTEFATOS.items()}
+    if versao == versao_legada():
+        return dict(CAMINHOS_LEGADO)
+    raise ValueError(f'Versão de modelo desconhecida: {versao}')
+
+
+def existe(versao):
+    try:
+        caminhos_versao(versao)
+    except ValueError:
+        return False
+    return True
+
+
+def versao_ativa():
+    """
+    Versão servida quando a requisição não escolhe um modelo.
+
+    Lê ml/modelos/ATIVO (relido apenas quando o arquivo muda); sem
+    ponteiro, usa os artefatos legados. Retorna 'sem-modelo' se não houver
+    nenhum modelo treinado.
+    """
+    ponteiro = os.path.join(DIRETORIO_MODELOS, ARQUIVO_ATIVO)
+    try:
+        chave = os.stat(ponteiro).st_mtime_ns
+    except FileNotFoundError:
+        return versao_legada() or SEM_MODELO
+
+    with _cache_lock:
+        versao = _ativo_cache.get(chave)
+    if versao is None:
+        with open(ponteiro, encoding='utf-8') as f:
+            versao = f.read().strip()
+        with _cache_lock:
+            _ativo_cache.clear()
+            _ativo_cache[chave] = versao
+    return versao if existe(versao) else (versao_legada() or SEM_MODELO)
+
+
+def versao_ativa_registrada():
+    """
+    Versão ativa se for do registro (ml/modelos/), ou None quando a ativa
+    são os artefatos legados ou não há modelo.
+    """
+    versao = versao_ativa()
+    if versao == SEM_MODELO or not os.path.isfile(os.path.join(_diretorio_versao(versao), ARTEFATOS['modelo'])):
+        return None
+    return versao
+
+
+def resolver_versao(versao=None):
+    """
+    Valida a versão pedida (ou retorna a ativa, se None/vazia).
+
+    Raises:
+        ValueError: Se a versão pedida não estiver registrada
+    """
+    if not versao:
+        return versao_ativa()
+    caminhos_versao(versao)
+    return versao
+
+
+def ler_manifesto(versao):
+    caminho = os.path.join(_diretorio_versao(versao), ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {'versao': versao}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def listar_versoes():
+    """
+    Lista os manifestos das versões disponíveis (mais recentes primeiro).
+
+    Cada item traz também 'ativa' (bool) e 'tamanho_bytes' dos artefatos.
+    """
+    ativa = versao_ativa()
+    versoes = []
+
+    if os.path.isdir(DIRETORIO_MODELOS):
+        for nome in os.listdir(DIRETORIO_MODELOS):
+            if nome.startswith('.') or not os.path.isdir(_diretorio_versao(nome)):
+                continue
+            if existe(nome):
+                versoes.append(ler_manifesto(nome))
+
+    legado = versao_legada()
+    if legado and not any(m['versao'] == legado for m in versoes):
+        versoes.append({'versao': legado, 'origem': 'legado'})
+
+    for manifesto in versoes:
+        caminhos = caminhos_versao(manifesto['versao'])
+        manifesto['ativa'] = manifesto['versao'] == ativa
+        manifesto['tamanho_bytes'] = sum(
+            os.path.getsize(c) for c in caminhos.values() if os.path.exists(c)
+        )
+    versoes.sort(key=lambda m: m.get('criado_em', ''), reverse=True)
+    return versoes
+
+
+def novo_diretorio_temporario():
+    """Diretório de trabalho para um treinamento, no mesmo disco do registro."""
+    os.makedirs(DIRETORIO_MODELOS, exist_ok=True)
+    return tempfile.mkdtemp(dir=DIRETORIO_MODELOS, prefix='.treino-')
+
+
+def registrar_versao(diretorio_temporario, manifesto, exportar_vocabulario=None):
+    """
+    Move os artefatos de um treinamento para ml/modelos/<versao>/.
+
+    Args:
+        diretorio_temporario (str): Diretório com modelo.pkl e vectorizer.pkl
+        manifesto (dict): Métricas, hash do dataset e parâmetros do treino
+        exportar_vocabulario (callable): Opcional, recebe (caminho, versao) e
+            grava o vocabulário compacto da versão
+
+    Returns:
+        str: Versão registrada (se já existia, os artefatos novos são descartados)
+    """
+    versao = hash_artefatos(
+        os.path.join(diretorio_temporario, ARTEFATOS['modelo']),
+        os.path.join(diretorio_temporario, ARTEFATOS['vectorizer']),
+    )
+    destino = _diretorio_versao(versao)
+    if os.path.exists(destino):
+        shutil.rmtree(diretorio_temporario)
+        return versao
+
+    if exportar_vocabulario is not None:
+        exportar_vocabulario(os.path.join(diretorio_temporario, ARTEFATOS['vocabulario']), versao)
+
+    manifesto = dict(manifesto, versao=versao, criado_em=datetime.now(timezone.utc).isoformat())
+    escrever_atomico(
+        os.path.join(diretorio_temporario, ARQUIVO_MANIFESTO),
+        json.dumps(manifesto, ensure_ascii=False, indent=2),
+    )
+    os.replace(diretorio_temporario, destino)
+    return versao
+
+
+def ativar_versao(versao):
+    """
+    Aponta a versão servida por padrão (troca atômica do ponteiro ATIVO).
+
+    Raises:
+        ValueError: Se a versão não estiver registrada
+    """
+    caminhos_versao(versao)
+    os.makedirs(DIRETORIO_MODELOS, exist_ok=True)
+    escrever_atomico(os.path.join(DIRETORIO_MODELOS, ARQUIVO_ATIVO), versao + '\n')
+
+
+def remover_versao(versao):
+    """
+    Apaga o diretório de uma versão registrada.
+
+    Raises:
+        ValueError: Se a versão for a ativa ou não estiver no registro
+    """
+    if versao == versao_ativa():
+        raise ValueError('A versão ativa não pode ser removida')
+    diretorio = _diretorio_versao(versao)
+    if not os.path.isdir(diretorio) or not existe(versao):
+        raise ValueError(f'Versão de modelo desconhecida: {versao}')
+    shutil.rmtree(diretorio)
@@ -0,0 +1,325 @@
+"""
+Conjunto declarativo das regras de dados pessoais do detector por regex.
+
+As regras ficam num arquivo JSON (pedidos/regras_pii.json, ou
+settings.REGRAS_PII_PATH / PARTICIPADF_REGRAS) e são compiladas uma única
+vez em um ConjuntoRegras. Cada regra:
+
+    {
+      "tipo": "rg",                      chave em `detalhes` e em `tipos`
+      "rotulo": "RG",                    texto em `tipos_detectados`
+      "padroes": ["...", {"padrao": "...", "validador": "cep"}],
+      "flags": "IGNORECASE",             flags do módulo re, separadas por |
+      "exige_digitos": true,             só roda em textos com dígitos
+      "palavras_chave": ["matr"],        só roda se alguma aparecer (minúsculas)
+      "validador": "rg",                 validators.VALIDADORES: cpf, rg, telefone, cep, cep_df
+      "usa_exclusoes": true,             ignora candidatos em CNPJ/SEI/valores (spans_excluidos)
+      "contexto_proibido": "..."         com este padrão no texto a regra não vale
+    }
+
+Os padrões são testados em ordem e o primeiro aceito decide; um padrão
+escrito como objeto pode trocar o validador e `usa_exclusoes` da regra.
+`ordem_early_exit` lista os tipos na ordem do modo early_exit.
+
+A versão do conjunto é o hash do conteúdo do arquivo (16 hex): muda com
+qualquer edição e volta ao valor anterior se a edição for desfeita.
+
+Recarga a quente: `regras_ativas()` compara data de modificação e tamanho
+do arquivo a cada chamada. Quando mudam, uma thread recompila enquanto as
+demais seguem com o conjunto anterior, e a troca é uma única atribuição:
+cada detecção usa um conjunto inteiro, nunca metade de cada. Um arquivo
+inválido é ignorado (fica o conjunto anterior e o erro vai para o log) até
+ser alterado de novo. Para trocar o arquivo sem que um worker leia uma
+escrita pela metade, grave em outro arquivo e renomeie por cima.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from .validators import VALIDADORES, filtrar_candidatos, spans_excluidos
+
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'regras_pii.json')
+
+CAMPOS_REGRA = {
+    'tipo', 'rotulo', 'padroes', 'flags', 'exige_digitos', 'palavras_chave',
+    'validador', 'usa_exclusoes', 'contexto_proibido', 'descricao',
+}
+CAMPOS_PADRAO = {'padrao', 'validador', 'usa_exclusoes'}
+
+
+def caminho_regras():
+    """Arquivo de regras em uso (settings.REGRAS_PII_PATH)."""
+    from django.conf import settings
+
+    if settings.configured:
+        return str(getattr(settings, 'REGRAS_PII_PATH', CAMINHO_PADRAO))
+    return CAMINHO_PADRAO
+
+
+class Contexto:
+    """Texto + pré-processamento; os spans excluídos só são calculados se alguma regra os usar."""
+
+    def __init__(self, text, analisado):
+        self.text = text
+        self.analisado = analisado
+        self._excluidos = None
+
+    @property
+    def excluidos(self):
+        if self._excluidos is None:
+            self._excluidos = spans_excluidos(self.text)
+        return self._excluidos
+
+
+class Regra:
+    """Uma regra compilada. Imutável depois de criada: pode ser usada por várias threads."""
+
+    __slots__ = ('chave', 'rotulo', 'padroes', 'exige_digitos', 'palavras_chave', 'contexto_proibido')
+
+    def __init__(self, chave, rotulo, padroes, exige_digitos=False, palavras_chave=(), contexto_proibido=None):
+        self.chave = chave
+        self.rotulo = rotulo
+        # [(regex compilado, validador ou None, usa_exclusoes)]
+        self.padroes = tuple(padroes)
+        self.exige_digitos = exige_digitos
+        self.palavras_chave = tuple(palavras_chave)
+        self.contexto_proibido = contexto_proibido
+
+    def avaliar(self, ctx):
+        """Primeiro match aceito no texto, ou None."""
+        analisado = ctx.analisado
+        if self.exige_digitos and not analisado.tem_digitos:
+            return None
+        if self.palavras_chave and not analisado.contem(*self.palavras_chave):
+            return None
+        for regex, validador, usa_exclusoes in self.padroes:
+            if validador is None:
+                match = regex.search(ctx.text)
+            else:
+                aprovados = filtrar_candidatos(
+                    validador, ctx.text, regex.finditer(ctx.text), ctx.excluidos if usa_exclusoes else ()
+                )
+                match = aprovados[0] if aprovados else None
+            if match:
+                if self.contexto_proibido is not None and self.contexto_proibido.search(ctx.text):
+                    return None
+                return match
+        return None
+
+
+class ConjuntoRegras:
+    """Regras compiladas de um arquivo, com a versão do conteúdo."""
+
+    def __init__(self, regras, ordem_early_exit, versao, caminho=None):
+        self.regras = tuple(regras)
+        self.versao = versao
+        self.caminho = caminho
+        self.por_chave = {regra.chave: regra for regra in self.regras}
+        self.tipos = [regra.chave for regra in self.regras]
+        self.ordem_early_exit = tuple(self.por_chave[chave] for chave in ordem_early_exit)
+        self._chave_por_nome = {
+            **{regra.chave: regra.chave for regra in self.regras},
+            **{regra.rotulo.lower(): regra.chave for regra in self.regras},
+        }
+
+    def normalizar_tipos(self, tipos):
+        """
+        Converte nomes de tipos (chaves como 'cpf' ou rótulos como 'Data de
+        Nascimento', sem diferenciar maiúsculas) nas chaves das regras.
+
+        Raises:
+            ValueError: Se algum tipo não existir
+        """
+        if tipos is None:
+            return None
+        if isinstance(tipos, str):
+            tipos = [tipos]
+        chaves = []
+        for tipo in tipos:
+            chave = self._chave_por_nome.get(str(tipo).strip().lower())
+            if chave is None:
+                raise ValueError(f'Tipo desconhecido: {tipo} (use: {", ".join(self.tipos)})')
+            if chave not in chaves:
+                chaves.append(chave)
+        return chaves
+
+    def selecionar(self, tipos=None, early_exit=False):
+        """Regras a avaliar, na ordem do relatório ou na do early_exit."""
+        ordem = self.ordem_early_exit if early_exit else self.regras
+        if tipos is None:
+            return ordem
+        return [regra for regra in ordem if regra.chave in tipos]
+
+
+def _flags(valor, onde):
+    flags = 0
+    for nome in filter(None, (parte.strip() for parte in (valor or '').split('|'))):
+        flag = getattr(re, nome.upper(), None)
+        if not isinstance(flag, re.RegexFlag):
+            raise ValueError(f'{onde}: flag desconhecida: {nome}')
+        flags |= flag
+    return flags
+
+
+def _compilar_padrao(padrao, flags, onde):
+    try:
+        return re.compile(padrao, flags)
+    except (re.error, TypeError) as e:
+        raise ValueError(f'{onde}: padrão inválido ({e}): {padrao!r}')
+
+
+def _validador(nome, onde):
+    if nome is not None and nome not in VALIDADORES:
+        raise ValueError(f'{onde}: validador desconhecido: {nome} (use: {", ".join(VALIDADORES)})')
+    return nome
+
+
+def compilar(dados, versao, caminho=None):
+    """
+    Compila o conteúdo (já lido do JSON) de um arquivo de regras.
+
+    Raises:
+        ValueError: Se alguma regra estiver incompleta ou inválida
+    """
+    if not isinstance(dados, dict) or not isinstance(dados.get('regras'), list) or not dados['regras']:
+        raise ValueError('Arquivo de regras sem a lista "regras"')
+
+    regras = []
+    for numero, item in enumerate(dados['regras'], 1):
+        onde = f'Regra {numero}'
+        if not isinstance(item, dict):
+            raise ValueError(f'{onde}: deve ser um objeto')
+        desconhecidos = set(item) - CAMPOS_REGRA
+        if desconhecidos:
+            raise ValueError(f'{onde}: campos desconhecidos: {", ".join(sorted(desconhecidos))}')
+        if not item.get('tipo') or not item.get('rotulo') or not item.get('padroes'):
+            raise ValueError(f'{onde}: "tipo", "rotulo" e "padroes" são obrigatórios')
+        onde = f'Regra {numero} ({item["tipo"]})'
+        if any(regra.chave == item['tipo'] for regra in regras):
+            raise ValueError(f'{onde}: tipo repetido')
+
+        flags = _flags(item.get('flags'), onde)
+        validador = _validador(item.get('validador'), onde)
+        usa_exclusoes = bool(item.get('usa_exclusoes', False))
+        padroes = []
+        for padrao in item['padroes']:
+            if isinstance(padrao, dict):
+                desconhecidos = set(padrao) - CAMPOS_PADRAO
+                if desconhecidos:
+                    raise ValueError(f'{onde}: campos desconhecidos no padrão: {", ".join(sorted(desconhecidos))}')
+                padroes.append((
+                    _compilar_padrao(padrao.get('padrao'), flags, onde),
+                    _validador(padrao.get('validador', validador), onde),
+                    bool(padrao.get('usa_exclusoes', usa_exclusoes)),
+                ))
+            else:
+                padroes.append((_compilar_padrao(padrao, flags, onde), validador, usa_exclusoes))
+
+        contexto = item.get('contexto_proibido')
+        regras.append(Regra(
+            item['tipo'],
+            item['rotulo'],
+            padroes,
+            exige_digitos=bool(item.get('exige_digitos', False)),
+            palavras_chave=[str(p).lower() for p in item.get('palavras_chave', [])],
+            contexto_proibido=_compilar_padrao(contexto, flags, onde) if contexto else None,
+        ))
+
+    chaves = [regra.chave for regra in regras]
+    ordem = dados.get('ordem_early_exit', chaves)
+    desconhecidos = [chave for chave in ordem if chave not in chaves]
+    if desconhecidos:
+        raise ValueError(f'ordem_early_exit: tipos desconhecidos: {", ".join(desconhecidos)}')
+    # Tipos fora da ordem declarada vão para o fim, na ordem do relatório
+    ordem = list(dict.fromkeys(ordem)) + [chave for chave in chaves if chave not in ordem]
+    return ConjuntoRegras(regras, ordem, versao, caminho)
+
+
+def versao_conteudo(conteudo):
+    """Versão de um arquivo de regras: hash (16 hex) do conteúdo."""
+    return hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+def ler_regras(caminho):
+    """
+    Lê e compila um arquivo de regras.
+
+    Raises:
+        ValueError: Se o arquivo não existir ou for inválido
+    """
+    try:
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+    except FileNotFoundError:
+        raise ValueError(f'Arquivo de regras não encontrado: {caminho}')
+    try:
+        dados = json.loads(conteudo)
+    except ValueError as e:
+        raise ValueError(f'Arquivo de regras com JSON inválido: {e}')
+    return compilar(dados, versao_conteudo(conteudo), caminho)
+
+
+# (identidade do arquivo, ConjuntoRegras): trocado numa única atribuição
+_ativo = None
+# Identidade de um arquivo que falhou, para não recompilá-lo a cada chamada
+_falhou = None
+_recarga_lock = threading.Lock()
+
+
+def _identidade(caminho):
+    try:
+        estado = os.stat(caminho)
+    except FileNotFoundError:
+        return caminho, None, None
+    return caminho, estado.st_mtime_ns, estado.st_size
+
+
+def regras_ativas():
+    """
+    Conjunto de regras em uso, recompilado se o arquivo mudou.
+
+    Raises:
+        ValueError: Se ainda não houver conjunto carregado e o arquivo for inválido
+    """
+    global _ativo, _falhou
+
+    caminho = caminho_regras()
+    identidade = _identidade(caminho)
+    ativo = _ativo
+    if ativo is not None and identidade in (ativo[0], _falhou):
+        return ativo[1]
+
+    if ativo is None:
+        # Primeira carga: quem chegar depois espera o conjunto ficar pronto
+        with _recarga_lock:
+            if _ativo is None or _ativo[0] != identidade:
+                _ativo = (identidade, ler_regras(caminho))
+            return _ativo[1]
+
+    # Recarga: só uma thread recompila; as outras seguem com o conjunto atual
+    if not _recarga_lock.acquire(blocking=False):
+        return ativo[1]
+    try:
+        if _ativo[0] == identidade:
+            return _ativo[1]
+        try:
+            _ativo = (identidade, ler_regras(caminho))
+        except ValueError as e:
+            _falhou = identidade
+            logger.error('Regras de %s não recarregadas, mantida a versão %s: %s', caminho, ativo[1].versao, e)
+            return ativo[1]
+        logger.info('Regras recarregadas de %s: versão %s → %s', caminho, ativo[1].versao, _ativo[1].versao)
+        return _ativo[1]
+    finally:
+        _recarga_lock.release()
+
+
+def versao_regras():
+    """Versão do conjunto de regras em uso."""
+    return regras_ativas().versao
@@ -0,0 +1,175 @@
+"""
+Avaliação em sombra de um modelo candidato com tráfego real.
+
+Uma amostra das requisições de /classificar-pedido/ é enfileirada (sem
+bloquear) para uma thread de fundo, que roda o modelo candidato no mesmo
+texto e grava a concordância com o modelo ativo em AvaliacaoSombra. A
+requisição só paga o sorteio e um `put_nowait`; com a fila cheia o item é
+descartado e contado, nunca esperado.
+
+Só entram textos que chegaram ao ML: quando o regex decide, os dois
+modelos dão a mesma resposta por construção.
+
+Configuração (settings):
+    ML_SOMBRA_MODELO: versão candidata (vazio desativa a sombra)
+    ML_SOMBRA_AMOSTRAGEM: fração das requisições avaliadas (0.0 a 1.0)
+    ML_SOMBRA_FILA_MAX: itens aguardando avaliação antes de descartar
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+# Itens gravados por transação
+TAMANHO_LOTE = 50
+
+
+class AvaliadorSombra:
+    """Fila limitada + thread de fundo que avalia o modelo candidato."""
+
+    def __init__(self, versao_candidata, amostragem=0.1, fila_max=100):
+        self.versao_candidata = versao_candidata
+        self.amostragem = amostragem
+        self._fila = queue.Queue(maxsize=fila_max)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._estatisticas = Counter()
+
+    def agendar(self, texto, resultado, threshold=0.35):
+        """
+        Sorteia e enfileira a avaliação do texto pelo candidato.
+
+        Returns:
+            bool: True se o texto entrou na fila
+        """
+        if resultado['metodo'] != 'ml':
+            return False
+        versao_ativa = resultado['detalhes'].get('versao_modelo')
+        if versao_ativa is None or versao_ativa == self.versao_candidata:
+            return False
+        if random.random() >= self.amostragem:
+            return False
+
+        item = (texto, versao_ativa, float(resultado['confianca']), threshold)
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            self._contar('descartadas')
+            return False
+
+        self._contar('agendadas')
+        self._garantir_thread()
+        return True
+
+    def _contar(self, chave, quantidade=1):
+        with self._lock:
+            self._estatisticas[chave] += quantidade
+
+    def estatisticas(self):
+        """Contadores do processo: agendadas, descartadas, avaliadas, erros e fila atual."""
+        with self._lock:
+            return dict(self._estatisticas, fila=self._fila.qsize())
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name='avaliador-sombra', daemon=True
+                )
+                self._thread.start()
+
+    def _executar(self):
+        while True:
+            itens = [self._fila.get()]
+            while len(itens) < TAMANHO_LOTE:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                close_old_connections()
+                self.processar(itens)
+            except Exception:
+                logger.exception('Falha na avaliação em sombra (%s itens)', len(itens))
+                self._contar('erros', len(itens))
+            finally:
+                for _ in itens:
+                    self._fila.task_done()
+
+    def processar(self, itens):
+        """Roda o candidato nos itens e grava as comparações em uma transação."""
+        from ..models import AvaliacaoSombra
+        from .classification_store import hash_texto
+        from .ml_model import predict_proba
+
+        registros = []
+        for texto, versao_ativa, confianca_ativa, threshold in itens:
+            inicio = time.perf_counter()
+            confianca = float(predict_proba(texto, self.versao_candidata))
+            registros.append(AvaliacaoSombra(
+                texto_hash=hash_texto(texto),
+                versao_ativa=versao_ativa,
+                versao_candidata=self.versao_candidata,
+                threshold=threshold,
+                confianca_ativa=confianca_ativa,
+                confianca_candidata=confianca,
+                contem_ativo=confianca_ativa >= threshold,
+                contem_candidato=confianca >= threshold,
+                latencia_ms=(time.perf_counter() - inicio) * 1000,
+            ))
+
+        AvaliacaoSombra.objects.bulk_create(registros)
+        self._contar('avaliadas', len(registros))
+
+    def aguardar(self):
+        """Bloqueia até a fila esvaziar (testes e encerramento)."""
+        self._fila.join()
+
+
+_avaliadores = {}
+_avaliadores_lock = threading.Lock()
+
+
+def obter_avaliador():
+    """
+    Avaliador do processo atual, ou None se a sombra estiver desativada.
+
+    Criado sob demanda em cada processo: workers pré-fork não herdam a
+    thread nem a fila do mestre.
+    """
+    from .registro_modelos import existe
+
+    versao = getattr(settings, 'ML_SOMBRA_MODELO', None)
+    if not versao:
+        return None
+
+    chave = (os.getpid(), versao)
+    avaliador = _avaliadores.get(chave, False)
+    if avaliador is not False:
+        return avaliador
+
+    with _avaliadores_lock:
+        if chave not in _avaliadores:
+            _avaliadores.clear()
+            if existe(versao):
+                _avaliadores[chave] = AvaliadorSombra(
+                    versao,
+                    amostragem=getattr(settings, 'ML_SOMBRA_AMOSTRAGEM', 0.1),
+                    fila_max=getattr(settings, 'ML_SOMBRA_FILA_MAX', 100),
+                )
+            else:
+                logger.warning('Modelo candidato da sombra não encontrado: %s', versao)
+                _avaliadores[chave] = None
+        return _avaliadores[chave]
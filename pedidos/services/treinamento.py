@@ -0,0 +1,185 @@
+"""
+Treinamento do modelo ML (ensemble TF-IDF + LR/RF/NB).
+
+Separado de ml_model.py para que a inferência não importe o código de
+treinamento do scikit-learn.
+"""
+
+import hashlib
+import os
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.ensemble import VotingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.model_selection import cross_val_score
+from . import registro_modelos
+from .vocabulario import exportar_vocabulario
+
+
+# Lista de stopwords em português (palavras comuns que podem ser removidas)
+STOPWORDS_PT = [
+    'a', 'o', 'e', 'de', 'da', 'do', 'em', 'um', 'uma', 'os', 'as', 'dos', 'das',
+    'para', 'com', 'por', 'no', 'na', 'ao', 'aos', 'à', 'às', 'é', 'que', 'se',
+    'como', 'mais', 'foi', 'tem', 'são', 'essa', 'esse', 'isso', 'esta', 'este',
+    'muito', 'já', 'também', 'só', 'pelo', 'pela', 'ou', 'quando', 'mesmo', 'sem'
+]
+
+
+def hash_dataset(texts, labels):
+    """Hash (16 hex) do conteúdo de treino, independente do formato do arquivo."""
+    digest = hashlib.sha256()
+    for texto, label in zip(texts, labels):
+        digest.update(f'{int(label)}\t{texto}\0'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _parametros_simples(estimador):
+    """Parâmetros serializáveis em JSON de um estimador do scikit-learn."""
+    return {
+        chave: list(valor) if isinstance(valor, tuple) else valor
+        for chave, valor in estimador.get_params(deep=False).items()
+        if isinstance(valor, (int, float, str, bool, tuple, type(None)))
+    }
+
+
+# Configuração padrão do modelo; explorar_modelos compara alternativas
+CONFIGURACAO_PADRAO = {
+    'max_features': 5000,
+    'ngram_range': (1, 3),
+    'min_df': 2,
+    'estimadores': ('lr', 'rf', 'nb'),
+}
+ESTIMADORES_DISPONIVEIS = ('lr', 'rf', 'nb')
+
+
+def configuracao_completa(configuracao=None):
+    """CONFIGURACAO_PADRAO com as chaves informadas substituídas."""
+    completa = dict(CONFIGURACAO_PADRAO)
+    completa.update(configuracao or {})
+    completa['ngram_range'] = tuple(completa['ngram_range'])
+    completa['estimadores'] = tuple(completa['estimadores'])
+    desconhecidos = set(completa['estimadores']) - set(ESTIMADORES_DISPONIVEIS)
+    if desconhecidos or not completa['estimadores']:
+        raise ValueError(f'Estimadores inválidos: {", ".join(completa["estimadores"]) or "(nenhum)"}')
+    return completa
+
+
+def criar_vectorizer(configuracao=None):
+    configuracao = configuracao_completa(configuracao)
+    return TfidfVectorizer(
+        max_features=configuracao['max_features'],
+        ngram_range=configuracao['ngram_range'],
+        min_df=configuracao['min_df'],
+        stop_words=STOPWORDS_PT  # ← CORREÇÃO AQUI
+    )
+
+
+def criar_ensemble(configuracao=None):
+    """VotingClassifier soft com os estimadores da configuração (sempre na ordem lr, rf, nb)."""
+    configuracao = configuracao_completa(configuracao)
+    fabricas = {
+        'lr': lambda: LogisticRegression(max_iter=1000, random_state=42),
+        'rf': lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+        'nb': lambda: MultinomialNB(),
+    }
+    return VotingClassifier(
+        estimators=[(nome, fabricas[nome]()) for nome in ESTIMADORES_DISPONIVEIS if nome in configuracao['estimadores']],
+        voting='soft'
+    )
+
+
+def salvar_artefatos(modelo, vectorizer, diretorio):
+    """Grava modelo.pkl e vectorizer.pkl em `diretorio`."""
+    # stop_words_ (termos podados) só serve para inspeção e incha o artefato
+    if hasattr(vectorizer, 'stop_words_'):
+        del vectorizer.stop_words_
+    joblib.dump(modelo, os.path.join(diretorio, registro_modelos.ARTEFATOS['modelo']))
+    joblib.dump(vectorizer, os.path.join(diretorio, registro_modelos.ARTEFATOS['vectorizer']))
+
+
+def train_model(texts, labels, ativar=None, configuracao=None):
+    """
+    Treina um modelo ensemble para detecção de dados pessoais e registra
+    os artefatos como uma nova versão em ml/modelos/.
+    
+    Args:
+        texts (list): Lista de textos
+        labels (list): Lista de labels (0 ou 1)
+        ativar (bool): Torna a nova versão a ativa. Por padrão só ativa se
+            ainda não houver nenhum modelo
+        configuracao (dict): Substitui chaves de CONFIGURACAO_PADRAO
+            (max_features, ngram_range, min_df, estimadores)
+    
+    Returns:
+        str: Versão registrada
+    """
+    print("\n" + "="*60)
+    print("TREINANDO MODELO ML")
+    print("="*60)
+    
+    # Vetorização TF-IDF
+    print("\n1. Vetorizando textos (TF-IDF)...")
+    vectorizer = criar_vectorizer(configuracao)
+    X = vectorizer.fit_transform(texts)
+    y = np.array(labels)
+    
+    print(f"   Dimensão do vetor: {X.shape}")
+    print(f"   Total de features: {len(vectorizer.get_feature_names_out())}")
+    
+    # Criar ensemble de classificadores
+    print("\n2. Criando ensemble de classificadores...")
+    modelo = criar_ensemble(configuracao)
+    
+    # Validação cruzada
+    print("\n3. Validação cruzada (5 folds)...")
+    scores = cross_val_score(modelo, X, y, cv=5, scoring='f1')
+    print(f"   F1-Score por fold: {scores}")
+    print(f"   F1-Score médio: {scores.mean():.4f} (+/- {scores.std():.4f})")
+    
+    # Treinar modelo final
+    print("\n4. Treinando modelo final...")
+    modelo.fit(X, y)
+    
+    # Salvar modelo e vectorizer como nova versão do registro
+    temporario = registro_modelos.novo_diretorio_temporario()
+    salvar_artefatos(modelo, vectorizer, temporario)
+    
+    manifesto = {
+        'metricas': {
+            'f1_cv_medio': float(scores.mean()),
+            'f1_cv_desvio': float(scores.std()),
+            'f1_cv_folds': [float(score) for score in scores],
+        },
+        'dataset': {
+            'hash': hash_dataset(texts, labels),
+            'amostras': len(labels),
+            'positivos': int(y.sum()),
+        },
+        'parametros': {
+            'vectorizer': _parametros_simples(vectorizer),
+            'estimadores': {nome: _parametros_simples(est) for nome, est in modelo.estimators},
+            'voting': modelo.voting,
+        },
+    }
+    if ativar is None:
+        # Os artefatos legados em ml/*.pkl não contam: a primeira versão registrada é ativada
+        ativar = registro_modelos.versao_ativa_registrada() is None
+    versao = registro_modelos.registrar_versao(
+        temporario, manifesto,
+        exportar_vocabulario=lambda caminho, v: exportar_vocabulario(vectorizer, caminho, v),
+    )
+    if ativar:
+        registro_modelos.ativar_versao(versao)
+    
+    print(f"\n✓ Versão registrada: {versao}")
+    print(f"✓ Artefatos em: {registro_modelos.DIRETORIO_MODELOS}/{versao}/")
+    if ativar:
+        print("✓ Versão ativada")
+    else:
+        print(f"⚠️  Versão NÃO ativada: a API e o testar_dataset continuam usando {registro_modelos.versao_ativa()}.\n"
+              f"   Para promover: python manage.py gerenciar_modelos --ativar {versao}")
+    print("\n" + "="*60)
+    return versao
@@ -0,0 +1,270 @@
+"""
+Validadores dos candidatos encontrados pelos regex numéricos (CPF, RG, telefone, CEP).
+
+Os regex amplos casam com qualquer sequência de 8 a 11 dígitos (protocolos,
+fragmentos de processo SEI, valores em reais). Cada candidato de `finditer`
+passa por uma verificação aritmética baseada em tabelas pré-calculadas:
+dígitos verificadores de CPF/CNPJ, DDD válido para telefones, faixas de CEP
+(nacional ou só do DF) e a forma do número para RG, que não tem dígito
+verificador comum a todas as UFs. RG e telefone, os de validação mais
+fraca, também são recusados quando o rótulo mais próximo antes do número
+é de um documento administrativo (nota fiscal, empenho, processo...).
+"""
+
+import re
+import threading
+from collections import Counter
+
+
+# Remove pontuação usada na formatação dos números
+_SEM_FORMATACAO = str.maketrans('', '', '.-/ ()+\t\n')
+
+# Pesos dos dígitos verificadores
+_PESOS_CPF_1 = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_CPF_2 = (11, 10, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_CNPJ_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_CNPJ_2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Dígito verificador a partir do resto da divisão por 11
+_DV_POR_RESTO = tuple(0 if resto < 2 else 11 - resto for resto in range(11))
+
+# Valor numérico de cada byte ASCII ('0'..'9'); demais bytes inválidos
+_VALOR_DIGITO = tuple(b - 48 if 48 <= b <= 57 else -1 for b in range(256))
+
+# DDDs válidos no Brasil (índice = DDD)
+_DDDS = {
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28,
+    31, 32, 33, 34, 35, 37, 38, 41, 42, 43, 44, 45, 46, 47, 48, 49,
+    51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89,
+    91, 92, 93, 94, 95, 96, 97, 98, 99,
+}
+DDD_VALIDO = tuple(ddd in _DDDS for ddd in range(100))
+
+# Primeiro dígito do número local: fixo começa com 2-5, celular com 9
+_INICIO_FIXO = tuple(d in (2, 3, 4, 5) for d in range(10))
+
+# Faixas de CEP (inclusivas, 8 dígitos); 00000-000 a 00999-999 não existem
+CEP_FAIXAS_DF = ((70000000, 72799999), (73000000, 73699999))
+CEP_FAIXA_NACIONAL = ((1000000, 99999999),)
+
+# RG: de 7 a 9 dígitos (sem a UF), sem dígito verificador nacional
+_TAMANHOS_RG = (7, 8, 9)
+_SEQUENCIAS = (b'0123456789', b'9876543210')
+
+# Candidatos com rótulo explícito antes do número são aceitos sem checksum
+# (ex.: "CPF 123.456.789-00" é dado pessoal mesmo se digitado errado)
+_JANELA_ROTULO = 20
+# (palavras inteiras: "tel" não casa com "hotel", nem "zap" com "zapping")
+ROTULOS_CPF = re.compile(r'\bcpf\b', re.IGNORECASE)
+ROTULOS_TELEFONE = re.compile(r'\b(telefone|tel|fone|celular|contato|whatsapp|zap)\b', re.IGNORECASE)
+
+# Rótulos de documentos administrativos: o número que vem depois não é pessoal
+ROTULOS_DOCUMENTO = re.compile(
+    r'\b(nota(\s+fiscal)?|nf-?e?|empenho|processo|protocolo|licita[çc][ãa]o|contrato|preg[ãa]o|'
+    r'edital|of[íi]cio|memorando|portaria|decreto|lei|boleto|fatura|c[óo]digo|cnpj)\b',
+    re.IGNORECASE,
+)
+
+CNPJ_REGEX = re.compile(r'\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b')
+SEI_NUMERO_REGEX = re.compile(r'\b\d{5,6}[-/]\d{8}[-/]\d{4}[-/]?\d{2}\b')
+VALOR_MONETARIO_REGEX = re.compile(r'R\$\s*\d[\d.,]*')
+
+
+_lock = threading.Lock()
+_rejeitados = Counter()
+
+
+def _digitos(candidato):
+    """Retorna os dígitos do candidato como bytes ASCII (sem formatação)."""
+    return candidato.translate(_SEM_FORMATACAO).encode('ascii', 'ignore')
+
+
+def _dv(digitos, pesos):
+    soma = 0
+    for peso, byte in zip(pesos, digitos):
+        soma += peso * _VALOR_DIGITO[byte]
+    return _DV_POR_RESTO[soma % 11]
+
+
+def validate_cpf(candidato):
+    """Valida os dois dígitos verificadores de um CPF (com ou sem formatação)."""
+    d = _digitos(candidato)
+    if len(d) != 11 or d.count(d[0]) == 11 or not d.isdigit():
+        return False
+    return (
+        _dv(d, _PESOS_CPF_1) == _VALOR_DIGITO[d[9]]
+        and _dv(d, _PESOS_CPF_2) == _VALOR_DIGITO[d[10]]
+    )
+
+
+def validate_cnpj(candidato):
+    """Valida os dois dígitos verificadores de um CNPJ (com ou sem formatação)."""
+    d = _digitos(candidato)
+    if len(d) != 14 or d.count(d[0]) == 14 or not d.isdigit():
+        return False
+    return (
+        _dv(d, _PESOS_CNPJ_1) == _VALOR_DIGITO[d[12]]
+        and _dv(d, _PESOS_CNPJ_2) == _VALOR_DIGITO[d[13]]
+    )
+
+
+def validate_telefone(candidato):
+    """
+    Valida um telefone brasileiro pelo DDD e pelo primeiro dígito do número.
+
+    Aceita: 8 dígitos (fixo), 9 dígitos (celular), 10/11 dígitos com DDD,
+    opcionalmente precedidos do código do país (55).
+    """
+    d = _digitos(candidato)
+    if not d.isdigit():
+        return False
+    if len(d) in (12, 13) and d.startswith(b'55'):
+        d = d[2:]
+
+    tamanho = len(d)
+    if tamanho == 8:
+        return _INICIO_FIXO[_VALOR_DIGITO[d[0]]]
+    if tamanho == 9:
+        return d[0] == 57  # '9'
+    if tamanho == 10:
+        return DDD_VALIDO[int(d[:2])] and _INICIO_FIXO[_VALOR_DIGITO[d[2]]]
+    if tamanho == 11:
+        return DDD_VALIDO[int(d[:2])] and d[2] == 57
+    return False
+
+
+def validate_rg(candidato):
+    """
+    Valida a forma de um RG: 7 a 9 dígitos após a UF opcional (o último
+    pode ser X), sem dígitos todos iguais nem sequência crescente/decrescente.
+    """
+    d = candidato.translate(_SEM_FORMATACAO).upper().encode('ascii', 'ignore')
+    if d[:2].isalpha():
+        d = d[2:]
+    tamanho = len(d)
+    if d.endswith(b'X'):
+        d = d[:-1]
+    if tamanho not in _TAMANHOS_RG or not d.isdigit() or d.count(d[0]) == len(d):
+        return False
+    return not any(d in sequencia for sequencia in _SEQUENCIAS)
+
+
+def validate_cep(candidato, faixas=CEP_FAIXA_NACIONAL):
+    """Valida se o CEP está em uma das faixas (padrão: faixa nacional)."""
+    d = _digitos(candidato)[-8:]
+    if len(d) < 8 or d.count(d[0]) == 8:
+        return False
+    valor = int(d)
+    for inicio, fim in faixas:
+        if inicio <= valor <= fim:
+            return True
+    return False
+
+
+def cep_do_df(candidato):
+    """Indica se o CEP pertence às faixas do Distrito Federal."""
+    return validate_cep(candidato, CEP_FAIXAS_DF)
+
+
+def _tem_rotulo(text, inicio, rotulos):
+    # pos/endpos em vez de fatiar: \b vê o caractere antes da janela
+    return rotulos.search(text, max(0, inicio - _JANELA_ROTULO), inicio) is not None
+
+
+def _ultimo_rotulo(text, inicio, rotulos):
+    ultimo = None
+    for ultimo in rotulos.finditer(text, max(0, inicio - _JANELA_ROTULO), inicio):
+        pass
+    return ultimo
+
+
+def _rotulo_de_documento(text, inicio, documentos, rotulos):
+    """Se o rótulo mais próximo antes do número é de documento, não de dado pessoal."""
+    documento = _ultimo_rotulo(text, inicio, documentos)
+    if documento is None:
+        return False
+    pessoal = _ultimo_rotulo(text, inicio, rotulos) if rotulos is not None else None
+    return pessoal is None or pessoal.start() < documento.start()
+
+
+def spans_excluidos(text):
+    """
+    Trechos que não devem originar CPF/RG/telefone: CNPJs válidos,
+    números de processo SEI e valores monetários.
+    """
+    spans = []
+    for match in CNPJ_REGEX.finditer(text):
+        if validate_cnpj(match.group()):
+            spans.append(match.span())
+    for regex in (SEI_NUMERO_REGEX, VALOR_MONETARIO_REGEX):
+        for match in regex.finditer(text):
+            spans.append(match.span())
+    return spans
+
+
+def _sobrepoe(span, spans):
+    inicio, fim = span
+    for outro_inicio, outro_fim in spans:
+        if inicio < outro_fim and outro_inicio < fim:
+            return True
+    return False
+
+
+# Validador, rótulos que dispensam a validação e rótulos que recusam o candidato
+VALIDADORES = {
+    'cpf': (validate_cpf, ROTULOS_CPF, None),
+    'telefone': (validate_telefone, ROTULOS_TELEFONE, ROTULOS_DOCUMENTO),
+    'cep': (validate_cep, None, None),
+    'cep_df': (cep_do_df, None, None),
+    'rg': (validate_rg, None, ROTULOS_DOCUMENTO),
+}
+
+
+def filtrar_candidatos(tipo, text, matches, excluidos=()):
+    """
+    Valida em lote os candidatos (objetos Match) de um tipo.
+
+    Args:
+        tipo (str): Chave de VALIDADORES ('cpf', 'telefone', 'cep', 'cep_df', 'rg')
+        text (str): Texto original (para checar rótulos antes do número)
+        matches (iterable): Resultados de `finditer`
+        excluidos (list): Spans que invalidam candidatos sobrepostos
+
+    Returns:
+        list: Matches aprovados, na ordem original
+    """
+    validador, rotulos, documentos = VALIDADORES[tipo]
+    aprovados = []
+    rejeitados = 0
+    rejeitados_exclusao = 0
+
+    for match in matches:
+        if excluidos and _sobrepoe(match.span(), excluidos):
+            rejeitados_exclusao += 1
+            continue
+        if documentos is not None and _rotulo_de_documento(text, match.start(), documentos, rotulos):
+            rejeitados += 1
+            continue
+        if (rotulos is not None and _tem_rotulo(text, match.start(), rotulos)) or validador(match.group()):
+            aprovados.append(match)
+        else:
+            rejeitados += 1
+
+    if rejeitados or rejeitados_exclusao:
+        with _lock:
+            _rejeitados[tipo] += rejeitados
+            _rejeitados['exclusao'] += rejeitados_exclusao
+
+    return aprovados
+
+
+def get_validation_stats():
+    """Retorna quantos candidatos cada validador rejeitou desde o último reset."""
+    with _lock:
+        return dict(_rejeitados)
+
+
+def reset_validation_stats():
+    with _lock:
+        _rejeitados.clear()
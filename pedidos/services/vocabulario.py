@@ -0,0 +1,176 @@
+"""
+Formato compacto e mapeável em memória (mmap) do vocabulário TF-IDF.
+
+O `vocabulary_` do TfidfVectorizer é um dict Python de strings: em cada
+processo worker ele vira milhares de objetos no heap, que o fork não
+consegue manter compartilhados (contagem de referências suja as páginas).
+Aqui o vocabulário é gravado como uma tabela hash de endereçamento aberto
+em um arquivo binário; todos os processos mapeiam o mesmo arquivo e
+compartilham as mesmas páginas físicas (page cache do sistema).
+
+Layout (little-endian, seções alinhadas em 8 bytes):
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint32) | cabeçalho JSON |
+    slots (uint32[n_slots], 0 = vazio, senão entrada + 1) |
+    offsets (uint32[n_termos + 1]) | indices (uint32[n_termos]) |
+    idf (float64[n_features]) | blob (termos UTF-8 concatenados, ordenados)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+
+
+MAGIC = b'PDFVOC01'
+_ALINHAMENTO = 8
+
+
+def _alinhar(tamanho):
+    return (tamanho + _ALINHAMENTO - 1) // _ALINHAMENTO * _ALINHAMENTO
+
+
+def _hash(chave):
+    return zlib.crc32(chave)
+
+
+def exportar_vocabulario(vectorizer, caminho, versao_modelo):
+    """
+    Grava o vocabulário, IDF e parâmetros do vectorizer treinado no formato
+    compacto. A escrita é atômica (arquivo temporário + os.replace).
+    """
+    termos = sorted(vectorizer.vocabulary_)
+    chaves = [termo.encode('utf-8') for termo in termos]
+    n_termos = len(chaves)
+
+    # Fator de carga <= 0.25: a maioria das consultas sem acerto para no 1º slot
+    n_slots = 1
+    while n_slots < max(4 * n_termos, 8):
+        n_slots *= 2
+    mascara = n_slots - 1
+
+    slots = np.zeros(n_slots, dtype='<u4')
+    for entrada, chave in enumerate(chaves):
+        posicao = _hash(chave) & mascara
+        while slots[posicao]:
+            posicao = (posicao + 1) & mascara
+        slots[posicao] = entrada + 1
+
+    offsets = np.zeros(n_termos + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(chave) for chave in chaves])
+    indices = np.array([vectorizer.vocabulary_[termo] for termo in termos], dtype='<u4')
+    idf = np.asarray(vectorizer.idf_ if vectorizer.use_idf else [], dtype='<f8')
+    blob = b''.join(chaves)
+
+    secoes_dados = [('slots', slots.tobytes()), ('offsets', offsets.tobytes()),
+                    ('indices', indices.tobytes()), ('idf', idf.tobytes()), ('blob', blob)]
+
+    cabecalho = {
+        'versao_modelo': versao_modelo,
+        'n_termos': n_termos,
+        'n_slots': n_slots,
+        'n_features': len(vectorizer.vocabulary_),
+        'ngram_range': list(vectorizer.ngram_range),
+        'token_pattern': vectorizer.token_pattern,
+        'lowercase': vectorizer.lowercase,
+        # Nome (ou função) que remove acentos; o VetorizadorRapido recusa qualquer valor
+        'strip_accents': getattr(vectorizer.strip_accents, '__name__', vectorizer.strip_accents),
+        'binary': vectorizer.binary,
+        'sublinear_tf': vectorizer.sublinear_tf,
+        'use_idf': vectorizer.use_idf,
+        'norm': vectorizer.norm,
+        'dtype': np.dtype(vectorizer.dtype).name,
+        'stop_words': sorted(vectorizer.get_stop_words() or []),
+        'secoes': {},
+    }
+
+    # Calcular posições das seções (dependem do tamanho do próprio cabeçalho)
+    while True:
+        cabecalho_bytes = json.dumps(cabecalho, ensure_ascii=False).encode('utf-8')
+        posicao = _alinhar(len(MAGIC) + 4 + len(cabecalho_bytes))
+        secoes = {}
+        for nome, dados in secoes_dados:
+            secoes[nome] = [posicao, len(dados)]
+            posicao = _alinhar(posicao + len(dados))
+        if secoes == cabecalho['secoes']:
+            break
+        cabecalho['secoes'] = secoes
+
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(cabecalho_bytes)))
+        f.write(cabecalho_bytes)
+        for nome, dados in secoes_dados:
+            inicio, _ = secoes[nome]
+            f.write(b'\0' * (inicio - f.tell()))
+            f.write(dados)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+class VocabularioCompacto:
+    """
+    Vocabulário somente leitura mapeado do arquivo gerado por
+    exportar_vocabulario. Oferece a interface de consulta de um dict
+    (`get`, `in`, `len`) sem criar objetos Python por termo.
+    """
+
+    def __init__(self, caminho):
+        if sys.byteorder != 'little':
+            raise ValueError('Formato compacto de vocabulário requer arquitetura little-endian')
+
+        with open(caminho, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{caminho} não é um vocabulário compacto válido')
+
+        (tamanho_cabecalho,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        inicio_cabecalho = len(MAGIC) + 4
+        self.cabecalho = json.loads(self._mmap[inicio_cabecalho:inicio_cabecalho + tamanho_cabecalho])
+
+        memoria = memoryview(self._mmap)
+        secoes = self.cabecalho['secoes']
+
+        def secao(nome):
+            inicio, tamanho = secoes[nome]
+            return memoria[inicio:inicio + tamanho]
+
+        self._slots = secao('slots').cast('I')
+        self._offsets = secao('offsets').cast('I')
+        self._indices = secao('indices').cast('I')
+        self._blob = secao('blob')
+        inicio_idf, tamanho_idf = secoes['idf']
+        self.idf = np.frombuffer(self._mmap, dtype='<f8', count=tamanho_idf // 8, offset=inicio_idf)
+
+        self._mascara = self.cabecalho['n_slots'] - 1
+        self.versao_modelo = self.cabecalho['versao_modelo']
+
+    def get(self, termo, default=None):
+        chave = termo.encode('utf-8')
+        slots, offsets, blob = self._slots, self._offsets, self._blob
+        posicao = _hash(chave) & self._mascara
+        while True:
+            entrada = slots[posicao]
+            if not entrada:
+                return default
+            entrada -= 1
+            if blob[offsets[entrada]:offsets[entrada + 1]] == chave:
+                return self._indices[entrada]
+            posicao = (posicao + 1) & self._mascara
+
+    def __contains__(self, termo):
+        return self.get(termo) is not None
+
+    def __len__(self):
+        return self.cabecalho['n_termos']
+
+    def termos(self):
+        """Itera os termos em ordem alfabética (ordem do blob)."""
+        offsets, blob = self._offsets, self._blob
+        for entrada in range(len(self)):
+            yield bytes(blob[offsets[entrada]:offsets[entrada + 1]]).decode('utf-8')
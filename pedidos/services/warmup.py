@@ -0,0 +1,59 @@
+import gc
+import time
+
+
+# Textos representativos: exercitam as regras de regex (com e sem dígitos)
+# e o caminho completo do ML (textos sem padrões explícitos)
+TEXTOS_AQUECIMENTO = [
+    'Solicito cópia do meu cadastro. Meu CPF é 529.982.247-25 e meu telefone (61) 99999-9999.',
+    'Gostaria de receber no e-mail fulano.silva@exemplo.com.br a resposta do pedido.',
+    'Solicito informações sobre os contratos de limpeza firmados pela secretaria em 2023.',
+    'Gostaria de saber o andamento do processo SEI 00080-00012345/2023-11 sobre a reforma da escola.',
+    'Prezados, boa tarde! Venho por meio deste solicitar a relação de servidores lotados na '
+    'administração regional, com os respectivos cargos e a carga horária semanal de cada um, '
+    'bem como a escala de atendimento ao público durante o mês de dezembro.',
+    'Meu nome é Maria Aparecida Souza e preciso do prontuário 123456 da minha mãe.',
+]
+
+
+def aquecer(textos=None, threshold=0.35):
+    """
+    Passa textos representativos pelas duas camadas do detector (regex e ML),
+    inicializando caches, regex compilados e o modelo carregado.
+
+    Returns:
+        float: Duração do aquecimento em segundos
+    """
+    from .detector import detect_personal_data
+    from .ml_model import carregar_inferencia, predict_proba
+
+    inicio = time.perf_counter()
+    carregar_inferencia()
+    for texto in textos or TEXTOS_AQUECIMENTO:
+        detect_personal_data(texto, threshold)
+        # Garante que o ML também rode nos textos que o regex já resolveria
+        predict_proba(texto)
+    return time.perf_counter() - inicio
+
+
+def preparar_para_fork(textos=None):
+    """
+    Carrega e aquece o modelo no processo mestre antes do fork dos workers.
+
+    Depois do aquecimento, `gc.freeze()` move todos os objetos existentes
+    para a geração permanente: o coletor de lixo dos filhos não percorre
+    (nem escreve nos cabeçalhos de) objetos herdados, o que mantém as
+    páginas do modelo compartilhadas por copy-on-write.
+
+    Returns:
+        bool: False se não houver modelo treinado para carregar
+    """
+    from .ml_model import get_model_version
+
+    if get_model_version() == 'sem-modelo':
+        return False
+
+    aquecer(textos)
+    gc.collect()
+    gc.freeze()
+    return True
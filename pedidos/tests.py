@@ -1,3 +1,1264 @@
-from django.test import TestCase
+import datetime
+import importlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from unittest import mock
+from unittest import skipUnless
+from .models import AuditoriaClassificacao, AvaliacaoSombra, ClassificacaoPedido, JobClassificacao
+from .services import registro_modelos
+from .services.admissao import ControleAdmissao, SobrecargaML
+from .services.arquivos import escrever_atomico
+from .services.auditoria import RegistradorAuditoria
+from .services.avaliacao_shards import ResultadoParcial, interpretar_thresholds, mesclar
+from .services.carga import ClienteCarga, executar_aberto, executar_fechado, resumir, servidor_em_processo
+from .services.classification_store import BufferClassificacoes, hash_texto
+from .services.detector import batch_detect, detect_personal_data, detectar_agrupando
+from .services.quase_duplicatas import agrupar_textos
+from .services.ml_model import (
+    MODELO_PATH, VECTORIZER_PATH, CacheModelos, carregar_modelo, predict_proba, predict_proba_cascata
+)
+from .services.exploracao import fronteira_pareto, gerar_grade
+from .services.fast_vectorizer import VetorizadorRapido
+from .services.fluxo_resultados import COLUNAS_RESULTADO, EscritorResultados, ler_lotes_rotulados
+from .services.jobs import processar_job, reivindicar_job, submeter_job
+from .services.indice_linhas import IndiceLinhas, intervalo_da_parte, linhas_no_intervalo
+from .services.lote_paralelo import PROCESSOS, THREADS, detectar_em_paralelo, fatiar, resolver_modo
+from .services.memoria import formatar_mb, uso_memoria
+from .services.metricas import AmostraReservatorio
+from .services.perfil_memoria import gravar_estimadores, medir_componente
+from .services.preprocessing import TextoAnalisado
+from .services.processamento_retomavel import processar_arquivo
+from .services.regex_rules import contains_personal_data_regex, detect_personal_data_regex
+from .services.regras_pii import CAMINHO_PADRAO, compilar, regras_ativas
+from .services.sombra import AvaliadorSombra, obter_avaliador
+from .services.validators import (
+    cep_do_df, get_validation_stats, reset_validation_stats, validate_cep, validate_cnpj, validate_cpf,
+    validate_rg, validate_telefone,
+)
+from .services.vocabulario import VocabularioCompacto, exportar_vocabulario
+from .services.warmup import aquecer, preparar_para_fork
 
-# Create your tests here.
+
+ARTEFATOS_DISPONIVEIS = os.path.exists(MODELO_PATH) and os.path.exists(VECTORIZER_PATH)
+DATASET_PATH = 'ml/dataset.csv'
+
+
+class ClassificacoesPersistidasTests(TestCase):
+    """Cache de classificações: gravação em lote e reaproveitamento por versão."""
+
+    def resultado(self, metodo='regex', confianca=1.0, **detalhes):
+        return {
+            'contem_dados_pessoais': True,
+            'metodo': metodo,
+            'tipos_detectados': ['CPF'] if metodo == 'regex' else ['Detectado por ML'],
+            'confianca': confianca,
+            'detalhes': detalhes,
+        }
+
+    def test_buffer_grava_em_lote_e_atualiza(self):
+        with BufferClassificacoes('v1', 'r1', batch_size=2) as buffer:
+            buffer.adicionar(hash_texto('a'), self.resultado())
+            buffer.adicionar(hash_texto('b'), self.resultado())
+            self.assertEqual(ClassificacaoPedido.objects.count(), 2)
+            buffer.adicionar(hash_texto('c'), self.resultado())
+            buffer.adicionar(hash_texto('d'), self.resultado(degradado=True))
+            buffer.adicionar(hash_texto('e'), self.resultado('ml', 0.8, versao_modelo='v2'))
+            self.assertEqual(len(buffer.pendentes), 1)
+        self.assertEqual(ClassificacaoPedido.objects.count(), 3)
+        self.assertEqual(buffer.total_gravados, 3)
+
+        with BufferClassificacoes('v1', 'r1') as buffer:
+            buffer.adicionar(hash_texto('a'), self.resultado('ml', 0.8))
+        registro = ClassificacaoPedido.objects.get(texto_hash=hash_texto('a'))
+        self.assertEqual((registro.metodo, registro.confianca), ('ml', 0.8))
+        self.assertEqual(ClassificacaoPedido.objects.count(), 3)
+
+    def test_reutilizar_por_versao_do_modelo(self):
+        textos = ['Meu CPF é 529.982.247-25', 'Solicito o contrato de limpeza']
+        detectar = mock.Mock(side_effect=lambda texto, *args, **kwargs: (
+            self.resultado(versao_regras=kwargs['regras'].versao) if 'CPF' in texto
+            else self.resultado('ml', 0.2, versao_regras=kwargs['regras'].versao)
+        ))
+        with mock.patch('pedidos.services.detector.detect_personal_data', detectar):
+            batch_detect(textos, reutilizar=True, modelo='v1')
+            self.assertEqual(detectar.call_count, 2)
+
+            reutilizados = batch_detect(textos, 0.1, reutilizar=True, modelo='v1')
+            self.assertEqual(detectar.call_count, 2)
+            self.assertTrue(all(r['detalhes']['reutilizado'] for r in reutilizados))
+            # Resultado do ML recalculado para o novo threshold
+            self.assertTrue(reutilizados[1]['contem_dados_pessoais'])
+
+            batch_detect(textos, reutilizar=True, modelo='v2')
+            self.assertEqual(detectar.call_count, 4)
+        self.assertEqual(ClassificacaoPedido.objects.filter(versao_modelo='v2').count(), 2)
+
+
+def _classificar_lote_falso(args):
+    textos, _threshold, _grupos, _versao = args
+    return [
+        {
+            'contem_dados_pessoais': 'CPF' in texto,
+            'metodo': 'regex',
+            'tipos_detectados': ['CPF'] if 'CPF' in texto else [],
+            'confianca': 1.0,
+            'detalhes': {},
+        }
+        for texto in textos
+    ]
+
+
+class JobsTests(TestCase):
+    """Fila de jobs: submissão pela API, reivindicação e retomada por chunk."""
+
+    TEXTOS = ['Meu CPF é 529.982.247-25', 'pedido 1', 'pedido 2', 'CPF 111.444.777-35', 'pedido 3']
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        configuracao = override_settings(CLASSIFICACAO_JOBS_DIR=self.diretorio)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def arquivo(self):
+        conteudo = 'texto\n' + '\n'.join(self.TEXTOS) + '\n'
+        return SimpleUploadedFile('pedidos.csv', conteudo.encode('utf-8'), content_type='text/csv')
+
+    def test_submeter_acompanhar_e_baixar(self):
+        cliente = Client()
+        self.assertEqual(cliente.post('/jobs/', {'arquivo': self.arquivo(), 'threshold': '1.5'}).status_code, 400)
+        self.assertEqual(JobClassificacao.objects.count(), 0)
+
+        resposta = cliente.post('/jobs/', {'arquivo': self.arquivo(), 'threshold': '0.4'})
+        self.assertEqual(resposta.status_code, 202)
+        job_id = resposta.json()['job_id']
+        self.assertEqual(cliente.get(f'/jobs/{job_id}/').json()['status'], 'pendente')
+        self.assertEqual(cliente.get(f'/jobs/{job_id}/resultado/').status_code, 409)
+
+        with mock.patch('pedidos.services.jobs._classificar_lote', _classificar_lote_falso):
+            processar_job(reivindicar_job('worker-1'))
+
+        estado = cliente.get(f'/jobs/{job_id}/').json()
+        self.assertEqual((estado['status'], estado['total_linhas'], estado['progresso']), ('concluido', 5, 1.0))
+        resultado = cliente.get(f'/jobs/{job_id}/resultado/')
+        linhas = b''.join(resultado.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(linhas[0], 'linha,contem_dados_pessoais,metodo,tipos_detectados,confianca')
+        self.assertEqual([linha.split(',')[:2] for linha in linhas[1:]], [
+            ['0', '1'], ['1', '0'], ['2', '0'], ['3', '1'], ['4', '0'],
+        ])
+
+    def test_reivindicacao_unica_e_job_orfao(self):
+        job = submeter_job(self.arquivo())
+        self.assertEqual(reivindicar_job('worker-1').pk, job.pk)
+        self.assertIsNone(reivindicar_job('worker-2'))
+
+        # Worker caiu: sem atualização além do timeout, outro worker assume
+        JobClassificacao.objects.filter(pk=job.pk).update(
+            atualizado_em=job.atualizado_em - datetime.timedelta(minutes=10)
+        )
+        orfao = reivindicar_job('worker-2', timeout_segundos=300)
+        self.assertEqual((orfao.pk, orfao.worker), (job.pk, 'worker-2'))
+        self.assertIsNone(reivindicar_job('worker-3', timeout_segundos=300))
+
+    def test_para_quando_outro_worker_assume(self):
+        job = submeter_job(self.arquivo(), tamanho_chunk=2)
+        chamadas = []
+
+        def classificar(args):
+            chamadas.append(args[0])
+            if len(chamadas) == 2:
+                # Este worker ficou parado além do timeout e outro reivindicou o job
+                JobClassificacao.objects.filter(pk=job.pk).update(worker='worker-2')
+            return _classificar_lote_falso(args)
+
+        with mock.patch('pedidos.services.jobs._classificar_lote', classificar):
+            resultado = processar_job(reivindicar_job('worker-1'))
+        self.assertEqual(len(chamadas), 2)
+        self.assertEqual((resultado.worker, resultado.status), ('worker-2', JobClassificacao.PROCESSANDO))
+        self.assertEqual((resultado.ultimo_chunk, resultado.linhas_processadas), (0, 2))
+        self.assertEqual(list(resultado.resultados.values_list('linha', flat=True).order_by('linha')), [0, 1])
+
+    def test_versao_do_modelo_fixada_durante_o_job(self):
+        submeter_job(self.arquivo(), tamanho_chunk=2)
+        ativa = mock.Mock(return_value='v1')
+
+        def detectar(texto, threshold, modelo=None):
+            # Outra versão é ativada no meio do job
+            ativa.return_value = 'v2'
+            return {
+                'contem_dados_pessoais': False, 'metodo': 'ml', 'tipos_detectados': [], 'confianca': 0.1,
+                'detalhes': {'versao_modelo': modelo or ativa()},
+            }
+
+        with mock.patch('pedidos.services.ml_model.get_model_version', ativa), \
+                mock.patch('pedidos.services.detector.detect_personal_data', side_effect=detectar) as detector:
+            processar_job(reivindicar_job('worker-1'))
+        self.assertEqual({chamada.kwargs['modelo'] for chamada in detector.call_args_list}, {'v1'})
+        self.assertEqual(set(ClassificacaoPedido.objects.values_list('versao_modelo', flat=True)), {'v1'})
+        self.assertEqual(ClassificacaoPedido.objects.count(), 5)
+
+    def test_retoma_do_ultimo_chunk_apos_queda(self):
+        job = submeter_job(self.arquivo(), tamanho_chunk=2)
+        primeiro_chunk = _classificar_lote_falso((self.TEXTOS[:2], 0.35, None, 'sem-modelo'))
+        queda = mock.Mock(side_effect=[primeiro_chunk, RuntimeError('worker caiu')])
+
+        with mock.patch('pedidos.services.jobs._classificar_lote', queda):
+            with self.assertRaises(RuntimeError):
+                processar_job(reivindicar_job('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual((job.ultimo_chunk, job.linhas_processadas, job.resultados.count()), (0, 2, 2))
+
+        # Retomada: só os chunks não confirmados são classificados
+        classificar = mock.Mock(side_effect=_classificar_lote_falso)
+        with mock.patch('pedidos.services.jobs._classificar_lote', classificar):
+            job = processar_job(job)
+        self.assertEqual([chamada.args[0][0] for chamada in classificar.call_args_list], [
+            self.TEXTOS[2:4], self.TEXTOS[4:],
+        ])
+        self.assertEqual(job.status, JobClassificacao.CONCLUIDO)
+        self.assertEqual(list(job.resultados.order_by('linha').values_list('linha', flat=True)), [0, 1, 2, 3, 4])
+
+
+class ValidadoresTests(SimpleTestCase):
+    """Candidatos numéricos do regex: dígitos verificadores, DDD, CEP, RG e contadores."""
+
+    def test_validadores(self):
+        self.assertTrue(validate_cpf('529.982.247-25'))
+        self.assertFalse(validate_cpf('529.982.247-26'))
+        self.assertFalse(validate_cpf('111.111.111-11'))
+        self.assertTrue(validate_cnpj('11.222.333/0001-81'))
+        self.assertFalse(validate_cnpj('11.222.333/0001-82'))
+        self.assertTrue(validate_telefone('(61) 99876-5432'))
+        self.assertTrue(validate_telefone('+55 61 3333-4444'))
+        self.assertFalse(validate_telefone('(20) 99876-5432'))
+        self.assertFalse(validate_telefone('1234-5678'))
+        self.assertTrue(validate_cep('01310-100'))
+        self.assertFalse(validate_cep('00000-000'))
+        self.assertTrue(cep_do_df('70040-020'))
+        self.assertFalse(cep_do_df('01310-100'))
+        self.assertTrue(validate_rg('1.927.384'))
+        self.assertTrue(validate_rg('SP-21.927.384-X'))
+        self.assertFalse(validate_rg('123456789'))
+        self.assertFalse(validate_rg('7777777'))
+
+    def test_rotulos_e_contadores(self):
+        reset_validation_stats()
+        for texto in ('Nota fiscal 123456789', 'empenho 20230001', 'Nota fiscal 29.345.871'):
+            self.assertEqual(detect_personal_data_regex(texto)['tipos_detectados'], [], texto)
+        estatisticas = get_validation_stats()
+        self.assertEqual((estatisticas['rg'], estatisticas['telefone']), (3, 1))
+
+        # Rótulo de dado pessoal mais perto do número que o de documento
+        self.assertEqual(
+            detect_personal_data_regex('Processo 1, telefone 3333-4444')['tipos_detectados'], ['Telefone']
+        )
+        # Rótulo só vale como palavra inteira: "hotel" não é "tel"
+        for texto in ('Reclamação sobre o hotel 1234-5678 no centro', 'hotel (11) 0234-5678', 'motel 1234-5678'):
+            self.assertNotIn('Telefone', detect_personal_data_regex(texto)['tipos_detectados'], texto)
+        self.assertEqual(detect_personal_data_regex('Tel: 1234-5678')['tipos_detectados'], ['Telefone'])
+        # CPF com rótulo é aceito mesmo com dígito verificador errado
+        self.assertEqual(detect_personal_data_regex('CPF 529.982.247-26')['tipos_detectados'], ['CPF'])
+        self.assertEqual(
+            detect_personal_data_regex('Moro em Brasília, 70040-020')['tipos_detectados'], ['Endereço']
+        )
+
+
+class RotularDatasetTests(SimpleTestCase):
+    """A rotulação em chunks paralelos dá os mesmos labels, na mesma ordem, que a sequencial."""
+
+    def test_chunks_em_processos_iguais_ao_sequencial(self):
+        import rotular_dataset
+
+        textos = [
+            'Meu CPF é 529.982.247-25',
+            'Solicito a lista de contratos vigentes',
+            'Contato: fulano.silva@exemplo.com.br',
+            'Qual o horário de funcionamento?',
+        ] * 3 + ['telefone (61) 99876-5432']
+        sequencial = rotular_dataset.rotular_textos(textos, processos=1)
+        self.assertEqual(sequencial, [1, 0, 1, 0] * 3 + [1])
+
+        with mock.patch.object(rotular_dataset, 'TAMANHO_CHUNK', 3), redirect_stdout(StringIO()) as saida:
+            paralelo = rotular_dataset.rotular_textos(textos, processos=2)
+        self.assertEqual(paralelo, sequencial)
+        self.assertIn('chunk 5/5', saida.getvalue())
+
+
+@skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+class TextoAnalisadoTests(SimpleTestCase):
+    """O pré-processamento é feito uma vez e compartilhado entre regex e ML."""
+
+    def test_regex_e_ml_compartilham_o_pre_processamento(self):
+        analisado = TextoAnalisado('Solicito INFORMAÇÕES sobre os contratos de limpeza de 2023')
+        self.assertEqual(analisado.normalizado, 'solicito informações sobre os contratos de limpeza de 2023')
+        self.assertTrue(analisado.tem_digitos)
+
+        with mock.patch('pedidos.services.preprocessing.re.finditer', wraps=re.finditer) as finditer:
+            resultado = detect_personal_data(analisado)
+            detect_personal_data(analisado)
+        self.assertEqual(resultado['metodo'], 'ml')
+        tokenizacoes = [chamada for chamada in finditer.call_args_list if chamada.args[1] is analisado.normalizado]
+        self.assertEqual(len(tokenizacoes), 1)
+        self.assertEqual(analisado.tokens()[0], ('solicito', 0, 8))
+        self.assertTrue({'normalizacao', 'regex', 'tokens', 'ml'} <= set(analisado.tempos))
+
+
+@skipUnless(ARTEFATOS_DISPONIVEIS and os.path.exists(DATASET_PATH), 'Artefatos de ML não encontrados')
+class VetorizadorRapidoTests(SimpleTestCase):
+    """O vetorizador de inferência deve gerar as mesmas features do scikit-learn."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.modelo, cls.vectorizer = carregar_modelo()
+        cls.rapido = VetorizadorRapido(cls.vectorizer)
+        cls.textos = pd.read_csv(DATASET_PATH)['texto'].fillna('').astype(str).tolist()
+
+    def test_features_identicas_no_dataset(self):
+        for texto in self.textos:
+            esperado = self.vectorizer.transform([texto])
+            obtido = self.rapido.transform(texto)
+
+            self.assertEqual(obtido.shape, esperado.shape)
+            np.testing.assert_array_equal(obtido.indices, esperado.indices)
+            np.testing.assert_allclose(obtido.data, esperado.data, rtol=1e-12, atol=1e-15)
+
+    def test_aceita_texto_analisado(self):
+        texto = self.textos[0]
+        np.testing.assert_allclose(
+            self.rapido.transform(TextoAnalisado(texto)).toarray(),
+            self.rapido.transform(texto).toarray(),
+        )
+
+    def test_probabilidades_identicas(self):
+        for texto in self.textos[:50]:
+            np.testing.assert_allclose(
+                self.modelo.predict_proba(self.rapido.transform(texto)),
+                self.modelo.predict_proba(self.vectorizer.transform([texto])),
+                rtol=1e-9,
+            )
+
+    def test_texto_sem_features(self):
+        obtido = self.rapido.transform('')
+        self.assertEqual(obtido.nnz, 0)
+        self.assertEqual(obtido.shape, (1, self.rapido.n_features))
+
+
+@skipUnless(ARTEFATOS_DISPONIVEIS and os.path.exists(DATASET_PATH), 'Artefatos de ML não encontrados')
+class VocabularioCompactoTests(SimpleTestCase):
+    """O vocabulário mapeado em memória deve equivaler ao vocabulary_ do vectorizer."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        _, cls.vectorizer = carregar_modelo()
+        cls.diretorio = tempfile.TemporaryDirectory()
+        cls.caminho = os.path.join(cls.diretorio.name, 'vectorizer.vocab')
+        exportar_vocabulario(cls.vectorizer, cls.caminho, 'teste')
+        cls.vocabulario = VocabularioCompacto(cls.caminho)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.diretorio.cleanup()
+        super().tearDownClass()
+
+    def test_consulta_por_ngrama(self):
+        self.assertEqual(len(self.vocabulario), len(self.vectorizer.vocabulary_))
+        for termo, indice in self.vectorizer.vocabulary_.items():
+            self.assertEqual(self.vocabulario.get(termo), indice)
+        self.assertIsNone(self.vocabulario.get('termo inexistente no vocabulário'))
+        self.assertEqual(list(self.vocabulario.termos()), sorted(self.vectorizer.vocabulary_))
+
+    def test_features_identicas_ao_vectorizer(self):
+        rapido = VetorizadorRapido(self.vectorizer)
+        compacto = VetorizadorRapido(self.vocabulario)
+        for texto in pd.read_csv(DATASET_PATH)['texto'].fillna('').astype(str):
+            esperado = rapido.transform(texto)
+            obtido = compacto.transform(texto)
+            np.testing.assert_array_equal(obtido.indices, esperado.indices)
+            np.testing.assert_array_equal(obtido.data, esperado.data)
+
+    def test_parametros_nao_suportados_usam_o_scikit_learn(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        textos = ['Informação sobre a licitação', 'Solicito informacao do contrato']
+        for parametros in ({'strip_accents': 'unicode'}, {'decode_error': 'ignore'}, {'input': 'filename'}):
+            with self.assertRaises(ValueError):
+                VetorizadorRapido(TfidfVectorizer().fit(textos).set_params(**parametros))
+
+        caminho = os.path.join(self.diretorio.name, 'sem_acentos.vocab')
+        exportar_vocabulario(TfidfVectorizer(strip_accents='unicode').fit(textos), caminho, 'teste')
+        vocabulario = VocabularioCompacto(caminho)
+        self.assertEqual(vocabulario.cabecalho['strip_accents'], 'unicode')
+        with self.assertRaises(ValueError):
+            VetorizadorRapido(vocabulario)
+        self.assertIsNone(self.vocabulario.cabecalho['strip_accents'])
+
+
+def medir_imports(args, cwd=None):
+    """
+    Executa um processo Python com `-X importtime`.
+
+    Returns:
+        tuple: (módulos importados, tempo total de import em ms)
+    """
+    env = dict(os.environ, PYTHONPATH=str(settings.BASE_DIR))
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=cwd or settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    modulos = set()
+    total_us = 0
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'imported package' in linha:
+            continue
+        proprio, _, nome = linha[len('import time:'):].split('|')
+        total_us += int(proprio)
+        modulos.add(nome.strip())
+    return modulos, total_us / 1000
+
+
+class OrcamentoImportTests(SimpleTestCase):
+    """
+    Caminhos que não usam o modelo não devem importar scikit-learn.
+
+    Os orçamentos têm folga de ~3x sobre o medido (API ~0,4s, lote só-regex
+    ~0,9s); importar o scikit-learn sozinho já custa mais de 1s.
+    """
+
+    PESADOS = ('sklearn', 'scipy', 'joblib')
+    ORCAMENTO_API_MS = 1500
+    ORCAMENTO_LOTE_REGEX_MS = 3000
+
+    def assertSemPesados(self, modulos, extras=()):
+        importados = sorted(
+            m for m in modulos if m.split('.')[0] in self.PESADOS + tuple(extras)
+        )
+        self.assertEqual(importados, [])
+
+    def test_inicializacao_da_api(self):
+        modulos, total_ms = medir_imports([
+            '-c',
+            "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings'); "
+            "import django; django.setup(); import core.urls",
+        ])
+        self.assertIn('pedidos.services.detector', modulos)
+        self.assertSemPesados(modulos, extras=('numpy', 'pandas'))
+        self.assertLess(total_ms, self.ORCAMENTO_API_MS)
+
+    @skipUnless(os.path.exists(DATASET_PATH), 'Dataset não encontrado')
+    def test_lote_apenas_regex(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            os.makedirs(os.path.join(cwd, 'ml'))
+            shutil.copy(DATASET_PATH, os.path.join(cwd, 'ml', 'dataset.csv'))
+            modulos, total_ms = medir_imports(
+                [os.path.join(settings.BASE_DIR, 'manage.py'), 'testar_dataset', '--only-regex'],
+                cwd=cwd,
+            )
+        self.assertIn('pedidos.services.metricas', modulos)
+        self.assertSemPesados(modulos)
+        self.assertLess(total_ms, self.ORCAMENTO_LOTE_REGEX_MS)
+
+
+class RegistroModelosTests(SimpleTestCase):
+    """Versões ficam em diretórios próprios e só mudam de ativa pelo ponteiro."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        patcher = mock.patch.object(registro_modelos, 'DIRETORIO_MODELOS', self.diretorio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _registrar(self, conteudo, ativa=False):
+        temporario = registro_modelos.novo_diretorio_temporario()
+        for nome in ('modelo', 'vectorizer'):
+            with open(os.path.join(temporario, registro_modelos.ARTEFATOS[nome]), 'wb') as f:
+                f.write(conteudo + nome.encode())
+        versao = registro_modelos.registrar_versao(temporario, {'metricas': {'f1_cv_medio': 0.5}})
+        if ativa:
+            registro_modelos.ativar_versao(versao)
+        return versao
+
+    def test_registrar_e_ativar(self):
+        primeira = self._registrar(b'a', ativa=True)
+        segunda = self._registrar(b'b')
+
+        self.assertEqual(registro_modelos.versao_ativa(), primeira)
+        self.assertEqual(registro_modelos.ler_manifesto(segunda)['metricas'], {'f1_cv_medio': 0.5})
+        versoes = {m['versao']: m['ativa'] for m in registro_modelos.listar_versoes()}
+        self.assertTrue(versoes[primeira])
+        self.assertFalse(versoes[segunda])
+
+        registro_modelos.ativar_versao(segunda)
+        self.assertEqual(registro_modelos.resolver_versao(None), segunda)
+        self.assertEqual(registro_modelos.resolver_versao(primeira), primeira)
+
+    def test_mesmos_artefatos_mesma_versao(self):
+        self.assertEqual(self._registrar(b'a'), self._registrar(b'a'))
+
+    def test_versao_invalida(self):
+        for versao in ('0123456789abcdef', '../../etc/passwd', ''):
+            with self.assertRaises(ValueError):
+                registro_modelos.caminhos_versao(versao)
+
+    def test_primeiro_treino_ativado_mesmo_com_artefatos_legados(self):
+        from .services.treinamento import train_model
+
+        legado = os.path.join(self.diretorio, 'legado')
+        os.makedirs(legado)
+        caminhos = {nome: os.path.join(legado, arquivo) for nome, arquivo in registro_modelos.ARTEFATOS.items()}
+        for nome in ('modelo', 'vectorizer'):
+            with open(caminhos[nome], 'wb') as f:
+                f.write(b'legado ' + nome.encode())
+        patcher = mock.patch.object(registro_modelos, 'CAMINHOS_LEGADO', caminhos)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        versao_legada = registro_modelos.versao_legada()
+        self.assertEqual(registro_modelos.versao_ativa(), versao_legada)
+        self.assertIsNone(registro_modelos.versao_ativa_registrada())
+
+        textos = [f'meu cpf é {i} e meu telefone {i}' for i in range(10)] + [f'contratos de {i}' for i in range(10)]
+        rotulos = [1] * 10 + [0] * 10
+        with redirect_stdout(StringIO()):
+            primeira = train_model(textos, rotulos)
+            segunda = train_model(textos[::-1], rotulos[::-1])
+        self.assertNotEqual(primeira, versao_legada)
+        self.assertNotEqual(segunda, primeira)
+        self.assertEqual(registro_modelos.versao_ativa(), primeira)
+        self.assertEqual(registro_modelos.versao_ativa_registrada(), primeira)
+
+    def test_remover(self):
+        ativa = self._registrar(b'a', ativa=True)
+        outra = self._registrar(b'b')
+        with self.assertRaises(ValueError):
+            registro_modelos.remover_versao(ativa)
+        registro_modelos.remover_versao(outra)
+        self.assertFalse(registro_modelos.existe(outra))
+
+
+class CacheModelosTests(SimpleTestCase):
+    """Versões menos usadas saem do cache quando o limite de memória estoura."""
+
+    def setUp(self):
+        arquivo = tempfile.NamedTemporaryFile(delete=False)
+        arquivo.write(b'x' * 1024 * 1024)
+        arquivo.close()
+        self.caminho = arquivo.name
+        self.addCleanup(os.remove, self.caminho)
+
+    @override_settings(ML_CACHE_MODELOS_MB=3.5)
+    def test_descarta_menos_recente(self):
+        cache = CacheModelos()
+        with mock.patch('pedidos.services.ml_model.get_model_version', return_value='ativa'):
+            cache.obter('ativa', 'modelo', object, self.caminho)
+            cache.obter('v1', 'modelo', object, self.caminho)
+            cache.obter('v2', 'modelo', object, self.caminho)
+            self.assertEqual([v for v, _ in cache.versoes()], ['ativa', 'v1', 'v2'])
+
+            # Usar v1 a torna a mais recente; v2 passa a ser a candidata ao descarte
+            cache.obter('v1', 'modelo', object, self.caminho)
+            cache.obter('v3', 'modelo', object, self.caminho)
+
+        self.assertEqual([v for v, _ in cache.versoes()], ['ativa', 'v1', 'v3'])
+
+    def test_carga_unica_com_threads_concorrentes(self):
+        cache = CacheModelos()
+        cargas = []
+        liberar = threading.Event()
+
+        def carregar():
+            cargas.append(1)
+            liberar.wait(5)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futuros = [pool.submit(cache.obter, 'v1', 'modelo', carregar) for _ in range(8)]
+            time.sleep(0.05)
+            liberar.set()
+            objetos = {id(f.result()) for f in futuros}
+        self.assertEqual(len(cargas), 1)
+        self.assertEqual(len(objetos), 1)
+
+
+class PreCarregamentoTests(SimpleTestCase):
+    """Pré-carregamento para o fork dos workers e medição de memória."""
+
+    def test_uso_memoria_com_e_sem_proc(self):
+        medida = uso_memoria()
+        self.assertGreater(medida['rss'], 0)
+        with mock.patch('pedidos.services.memoria.os.path.exists', return_value=False):
+            self.assertGreater(uso_memoria()['rss'], 0)
+            self.assertEqual(uso_memoria(pid=1), {})
+            # Sem o módulo resource (Windows)
+            with mock.patch.dict(sys.modules, {'resource': None}):
+                self.assertEqual(uso_memoria(), {})
+        self.assertEqual(formatar_mb(3 * 1024 * 1024), '3.0')
+
+    def test_preparar_para_fork_aquece_e_congela(self):
+        with mock.patch('pedidos.services.warmup.aquecer') as aquecer, \
+                mock.patch('pedidos.services.warmup.gc') as gc_falso:
+            with mock.patch('pedidos.services.ml_model.get_model_version', return_value='sem-modelo'):
+                self.assertFalse(preparar_para_fork())
+            aquecer.assert_not_called()
+
+            with mock.patch('pedidos.services.ml_model.get_model_version', return_value='v1'):
+                self.assertTrue(preparar_para_fork(['texto']))
+            aquecer.assert_called_once_with(['texto'])
+            gc_falso.freeze.assert_called_once_with()
+
+    @skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+    def test_aquecer_passa_pelo_regex_e_pelo_ml(self):
+        with mock.patch('pedidos.services.ml_model.predict_proba', wraps=predict_proba) as predicao:
+            self.assertGreater(aquecer(['Meu CPF é 529.982.247-25', 'Solicito os contratos de 2023']), 0)
+        self.assertGreaterEqual(predicao.call_count, 2)
+
+    def test_wsgi_so_pre_carrega_com_a_opcao(self):
+        import core.wsgi
+
+        with mock.patch('pedidos.services.warmup.preparar_para_fork') as preparar:
+            with override_settings(ML_PRELOAD=False):
+                importlib.reload(core.wsgi)
+            preparar.assert_not_called()
+            with override_settings(ML_PRELOAD=True):
+                importlib.reload(core.wsgi)
+            preparar.assert_called_once_with()
+
+
+class AvaliadorSombraTests(TestCase):
+    """A sombra nunca bloqueia a requisição: fila cheia descarta o item."""
+
+    RESULTADO_ML = {
+        'contem_dados_pessoais': True,
+        'metodo': 'ml',
+        'tipos_detectados': ['Detectado por ML'],
+        'confianca': 0.6,
+        'detalhes': {'ml_score': 0.6, 'versao_modelo': 'ativa'},
+    }
+
+    def test_desativada_sem_candidato(self):
+        with override_settings(ML_SOMBRA_MODELO=''):
+            self.assertIsNone(obter_avaliador())
+
+    def test_fila_cheia_descarta(self):
+        avaliador = AvaliadorSombra('candidata', amostragem=1.0, fila_max=1)
+        with mock.patch.object(avaliador, '_garantir_thread'):
+            self.assertTrue(avaliador.agendar('texto um', self.RESULTADO_ML))
+            self.assertFalse(avaliador.agendar('texto dois', self.RESULTADO_ML))
+
+        estatisticas = avaliador.estatisticas()
+        self.assertEqual(estatisticas['agendadas'], 1)
+        self.assertEqual(estatisticas['descartadas'], 1)
+        self.assertEqual(estatisticas['fila'], 1)
+
+    def test_ignora_decisoes_do_regex(self):
+        avaliador = AvaliadorSombra('candidata', amostragem=1.0)
+        resultado = dict(self.RESULTADO_ML, metodo='regex', detalhes={})
+        self.assertFalse(avaliador.agendar('CPF 529.982.247-25', resultado))
+
+    @skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+    def test_processar_grava_comparacao(self):
+        candidata = registro_modelos.versao_ativa()
+        avaliador = AvaliadorSombra(candidata, amostragem=1.0)
+        avaliador.processar([('Solicito os contratos de limpeza de 2023.', 'ativa', 0.6, 0.35)])
+
+        registro = AvaliacaoSombra.objects.get()
+        self.assertEqual(registro.versao_candidata, candidata)
+        self.assertTrue(registro.contem_ativo)
+        self.assertEqual(len(registro.texto_hash), 64)
+        self.assertEqual(registro.concordam, registro.contem_candidato)
+
+
+@skipUnless(ARTEFATOS_DISPONIVEIS and os.path.exists(DATASET_PATH), 'Artefatos de ML não encontrados')
+class CascataTests(SimpleTestCase):
+    """A cascata decide sempre igual ao ensemble completo."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.textos = pd.read_csv(DATASET_PATH)['texto'].fillna('').astype(str).tolist()
+
+    def test_mesma_decisao_do_ensemble(self):
+        for threshold in (0.2, 0.35, 0.5, 0.7):
+            for texto in self.textos:
+                completo = predict_proba(texto)
+                cascata, _, antecipada = predict_proba_cascata(texto, threshold)
+                self.assertEqual(cascata >= threshold, completo >= threshold)
+                if not antecipada:
+                    self.assertAlmostEqual(cascata, completo, places=12)
+
+
+class ControleAdmissaoTests(SimpleTestCase):
+    """Sem vaga no ML a requisição degrada para regex ou é rejeitada, sem esperar além do limite."""
+
+    TEXTO_ML = 'Solicito informações sobre os contratos de limpeza firmados pela secretaria.'
+
+    @skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+    def test_degrada_sem_vaga(self):
+        controle = ControleAdmissao(1, espera_max_ms=1)
+        with controle.vaga() as admitida:
+            self.assertTrue(admitida)
+            resultado = detect_personal_data(self.TEXTO_ML, admissao=controle)
+
+        self.assertEqual(resultado['metodo'], 'regex_degradado')
+        self.assertTrue(resultado['detalhes']['degradado'])
+        self.assertEqual(controle.estatisticas()['degradadas'], 1)
+
+    def test_regex_nao_passa_pelo_controle(self):
+        controle = ControleAdmissao(1, espera_max_ms=1, politica='rejeitar')
+        with controle.vaga():
+            resultado = detect_personal_data('Meu CPF é 529.982.247-25', admissao=controle)
+        self.assertEqual(resultado['metodo'], 'regex')
+
+    def test_rejeita_sem_vaga(self):
+        controle = ControleAdmissao(1, espera_max_ms=1, politica='rejeitar', retry_after=3)
+        with controle.vaga():
+            with self.assertRaises(SobrecargaML) as contexto:
+                with controle.vaga():
+                    pass
+        self.assertEqual(contexto.exception.retry_after, 3)
+        self.assertEqual(controle.estatisticas()['rejeitadas'], 1)
+
+        # A vaga é devolvida ao sair do bloco
+        with controle.vaga() as admitida:
+            self.assertTrue(admitida)
+        self.assertEqual(controle.estatisticas()['em_voo'], 0)
+
+    def test_politica_invalida(self):
+        with self.assertRaises(ValueError):
+            ControleAdmissao(1, politica='ignorar')
+
+
+class QuaseDuplicatasTests(SimpleTestCase):
+    """Pedidos-modelo com só a data trocada caem no mesmo grupo."""
+
+    MODELO = (
+        'Solicito, com base na Lei de Acesso à Informação, cópia do contrato de limpeza '
+        'firmado em {} pela Secretaria de Saúde, incluindo aditivos e notas de empenho.'
+    )
+
+    def test_agrupa_modelos_com_data_diferente(self):
+        textos = [
+            self.MODELO.format('10/01/2024'),
+            'Gostaria de saber o cronograma da obra da escola classe do Guará.',
+            self.MODELO.format('22/07/2023'),
+        ]
+        self.assertEqual(agrupar_textos(textos), [0, 1, 0])
+
+    @skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+    def test_regex_roda_em_todos_os_membros(self):
+        textos = [
+            self.MODELO.format('10/01/2024'),
+            self.MODELO.format('11/01/2024') + ' Meu CPF é 529.982.247-25.',
+            self.MODELO.format('12/01/2024'),
+        ]
+        resultados = detectar_agrupando(textos)
+
+        self.assertEqual(agrupar_textos(textos), [0, 0, 0])
+        self.assertEqual(resultados[0]['metodo'], 'ml')
+        self.assertEqual(resultados[1]['metodo'], 'regex')
+        self.assertTrue(resultados[2]['detalhes']['ml_do_grupo'])
+        self.assertEqual(resultados[2]['confianca'], resultados[0]['confianca'])
+
+
+@override_settings(ALLOWED_HOSTS=['127.0.0.1'])
+class CargaTests(SimpleTestCase):
+    """O gerador de carga fala HTTP de verdade com o servidor no próprio processo."""
+
+    TEXTOS = ['Meu CPF é 529.982.247-25', 'Contato: maria.souza@gmail.com']
+
+    def test_fechado_e_aberto(self):
+        with servidor_em_processo() as url:
+            cliente = ClienteCarga(url)
+            fechado = resumir(*executar_fechado(cliente, self.TEXTOS, 2, requisicoes=6))
+            aberto = resumir(*executar_aberto(cliente, self.TEXTOS, taxa=20, duracao=0.2))
+
+        self.assertEqual(fechado['requisicoes'], 6)
+        self.assertEqual(fechado['sucesso'], 6)
+        self.assertEqual(fechado['metodos'], {'regex': 6})
+        self.assertEqual(aberto['requisicoes'], 4)
+        self.assertEqual(aberto['taxa_erro'], 0.0)
+
+    def test_sem_servidor_conta_como_erro(self):
+        with servidor_em_processo() as url:
+            pass
+        resumo = resumir(*executar_fechado(ClienteCarga(url, timeout=1), self.TEXTOS, 1, requisicoes=2))
+        self.assertEqual(resumo['sem_resposta'], 2)
+        self.assertEqual(resumo['taxa_erro'], 1.0)
+
+
+class FluxoResultadosTests(SimpleTestCase):
+    """Dataset lido em lotes e resultados gravados linha a linha, em memória fixa."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def test_le_em_lotes_e_grava_em_todos_os_formatos(self):
+        entrada = os.path.join(self.diretorio, 'dataset.csv')
+        pd.DataFrame({'texto': ['a', 'b', None, 'd', 'e'], 'label': [0, 1, 0, 1, 1]}).to_csv(entrada, index=False)
+
+        coluna, lotes = ler_lotes_rotulados(entrada, tamanho_lote=2)
+        lotes = list(lotes)
+        self.assertEqual(coluna, 'texto')
+        self.assertEqual([len(lote) for lote in lotes], [2, 2, 1])
+        self.assertEqual(lotes[1][0], ('', 0))
+
+        for extensao in ('.xlsx', '.csv', '.jsonl'):
+            saida = os.path.join(self.diretorio, 'resultado' + extensao)
+            with EscritorResultados(saida) as escritor:
+                for lote in lotes:
+                    for texto, label in lote:
+                        escritor.escrever({'texto': texto, 'label_real': label, 'predicao': 1, 'acertou': label == 1})
+            if extensao == '.xlsx':
+                df = pd.read_excel(saida)
+            elif extensao == '.csv':
+                df = pd.read_csv(saida)
+            else:
+                df = pd.read_json(saida, lines=True)
+            self.assertEqual(list(df.columns), COLUNAS_RESULTADO)
+            self.assertEqual(df['label_real'].tolist(), [0, 1, 0, 1, 1])
+
+    def test_sem_coluna_label(self):
+        entrada = os.path.join(self.diretorio, 'sem_label.csv')
+        pd.DataFrame({'texto': ['a']}).to_csv(entrada, index=False)
+        with self.assertRaises(ValueError):
+            ler_lotes_rotulados(entrada)
+
+    def test_reservatorio_guarda_no_maximo_a_capacidade(self):
+        amostra = AmostraReservatorio(3)
+        for i in range(1000):
+            amostra.adicionar(i)
+        self.assertEqual(amostra.vistos, 1000)
+        self.assertEqual(len(amostra.itens), 3)
+        self.assertEqual(len(set(amostra.itens)), 3)
+        # Não fica só com os primeiros itens do fluxo
+        self.assertGreater(max(amostra.itens), 2)
+
+
+class ShardsTests(SimpleTestCase):
+    """Shards avaliados separadamente e mesclados dão as mesmas métricas da avaliação inteira."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.dataset = os.path.join(self.diretorio, 'dataset.csv')
+        pd.DataFrame({
+            'texto': [f'Pedido {i} sobre obras' for i in range(20)] + [f'Meu CPF é 529.982.247-25 ({i})' for i in range(10)],
+            'label': [0] * 18 + [1] * 12,
+        }).to_csv(self.dataset, index=False)
+
+    def avaliar(self, nome, *extras):
+        caminho = os.path.join(self.diretorio, nome)
+        call_command(
+            'testar_dataset', '--only-regex', '--file', self.dataset, '--parcial', caminho,
+            '--saida', os.path.join(self.diretorio, nome + '.csv'), *extras, stdout=StringIO(),
+        )
+        return ResultadoParcial.ler(caminho)
+
+    def test_mesclar_reproduz_avaliacao_completa(self):
+        completo = self.avaliar('completo.json')
+        shards = [self.avaliar(f'{i}.json', '--shard', f'{i}/3') for i in (1, 2, 3)]
+        mesclado = mesclar(shards)
+
+        self.assertEqual(sum(s.matriz.total for s in shards), 30)
+        self.assertEqual(mesclado.matriz.como_dict(), completo.matriz.como_dict())
+        self.assertEqual(
+            {m: c.como_dict() for m, c in mesclado.por_metodo.items()},
+            {m: c.como_dict() for m, c in completo.por_metodo.items()},
+        )
+
+        with self.assertRaisesMessage(ValueError, 'Shards faltando: 2'):
+            mesclar([shards[0], shards[2]])
+        with self.assertRaisesMessage(ValueError, 'Shards repetidos: 1'):
+            mesclar(shards + [shards[0]])
+
+    def test_thresholds_validados_e_sem_cascata(self):
+        self.assertEqual(interpretar_thresholds('0.2, 0.5,1'), [0.2, 0.5, 1.0])
+        for invalido in ('0.2,abc', '0.2,,0.5', '1.5', '-0.1'):
+            with self.assertRaises(ValueError):
+                interpretar_thresholds(invalido)
+
+        saida = StringIO()
+        call_command('testar_dataset', '--file', self.dataset, '--thresholds', '0.2,x', stdout=saida)
+        self.assertIn('Threshold inválido: x', saida.getvalue())
+
+        # O score do ML precisa ser exato em todos os thresholds contados
+        with mock.patch(
+            'pedidos.management.commands.testar_dataset.detect_personal_data', wraps=detect_personal_data
+        ) as detectar:
+            call_command(
+                'testar_dataset', '--file', self.dataset, '--thresholds', '0.2,0.5',
+                '--parcial', os.path.join(self.diretorio, 'hibrido.json'),
+                '--saida', os.path.join(self.diretorio, 'hibrido.csv'), stdout=StringIO(),
+            )
+        self.assertTrue(detectar.called)
+        self.assertTrue(all(chamada.kwargs['cascata'] is False for chamada in detectar.call_args_list))
+
+
+class FronteiraParetoTests(SimpleTestCase):
+    """Candidato dominado em F1, latência e tamanho fica fora da fronteira."""
+
+    def test_fronteira(self):
+        candidatos = [
+            {'id': 1, 'f1_cv_medio': 0.80, 'latencia_p50_ms': 12.0, 'tamanho_bytes': 600},
+            {'id': 2, 'f1_cv_medio': 0.77, 'latencia_p50_ms': 0.7, 'tamanho_bytes': 50},
+            {'id': 3, 'f1_cv_medio': 0.76, 'latencia_p50_ms': 1.2, 'tamanho_bytes': 100},
+            {'id': 4, 'f1_cv_medio': 0.77, 'latencia_p50_ms': 0.7, 'tamanho_bytes': 50},
+        ]
+        fronteira = fronteira_pareto(candidatos)
+        # Empates exatos não se dominam
+        self.assertEqual([c['id'] for c in fronteira], [1, 2, 4])
+        self.assertFalse(candidatos[2]['pareto'])
+
+    def test_grade_e_configuracao(self):
+        from .services.treinamento import configuracao_completa, criar_ensemble
+
+        grade = gerar_grade([1000], [(1, 1), (1, 2)], [2], [('nb', 'lr')])
+        self.assertEqual(len(grade), 2)
+        self.assertEqual(configuracao_completa(grade[0])['estimadores'], ('nb', 'lr'))
+        self.assertEqual([nome for nome, _ in criar_ensemble(grade[0]).estimators], ['lr', 'nb'])
+        with self.assertRaises(ValueError):
+            configuracao_completa({'estimadores': ('svm',)})
+
+
+class RotaEnxutaTests(SimpleTestCase):
+    """classificar-pedido/rapido/ responde como a rota do DRF, sem passar pelo DRF."""
+
+    def setUp(self):
+        self.cliente = Client()
+
+    def post(self, rota, corpo, content_type='application/json'):
+        return self.cliente.post(rota, corpo, content_type=content_type)
+
+    def test_mesmo_contrato_da_rota_drf(self):
+        casos = [
+            json.dumps({'texto': 'Meu CPF é 529.982.247-25'}),
+            json.dumps({'texto': ''}),
+            json.dumps({'texto': 'Meu CPF é 529.982.247-25', 'modelo': '../../etc'}),
+        ]
+        for corpo, esperado in zip(casos, (200, 400, 400)):
+            drf = self.post('/classificar-pedido/', corpo)
+            enxuta = self.post('/classificar-pedido/rapido/', corpo)
+            self.assertEqual(drf.status_code, esperado)
+            self.assertEqual(enxuta.status_code, esperado)
+            self.assertEqual(enxuta.content, drf.content)
+            self.assertEqual(enxuta['Content-Type'], 'application/json')
+
+    def test_json_invalido_e_metodo(self):
+        self.assertEqual(self.post('/classificar-pedido/rapido/', '{texto').status_code, 400)
+        self.assertEqual(self.cliente.get('/classificar-pedido/rapido/').status_code, 405)
+        formulario = self.post(
+            '/classificar-pedido/rapido/', 'texto=Meu+CPF+%C3%A9+529.982.247-25',
+            content_type='application/x-www-form-urlencoded',
+        )
+        self.assertEqual(formulario.json()['metodo'], 'regex')
+
+
+class BuscaSeletivaTests(SimpleTestCase):
+    """tipos e early_exit: só as regras pedidas, parando no primeiro acerto."""
+
+    TEXTO = 'Sou Maria, email maria@exemplo.com, CPF 529.982.247-25'
+
+    def test_tipos_e_early_exit_no_regex(self):
+        completo = detect_personal_data_regex(self.TEXTO)
+        self.assertEqual(completo['tipos_detectados'], ['CPF', 'Email'])
+
+        self.assertEqual(detect_personal_data_regex(self.TEXTO, tipos=['CPF'])['detalhes'], {'cpf': '529.982.247-25'})
+        self.assertFalse(detect_personal_data_regex(self.TEXTO, tipos=['telefone'])['detected'])
+        antecipado = detect_personal_data_regex(self.TEXTO, early_exit=True)
+        self.assertEqual(antecipado['tipos_detectados'], ['Email'])
+        with self.assertRaises(ValueError):
+            detect_personal_data_regex(self.TEXTO, tipos=['placa'])
+
+        self.assertEqual(contains_personal_data_regex(self.TEXTO), (True, ['CPF', 'Email']))
+        self.assertEqual(contains_personal_data_regex(self.TEXTO, early_exit=True), (True, ['Email']))
+
+    def test_detector_e_api(self):
+        # Com tipos, o ML não é consultado e a resposta é marcada como parcial
+        resultado = detect_personal_data('Sem dados aqui', tipos=['cpf'])
+        self.assertEqual(resultado['metodo'], 'regex')
+        self.assertTrue(resultado['detalhes']['busca_parcial'])
+        self.assertNotIn('busca_parcial', detect_personal_data(self.TEXTO)['detalhes'])
+
+        cliente = Client()
+        for rota in ('/classificar-pedido/', '/classificar-pedido/rapido/'):
+            resposta = cliente.post(
+                rota, json.dumps({'texto': self.TEXTO, 'tipos': ['Email'], 'early_exit': True}),
+                content_type='application/json',
+            )
+            self.assertEqual(resposta.status_code, 200)
+            self.assertEqual(resposta.json()['tipos_detectados'], ['Email'])
+            for tipos in (['placa'], 5, {'cpf': True}, ['cpf', 3]):
+                invalido = cliente.post(
+                    rota, json.dumps({'texto': self.TEXTO, 'tipos': tipos}), content_type='application/json'
+                )
+                self.assertEqual(invalido.status_code, 400, tipos)
+                self.assertIn('erro', invalido.json())
+
+
+class AuditoriaTests(TestCase):
+    """O log de auditoria só enfileira na requisição; a gravação é em lote."""
+
+    RESULTADO = {
+        'contem_dados_pessoais': True,
+        'metodo': 'regex',
+        'tipos_detectados': ['CPF'],
+        'confianca': 1.0,
+        'detalhes': {'cpf': '529.982.247-25'},
+    }
+
+    def registrador(self, **parametros):
+        registrador = RegistradorAuditoria(**parametros)
+        # Sem a thread de fundo: o teste grava com descarregar()
+        registrador._thread = mock.Mock()
+        return registrador
+
+    def test_descarregar_grava_so_o_hash(self):
+        registrador = self.registrador(lote=2)
+        for texto in ('CPF 529.982.247-25', 'outro texto', 'mais um'):
+            self.assertTrue(registrador.registrar(texto, self.RESULTADO, 1.5))
+        self.assertEqual(AuditoriaClassificacao.objects.count(), 0)
+
+        registrador.descarregar()
+        self.assertEqual(AuditoriaClassificacao.objects.count(), 3)
+        registro = AuditoriaClassificacao.objects.first()
+        self.assertEqual(len(registro.texto_hash), 64)
+        self.assertEqual(registro.tipos_detectados, ['CPF'])
+        self.assertEqual(registro.latencia_ms, 1.5)
+        estatisticas = registrador.estatisticas()
+        self.assertEqual((estatisticas['gravadas'], estatisticas['lotes'], estatisticas['fila']), (3, 2, 0))
+
+    def test_politicas_com_buffer_cheio(self):
+        descartar = self.registrador(capacidade=1, politica='descartar')
+        self.assertTrue(descartar.registrar('primeiro', self.RESULTADO, 1.0))
+        self.assertFalse(descartar.registrar('segundo', self.RESULTADO, 1.0))
+
+        antigo = self.registrador(capacidade=1, politica='descartar_antigo')
+        antigo.registrar('primeiro', self.RESULTADO, 1.0)
+        self.assertTrue(antigo.registrar('segundo', self.RESULTADO, 2.0))
+        antigo.descarregar()
+        self.assertEqual(AuditoriaClassificacao.objects.get().latencia_ms, 2.0)
+        self.assertEqual(antigo.estatisticas()['descartadas'], 1)
+
+        bloquear = self.registrador(capacidade=1, politica='bloquear', espera_max_ms=1)
+        bloquear.registrar('primeiro', self.RESULTADO, 1.0)
+        self.assertFalse(bloquear.registrar('segundo', self.RESULTADO, 1.0))
+        self.assertEqual(bloquear.estatisticas()['esperas'], 1)
+
+        with self.assertRaises(ValueError):
+            RegistradorAuditoria(politica='ignorar')
+
+
+class ProcessamentoRetomavelTests(SimpleTestCase):
+    """Índice de offsets, divisão por bytes e retomada a partir do checkpoint."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.entrada = os.path.join(self.diretorio, 'pedidos.jsonl')
+        with open(self.entrada, 'w', encoding='utf-8') as f:
+            for i in range(23):
+                f.write(json.dumps({'texto': f'Pedido número {i} ção'}, ensure_ascii=False) + '\n')
+                if i == 5:
+                    f.write('\n')
+
+    @staticmethod
+    def classificar(textos):
+        return [
+            {'contem_dados_pessoais': False, 'metodo': 'regex', 'tipos_detectados': [], 'confianca': len(t)}
+            for t in textos
+        ]
+
+    def test_escrita_atomica_preserva_original_em_erro(self):
+        caminho = os.path.join(self.diretorio, 'checkpoint.json')
+        escrever_atomico(caminho, '{"offset": 1}')
+        with mock.patch('pedidos.services.arquivos.os.replace', side_effect=OSError('disco cheio')):
+            with self.assertRaises(OSError):
+                escrever_atomico(caminho, '{"offset": 2}')
+        with open(caminho, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"offset": 1}')
+        self.assertFalse([nome for nome in os.listdir(self.diretorio) if nome.startswith('.tmp-')])
+
+    def test_indice_e_partes(self):
+        indice = IndiceLinhas.abrir(self.entrada)
+        self.assertEqual(len(indice), 23)
+        self.assertTrue(os.path.exists(self.entrada + '.idx'))
+        self.assertEqual(len(IndiceLinhas.abrir(self.entrada).inicios), 23)
+        numero, offset, linha = next(indice.ler(10, 11))
+        self.assertEqual((numero, json.loads(linha)['texto']), (10, 'Pedido número 10 ção'))
+        self.assertEqual(indice.linha_do_offset(offset), 10)
+
+        # As partes por bytes cobrem cada linha exatamente uma vez
+        tamanho = os.path.getsize(self.entrada)
+        offsets = [
+            o for parte in range(1, 5)
+            for o, _ in linhas_no_intervalo(self.entrada, *intervalo_da_parte(tamanho, parte, 4))
+        ]
+        self.assertEqual(offsets, list(indice.inicios))
+
+    def test_retomada_apos_falha(self):
+        referencia = os.path.join(self.diretorio, 'referencia.jsonl')
+        processar_arquivo(self.entrada, referencia, self.classificar, ['texto'], a_cada=5)
+
+        saida = os.path.join(self.diretorio, 'saida.jsonl')
+        chamadas = []
+
+        def falhar_no_terceiro_lote(textos):
+            chamadas.append(len(textos))
+            if len(chamadas) == 3:
+                raise RuntimeError('queda')
+            return self.classificar(textos)
+
+        with self.assertRaises(RuntimeError):
+            processar_arquivo(self.entrada, saida, falhar_no_terceiro_lote, ['texto'], a_cada=5)
+        estado = processar_arquivo(self.entrada, saida, self.classificar, ['texto'], a_cada=5, retomar=True)
+
+        self.assertEqual(estado['processadas'], 23)
+        self.assertTrue(estado['concluido'])
+        self.assertIsNotNone(estado['retomado_de'])
+        with open(saida, 'rb') as a, open(referencia, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+        with self.assertRaises(ValueError):
+            processar_arquivo(self.entrada, saida, self.classificar, ['texto'], a_cada=7, inicio=3, retomar=True)
+
+
+    def test_ultimo_lote_cheio_nao_confirma_lote_vazio(self):
+        saida = os.path.join(self.diretorio, 'saida.jsonl')
+        progresso = []
+        estado = processar_arquivo(
+            self.entrada, saida, self.classificar, ['texto'], a_cada=23, progresso=lambda e: progresso.append(dict(e))
+        )
+        self.assertEqual([e['processadas'] for e in progresso], [23])
+        self.assertTrue(estado['concluido'])
+        with open(saida + '.checkpoint.json', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        self.assertEqual((checkpoint['processadas'], checkpoint['concluido']), (23, True))
+        self.assertEqual(checkpoint['offset'], os.path.getsize(self.entrada))
+
+        for a_cada in ('0', '-5'):
+            with self.assertRaises(CommandError):
+                call_command('classificar_arquivo', self.entrada, '--a-cada', a_cada, stdout=StringIO())
+
+class PerfilMemoriaTests(SimpleTestCase):
+    """Cada componente é medido num processo próprio."""
+
+    def test_regex_medido_em_processo_separado(self):
+        medida = medir_componente('regex')
+        self.assertEqual(set(medida), {'rss', 'heap', 'pico_heap', 'segundos'})
+        self.assertGreater(medida['heap'], 0)
+
+    @skipUnless(ARTEFATOS_DISPONIVEIS, 'Artefatos de ML não encontrados')
+    def test_estimadores_gravados_um_a_um(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            estimadores = gravar_estimadores(MODELO_PATH, diretorio)
+            self.assertEqual([nome for nome, _ in estimadores], ['lr', 'rf', 'nb'])
+            self.assertTrue(all(os.path.exists(caminho) for _, caminho in estimadores))
+
+
+class LoteParaleloTests(SimpleTestCase):
+    """O lote paralelo devolve os mesmos resultados, na mesma ordem, que o sequencial."""
+
+    def test_threads_mesma_ordem_do_sequencial(self):
+        textos = [
+            'Meu CPF é 529.982.247-25',
+            'Solicito informações sobre os contratos de limpeza',
+            'Contato: fulano.silva@exemplo.com.br',
+        ] * 7
+        paralelos = detectar_em_paralelo(textos, workers=4, modo=THREADS)
+        sequenciais = [detect_personal_data(texto) for texto in textos]
+        self.assertEqual(
+            [(r['contem_dados_pessoais'], r['metodo'], r['tipos_detectados']) for r in paralelos],
+            [(r['contem_dados_pessoais'], r['metodo'], r['tipos_detectados']) for r in sequenciais],
+        )
+
+    def test_fatias_e_modo(self):
+        fatias = fatiar(list(range(10)), workers=2)
+        self.assertEqual([x for fatia in fatias for x in fatia], list(range(10)))
+        self.assertLessEqual(len(fatias), 8)
+        with mock.patch('pedidos.services.lote_paralelo.gil_ativo', return_value=True):
+            self.assertEqual(resolver_modo('auto'), PROCESSOS)
+        with mock.patch('pedidos.services.lote_paralelo.gil_ativo', return_value=False):
+            self.assertEqual(resolver_modo('auto'), THREADS)
+        with self.assertRaises(ValueError):
+            resolver_modo('gpu')
+
+
+class RegrasPiiTests(TestCase):
+    """Regras declarativas: versão nos resultados e recarga sem reiniciar."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.caminho = os.path.join(self.diretorio, 'regras.json')
+        with open(CAMINHO_PADRAO, encoding='utf-8') as f:
+            self.dados = json.load(f)
+        self.instante = time.time_ns()
+        self.gravar(self.dados)
+        configuracao = override_settings(REGRAS_PII_PATH=self.caminho)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def gravar(self, conteudo):
+        with open(self.caminho, 'w', encoding='utf-8') as f:
+            f.write(conteudo if isinstance(conteudo, str) else json.dumps(conteudo))
+        # mtime sempre diferente, mesmo em sistemas de arquivos de baixa resolução
+        self.instante += 10 ** 9
+        os.utime(self.caminho, ns=(self.instante, self.instante))
+
+    def test_recarga_e_versao_nos_resultados(self):
+        texto = 'Meu CPF é 529.982.247-25'
+        antes = detect_personal_data(texto)
+        self.assertIn('CPF', antes['tipos_detectados'])
+        versao = antes['detalhes']['versao_regras']
+        self.assertEqual(versao, regras_ativas().versao)
+
+        sem_cpf = dict(self.dados, regras=[r for r in self.dados['regras'] if r['tipo'] != 'cpf'])
+        sem_cpf['ordem_early_exit'] = [t for t in self.dados['ordem_early_exit'] if t != 'cpf']
+        self.gravar(sem_cpf)
+        with self.assertLogs('pedidos.services.regras_pii', level='INFO') as registros:
+            depois = detect_personal_data_regex(texto)
+        self.assertEqual([r.levelname for r in registros.records], ['INFO'])
+        self.assertNotIn('CPF', depois['tipos_detectados'])
+        self.assertNotEqual(depois['versao_regras'], versao)
+        # A API antiga usa o mesmo conjunto de regras
+        self.assertEqual(contains_personal_data_regex(texto), (False, []))
+
+        # Arquivo inválido: o conjunto anterior continua em uso
+        with self.assertLogs('pedidos.services.regras_pii', level='ERROR'):
+            self.gravar('{"regras": [')
+            self.assertEqual(regras_ativas().versao, depois['versao_regras'])
+
+    def test_versao_das_regras_faz_parte_da_chave(self):
+        resultados = batch_detect(['Meu CPF é 529.982.247-25'], reutilizar=True)
+        registro = ClassificacaoPedido.objects.get()
+        self.assertEqual(registro.versao_regras, resultados[0]['detalhes']['versao_regras'])
+
+        self.gravar(dict(self.dados, regras=self.dados['regras'][::-1]))
+        batch_detect(['Meu CPF é 529.982.247-25'], reutilizar=True)
+        self.assertEqual(ClassificacaoPedido.objects.count(), 2)
+
+    def test_compilar_rejeita_regra_invalida(self):
+        for regra in (
+            {'tipo': 'x', 'rotulo': 'X', 'padroes': ['\\d+'], 'validador': 'inexistente'},
+            {'tipo': 'x', 'rotulo': 'X', 'padroes': ['\\d+'], 'flags': 'MULTILINHA'},
+            {'tipo': 'x', 'rotulo': 'X', 'padroes': []},
+        ):
+            with self.assertRaises(ValueError):
+                compilar({'regras': [regra]}, 'teste')
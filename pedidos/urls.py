@@ -1,6 +1,14 @@
 from django.urls import path
-from .views import ClassificarPedidoView
+from .views import (
+    AdmissaoStatusView, ClassificarPedidoView, JobClassificacaoView, JobStatusView, JobResultadoView,
+    classificar_pedido_rapido,
+)
 
 urlpatterns = [
     path('classificar-pedido/', ClassificarPedidoView.as_view(), name='classificar-pedido'),
+    path('classificar-pedido/rapido/', classificar_pedido_rapido, name='classificar-pedido-rapido'),
+    path('admissao/', AdmissaoStatusView.as_view(), name='admissao'),
+    path('jobs/', JobClassificacaoView.as_view(), name='jobs'),
+    path('jobs/<uuid:job_id>/', JobStatusView.as_view(), name='job-status'),
+    path('jobs/<uuid:job_id>/resultado/', JobResultadoView.as_view(), name='job-resultado'),
 ]
\ No newline at end of file
@@ -1,7 +1,83 @@
+import csv
+import io
+import json
+import os
+import time
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from .models import JobClassificacao
+from .services.admissao import SobrecargaML, obter_controle
+from .services.auditoria import obter_registrador
 from .services.detector import detect_personal_data
+from .services.jobs import submeter_job
+from .services.regex_rules import normalizar_tipos
+from .services.registro_modelos import resolver_versao
+from .services.sombra import obter_avaliador
+
+
+def classificar(dados):
+    """
+    Validação e classificação comuns às duas rotas de classificar-pedido.
+    
+    Returns:
+        tuple: (corpo da resposta, status HTTP, cabeçalhos extras)
+    """
+    texto = dados.get('texto')
+    
+    if not texto:
+        return {'erro': 'Campo "texto" é obrigatório'}, status.HTTP_400_BAD_REQUEST, None
+    
+    # Versão do registro de modelos; sem o campo, usa a versão ativa
+    try:
+        versao = resolver_versao(dados.get('modelo'))
+    except ValueError as e:
+        return {'erro': str(e)}, status.HTTP_400_BAD_REQUEST, None
+    
+    # Busca seletiva: só alguns tipos e/ou parar no primeiro encontrado
+    tipos = dados.get('tipos')
+    if isinstance(tipos, str):
+        tipos = [tipo for tipo in tipos.split(',') if tipo.strip()]
+    elif tipos is not None and not (isinstance(tipos, list) and all(isinstance(tipo, str) for tipo in tipos)):
+        return (
+            {'erro': 'Campo "tipos" deve ser uma lista de tipos ou um texto separado por vírgulas'},
+            status.HTTP_400_BAD_REQUEST,
+            None,
+        )
+    try:
+        tipos = normalizar_tipos(tipos)
+    except ValueError as e:
+        return {'erro': str(e)}, status.HTTP_400_BAD_REQUEST, None
+    early_exit = dados.get('early_exit', False)
+    if isinstance(early_exit, str):
+        early_exit = early_exit.lower() in ('1', 'true', 'sim')
+    
+    inicio = time.perf_counter()
+    try:
+        resultado = detect_personal_data(
+            texto, modelo=versao, admissao=obter_controle(), tipos=tipos, early_exit=bool(early_exit)
+        )
+    except SobrecargaML as e:
+        return (
+            {'erro': 'Serviço sobrecarregado, tente novamente'},
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            {'Retry-After': str(e.retry_after)},
+        )
+    
+    # Auditoria: só entra no buffer, gravado em lotes em segundo plano
+    registrador = obter_registrador()
+    if registrador is not None:
+        registrador.registrar(texto, resultado, (time.perf_counter() - inicio) * 1000, versao)
+    
+    # Avaliação em sombra do modelo candidato: só enfileira, roda em segundo plano
+    avaliador = obter_avaliador()
+    if avaliador is not None and not dados.get('modelo') and not resultado['detalhes'].get('busca_parcial'):
+        avaliador.agendar(texto, resultado)
+    
+    return resultado, status.HTTP_200_OK, None
 
 
 class ClassificarPedidoView(APIView):
@@ -9,25 +85,171 @@ class ClassificarPedidoView(APIView):
     API para classificar se um pedido contém dados pessoais.
     
     POST /classificar-pedido/
-    Body: {"texto": "Texto do pedido..."}
+    Body: {"texto": "Texto do pedido...", "modelo": "<versão>" (opcional),
+           "tipos": ["cpf", "email"] (opcional), "early_exit": true (opcional)}
     
     Response: {
         "contem_dados_pessoais": true/false,
-        "metodo": "regex" ou "ml",
+        "metodo": "regex", "ml" ou "regex_degradado" (ML sobrecarregado),
         "tipos_detectados": ["CPF", "Email", ...],
         "confianca": 0.0-1.0
     }
+    
+    Com "tipos", só as regras desses tipos rodam e o ML não é consultado;
+    com "early_exit", a resposta sai no primeiro tipo confirmado. Nos dois
+    casos os detalhes trazem "busca_parcial": true.
+    
+    Com o controle de admissão na política 'rejeitar', a sobrecarga do ML
+    responde 429 com Retry-After.
+    """
+    
+    def post(self, request):
+        corpo, codigo, cabecalhos = classificar(request.data)
+        return Response(corpo, status=codigo, headers=cabecalhos)
+
+
+@csrf_exempt
+def classificar_pedido_rapido(request):
+    """
+    Mesma API de /classificar-pedido/ sem a pilha do DRF.
+    
+    POST /classificar-pedido/rapido/
+    
+    Sem negociação de conteúdo, seleção de parser, autenticação,
+    permissões, throttles nem renderer: lê o JSON direto do corpo e
+    serializa a resposta com os mesmos separadores do JSONRenderer (o
+    corpo é idêntico byte a byte). Aceita também formulário
+    (application/x-www-form-urlencoded), como a rota do DRF.
+    """
+    if request.method != 'POST':
+        return _json({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    if request.content_type == 'application/json':
+        try:
+            dados = json.loads(request.body or b'{}')
+        except ValueError as e:
+            return _json({'detail': f'JSON parse error - {e}'}, status.HTTP_400_BAD_REQUEST)
+        if not isinstance(dados, dict):
+            dados = {}
+    else:
+        dados = request.POST
+    
+    corpo, codigo, cabecalhos = classificar(dados)
+    return _json(corpo, codigo, cabecalhos)
+
+
+def _json(corpo, codigo, cabecalhos=None):
+    return HttpResponse(
+        json.dumps(corpo, ensure_ascii=False, separators=(',', ':')),
+        status=codigo,
+        content_type='application/json',
+        headers=cabecalhos,
+    )
+
+
+class AdmissaoStatusView(APIView):
+    """
+    Contadores do controle de admissão do ML neste processo.
+    
+    GET /admissao/
+    """
+    
+    def get(self, request):
+        controle = obter_controle()
+        if controle is None:
+            return Response({'ativo': False, 'pid': os.getpid()})
+        return Response(dict(controle.estatisticas(), ativo=True, pid=os.getpid()))
+
+
+class JobClassificacaoView(APIView):
+    """
+    Submete um arquivo para classificação assíncrona.
+    
+    POST /jobs/
+    Body (multipart): arquivo=<.csv|.xlsx|.jsonl>, threshold=0.35 (opcional)
+    
+    Response (202): {"job_id": "...", "status": "pendente"}
+    
+    O processamento é feito pelo worker: python manage.py processar_jobs
     """
     
     def post(self, request):
-        texto = request.data.get('texto')
+        arquivo = request.FILES.get('arquivo')
         
-        if not texto:
+        if not arquivo:
             return Response(
-                {'erro': 'Campo "texto" é obrigatório'},
+                {'erro': 'Campo "arquivo" é obrigatório'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        resultado = detect_personal_data(texto)
+        try:
+            threshold = float(request.data.get('threshold', 0.35))
+            if not 0 <= threshold <= 1:
+                raise ValueError(f'threshold deve estar entre 0 e 1 (recebido: {threshold})')
+            job = submeter_job(arquivo, threshold=threshold)
+        except ValueError as e:
+            return Response({'erro': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(
+            {'job_id': str(job.id), 'status': job.status},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class JobStatusView(APIView):
+    """
+    Consulta status e progresso de um job.
+    
+    GET /jobs/<job_id>/
+    """
+    
+    def get(self, request, job_id):
+        job = get_object_or_404(JobClassificacao, pk=job_id)
+        
+        return Response({
+            'job_id': str(job.id),
+            'arquivo': job.nome_original,
+            'status': job.status,
+            'total_linhas': job.total_linhas,
+            'linhas_processadas': job.linhas_processadas,
+            'progresso': round(job.progresso, 4),
+            'erro': job.erro or None,
+            'criado_em': job.criado_em,
+            'concluido_em': job.concluido_em,
+        })
+
+
+class JobResultadoView(APIView):
+    """
+    Baixa os resultados de um job concluído em CSV (gerado em streaming).
+    
+    GET /jobs/<job_id>/resultado/
+    """
+    
+    def get(self, request, job_id):
+        job = get_object_or_404(JobClassificacao, pk=job_id)
+        
+        if job.status != JobClassificacao.CONCLUIDO:
+            return Response(
+                {'erro': f'Job ainda não concluído (status: {job.status})'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        def linhas():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(['linha', 'contem_dados_pessoais', 'metodo', 'tipos_detectados', 'confianca'])
+            resultados = job.resultados.order_by('linha').values_list(
+                'linha', 'contem_dados_pessoais', 'metodo', 'tipos_detectados', 'confianca'
+            )
+            for linha, contem, metodo, tipos, confianca in resultados.iterator(chunk_size=2000):
+                writer.writerow([linha, int(contem), metodo, ';'.join(tipos), f'{confianca:.4f}'])
+                if buffer.tell() > 65536:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
         
-        return Response(resultado, status=status.HTTP_200_OK)
\ No newline at end of file
+        response = StreamingHttpResponse(linhas(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="resultado_{job.id}.csv"'
+        return response
@@ -9,76 +9,49 @@ Após rotular, o dataset pode ser usado para treinamento.
 """
 
 import pandas as pd
-import re
 import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-# Importar regras de regex
-import sys
-sys.path.append('pedidos/services')
+# Usar o mesmo conjunto de regras compiladas do serviço de detecção
+from pedidos.services.regex_rules import detect_personal_data_regex
 
-def detectar_dados_pessoais_regex(texto):
-    """
-    Detecta dados pessoais usando regex.
-    Retorna True se encontrar qualquer padrão de dados pessoais.
+# Abaixo deste tamanho o custo de criar processos não compensa
+TAMANHO_CHUNK = 2000
+
+
+def rotular_chunk(textos):
+    """Rotula uma lista de textos (executado em cada processo do pool)."""
+    return [1 if detect_personal_data_regex(texto)['detected'] else 0 for texto in textos]
+
+
+def rotular_textos(textos, processos=None):
     """
-    if not isinstance(texto, str):
-        return False
-    
-    # CPF - formatos: 123.456.789-00, 12345678900
-    if re.search(r'\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b', texto, re.IGNORECASE):
-        return True
-    
-    # RG - formatos: 1234567, 12.345.678-9
-    if re.search(r'\b([A-Z]{2}[-\s]?)?\d{1,2}\.?\d{3}\.?\d{3}[-\s]?[0-9Xx]?\b', texto, re.IGNORECASE):
-        # Verificar se não é apenas um número de processo ou protocolo
-        if not re.search(r'(processo|protocolo|licitação|contrato)\s*n?[°º]?\s*\d', texto, re.IGNORECASE):
-            return True
-    
-    # Email
-    if re.search(r'\b[a-zA-Z0-9][a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', texto, re.IGNORECASE):
-        return True
-    
-    # Telefone - (61) 99999-9999, 61999999999
-    if re.search(r'\b(\+?55\s?)?(\(?\d{2}\)?\s?)?([9]\d{4}|\d{4})[-\s]?\d{4}\b', texto):
-        return True
-    
-    # Matrícula funcional
-    if re.search(r'\bmatr[ií]cula\s*:?\s*\d{4,8}\b', texto, re.IGNORECASE):
-        return True
-    
-    # Endereço residencial
-    enderecos = [
-        r'\b(rua|avenida|av\.?|travessa|alameda|quadra)\s+[a-zA-Z0-9\s/]+,?\s*n[°º]?\s*\d+',
-        r'\bCEP:?\s*\d{5}-?\d{3}\b',
-        r'\b(apt|apto|apartamento|casa|bloco)\s*\d+',
-        r'\b(QS|QN|QR|QI|QE)\s*\d+\s+(conjunto|casa|lote)',
-    ]
-    for pattern in enderecos:
-        if re.search(pattern, texto, re.IGNORECASE):
-            return True
-    
-    # Nome próprio contextualizado
-    nomes_contexto = [
-        r'\b(nome|paciente|servidor|servidora|beneficiário|beneficiária|requerente|solicitante|cidadão|cidadã|aluno|aluna)\s*:?\s*([A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+\s+){1,5}[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+',
-        r'\b(Sr\.|Sra\.|Dr\.|Dra\.)\s+([A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+\s+){1,4}[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+',
-        r'\b(do\s+servidor|da\s+servidora|do\s+aluno|da\s+aluna)\s+([A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+\s+){1,4}[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+',
-    ]
-    for pattern in nomes_contexto:
-        if re.search(pattern, texto, re.IGNORECASE):
-            return True
+    Rotula todos os textos, dividindo em chunks entre processos.
     
-    # Data de nascimento
-    if re.search(r'\b(nascid[oa]|data\s+de\s+nascimento|DN)\s*(em|:)?\s*\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', texto, re.IGNORECASE):
-        return True
+    Args:
+        textos (list): Textos a rotular
+        processos (int): Número de processos (padrão: núcleos disponíveis)
     
-    # Prontuários
-    if re.search(r'\bprontu[áa]rio\s*:?\s*\d{4,10}\b', texto, re.IGNORECASE):
-        return True
+    Returns:
+        list: Labels (0 ou 1) na mesma ordem dos textos
+    """
+    processos = processos or os.cpu_count() or 1
     
-    return False
+    if processos == 1 or len(textos) <= TAMANHO_CHUNK:
+        return rotular_chunk(textos)
+    
+    chunks = [textos[i:i + TAMANHO_CHUNK] for i in range(0, len(textos), TAMANHO_CHUNK)]
+    labels = []
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        for i, resultado in enumerate(executor.map(rotular_chunk, chunks), 1):
+            labels.extend(resultado)
+            print(f"  chunk {i}/{len(chunks)} ({len(labels)}/{len(textos)} textos)")
+    return labels
 
 
-def main():
+def main(processos=None):
     print("\n" + "="*70)
     print("    ROTULAÇÃO AUTOMÁTICA DO DATASET")
     print("="*70)
@@ -134,24 +107,17 @@ def main():
     print("ROTULANDO TEXTOS (usando regex)...")
     print("="*70)
     
-    labels = []
-    deteccoes = []
-    
-    for idx, texto in enumerate(df[coluna_texto], 1):
-        tem_dados_pessoais = detectar_dados_pessoais_regex(texto)
-        label = 1 if tem_dados_pessoais else 0
-        labels.append(label)
-        
-        status = "✓ COM dados pessoais" if label == 1 else "○ SEM dados pessoais"
-        print(f"[{idx}/{len(df)}] {status} - {texto[:60]}...")
-        
-        deteccoes.append({
-            'texto': texto,
-            'label': label
-        })
-    
-    # Criar dataset rotulado
-    df_rotulado = pd.DataFrame(deteccoes)
+    textos = df[coluna_texto].tolist()
+    
+    inicio = time.perf_counter()
+    labels = rotular_textos(textos, processos)
+    duracao = time.perf_counter() - inicio
+    
+    print(f"\n✓ {len(textos)} textos rotulados em {duracao:.2f}s "
+          f"({len(textos) / max(duracao, 1e-9):,.0f} linhas/s)")
+    
+    # Criar dataset rotulado em uma única etapa
+    df_rotulado = pd.DataFrame({'texto': textos, 'label': labels})
     
     # Estatísticas
     print("\n" + "="*70)
@@ -203,14 +169,19 @@ def main():
     print("   4. ou execute tudo: 'python executar_teste_completo.py'")
     
     print("\n💡 DICA:")
-    print("   A rotulação automática usa apenas regex (sem ML)")
+    print("   A rotulação automática usa apenas regex (sem ML), com as mesmas regras da API")
     print("   Se encontrar erros, você pode corrigir manualmente em ml/dataset_rotulado.xlsx")
     print("   Depois salve como ml/dataset.csv e treine novamente")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rotula automaticamente o dataset usando as regras de regex do serviço")
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Número de processos (padrão: núcleos disponíveis)')
+    args = parser.parse_args()
+    
     try:
-        main()
+        main(args.processos)
     except KeyboardInterrupt:
         print("\n\n⚠️  Execução interrompida pelo usuário")
     except Exception as e: